@@ -62,6 +62,15 @@ MEDIA_ROOT = str(APPS_DIR('media'))
 # Examples: "http://media.lawrence.com/media/", "http://example.com/media/"
 MEDIA_URL = '/series/media/'
 
+# Directorio del backend columnar de datos de series (ver TS_DATA_BACKEND)
+TS_COLUMNAR_STORE_ROOT = env('TS_COLUMNAR_STORE_ROOT', default=str(APPS_DIR('columnar_store')))
+# Directorio de los archivos publicados para el backend 'mmap', debe ser accesible por los workers de la API
+TS_MMAP_STORE_ROOT = env('TS_MMAP_STORE_ROOT', default=str(APPS_DIR('mmap_store')))
+# Directorio de las copias locales de los archivos de datos de las distribuciones
+DISTRIBUTION_CACHE_ROOT = env('DISTRIBUTION_CACHE_ROOT', default=str(APPS_DIR('distribution_cache')))
+# Directorio de los metadatos previos a las indexaciones en un índice nuevo (ver TS_BLUE_GREEN_REINDEX)
+TS_BLUE_GREEN_METADATA_ROOT = env('TS_BLUE_GREEN_METADATA_ROOT', default=str(APPS_DIR('blue_green_metadata')))
+
 # Absolute path to the directory static files should be collected to.
 # Don't put anything in this directory yourself; store your static files
 # in apps' "static/" subdirectories and in STATICFILES_DIRS.
@@ -295,6 +304,14 @@ RQ_QUEUE_NAMES = [
 ]
 RQ_QUEUES = {name: REDIS_SETTINGS for name in RQ_QUEUE_NAMES}
 
+# Caché de respuestas de la API: en memoria por default. Para compartirlo entre workers
+# se puede usar Redis, e.g. API_RESPONSE_CACHE_URL=rediscache://localhost:6379/1
+# (requiere django-redis)
+CACHES = {
+    'default': env.cache('DEFAULT_CACHE_URL', default='locmem://'),
+    API_RESPONSE_CACHE_ALIAS: env.cache('API_RESPONSE_CACHE_URL', default='locmem://api_responses'),
+}
+
 ENV_TYPE = env('ENV_TYPE', default='')
 
 # Tarea a ser croneada para indexación. Defaults para uso local, en producción se deben setear estas variables!
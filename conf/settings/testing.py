@@ -26,6 +26,11 @@ DEBUG = False
 TEMPLATE_DEBUG = False
 TESTS_IN_PROGRESS = True
 
+# Las respuestas de la API dependen de los datos de cada test case
+API_RESPONSE_CACHE_ENABLED = False
+# Los tests leen los archivos de datos de las distribuciones de disco
+DISTRIBUTION_PREFETCH_ENABLED = False
+
 TEST_SERIES_NAME = 'test_series-{}'
 TEST_SERIES_NAME_DELAYED = TEST_SERIES_NAME + '-delayed'
 
@@ -1,9 +1,10 @@
 import json
 
-from elasticsearch.helpers import parallel_bulk
 from elasticsearch_dsl import Index
 from elasticsearch_dsl.connections import connections
 
+from series_tiempo_ar_api.libs.indexing.bulk import BulkStats, BulkWriter
+
 from . import constants
 from .doc import SeriesQuery
 from .constants import \
@@ -17,12 +18,13 @@ class AnalyticsIndexer:
         self.es_index.doc_type(SeriesQuery)
         self.es_connection = connections.get_connection()
 
-    def index(self, queryset):
+    def index(self, queryset) -> BulkStats:
         self._init_index()
 
-        for success, info in parallel_bulk(self.es_connection, generate_es_query(queryset)):
-            if not success:
-                raise RuntimeError(f"Error indexando query a ES: {info}")
+        writer = BulkWriter(self.es_connection)
+        for info in writer.write(generate_es_query(queryset)):
+            raise RuntimeError(f"Error indexando query a ES: {info}")
+        return writer.stats
 
     def _init_index(self):
         if not self.es_index.exists():
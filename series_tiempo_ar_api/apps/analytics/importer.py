@@ -7,6 +7,7 @@ from iso8601 import iso8601
 
 from series_tiempo_ar_api.apps.analytics.elasticsearch.index import AnalyticsIndexer
 from series_tiempo_ar_api.apps.analytics.models import AnalyticsImportTask, ImportConfig, Query
+from series_tiempo_ar_api.libs.indexing.bulk import BulkStats
 
 
 class AnalyticsImporter:
@@ -16,6 +17,7 @@ class AnalyticsImporter:
         self.requests = requests_lib
         self.limit = limit
         self.index_to_es = index_to_es
+        self.bulk_stats = BulkStats()
 
         # Precálculo
         self.loaded_api_mgmt_ids = set(Query.objects.values_list('api_mgmt_id', flat=True))
@@ -29,6 +31,8 @@ class AnalyticsImporter:
         ))
         try:
             self._run_import(import_all)
+            if self.index_to_es:
+                AnalyticsImportTask.info(self.task, "Indexación a ES: {}".format(self.bulk_stats))
             AnalyticsImportTask.info(self.task, "Todo OK")
         except Exception as e:
             AnalyticsImportTask.info(self.task, "Error importando analytics: {}".format(e))
@@ -66,7 +70,7 @@ class AnalyticsImporter:
         Query.objects.bulk_create(queries)
         # a ES
         if self.index_to_es:
-            AnalyticsIndexer().index(queries)
+            self.bulk_stats.update(AnalyticsIndexer().index(queries))
 
     def exec_request(self, url=None, **params):
         """Wrapper sobre la llamada a la API de api-mgmt"""
@@ -0,0 +1,102 @@
+#! coding: utf-8
+"""Validadores de requests condicionales (ETag / Last-Modified) para la API de
+series, para usar con django.views.decorators.http.condition. Se calculan a partir
+de las descripciones de las series pedidas (ver series_cache), sin consultar a
+Elasticsearch: un request con If-None-Match o If-Modified-Since vigentes se
+responde con 304 sin ejecutar la búsqueda. Los requests con argumentos inválidos no
+llevan validadores.
+
+Las descripciones de las series y el resultado de la validación de los argumentos se
+calculan una única vez por request, y los reusan el caché de respuestas y el pipeline
+de la query (ver views.query_view)
+"""
+import hashlib
+
+import iso8601
+
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.pipeline import QueryPipeline
+from series_tiempo_ar_api.apps.api.query.series_cache import series_cache
+from series_tiempo_ar_api.apps.api.response_cache import canonical_args
+
+
+def get_query_args(request):
+    """Argumentos de la query a partir del request: todos en lowercase, excepto ids"""
+    ids = request.GET.get(constants.PARAM_IDS)
+    args = {key: value.lower() for key, value in request.GET.items()}
+    args[constants.PARAM_IDS] = ids
+    return args
+
+
+def series_etag(request):
+    """ETag de la respuesta: hash de los argumentos en forma canónica, y de los datos
+    indexados y los metadatos de cada serie pedida. None si alguna serie no existe o no
+    fue indexada
+    """
+    return _get_validators(request)[0]
+
+
+def series_last_modified(request):
+    """Fecha del cambio más reciente de los datos indexados o los metadatos de las
+    series pedidas
+    """
+    return _get_validators(request)[1]
+
+
+def get_series_descriptors(request):
+    """Descripciones de las series pedidas que existan, indexadas por identifier"""
+    if not hasattr(request, '_series_descriptors'):
+        request._series_descriptors = series_cache.get_many(_series_ids(get_query_args(request)))
+    return request._series_descriptors
+
+
+def is_valid_query(request):
+    """True si los argumentos del request generan una query válida"""
+    if not hasattr(request, '_valid_query'):
+        query = QueryPipeline(get_series_descriptors(request))
+        request._valid_query = query.validate(get_query_args(request))
+    return request._valid_query
+
+
+def _get_validators(request):
+    # Se calculan una única vez por request, para ETag y Last-Modified
+    if not hasattr(request, '_series_validators'):
+        request._series_validators = _compute_validators(request)
+    return request._series_validators
+
+
+def _compute_validators(request):
+    args = get_query_args(request)
+    series_ids = _series_ids(args)
+    descriptors = get_series_descriptors(request)
+    if not series_ids or len(descriptors) < len(series_ids) or not is_valid_query(request):
+        return None, None
+
+    descriptors = list(descriptors.values())
+    return _etag(args, descriptors), _last_modified(descriptors)
+
+
+def _etag(args, descriptors):
+    data_hashes = [(descriptor.identifier, descriptor.data_hash, descriptor.last_indexed, descriptor.metadata_hash)
+                   for descriptor in descriptors]
+    if not all(descriptor.data_hash for descriptor in descriptors):
+        return None
+
+    key = u'{}|{}'.format(canonical_args(args), sorted(data_hashes))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _last_modified(descriptors):
+    if not all(descriptor.last_indexed for descriptor in descriptors):
+        return None
+
+    dates = [descriptor.last_indexed for descriptor in descriptors]
+    dates.extend(descriptor.metadata_updated for descriptor in descriptors if descriptor.metadata_updated)
+    return max(iso8601.parse_date(date) for date in dates)
+
+
+def _series_ids(args):
+    ids = args.get(constants.PARAM_IDS)
+    if not ids:
+        return set()
+    return set(serie_string.split(':')[0] for serie_string in ids.split(','))
@@ -0,0 +1,55 @@
+#! coding: utf-8
+import json
+import timeit
+from collections import OrderedDict
+
+import numpy as np
+from django.core.management import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import override_settings
+
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import SeriesMatrix
+from series_tiempo_ar_api.apps.api.query.serializers import SeriesJSONEncoder, orjson
+
+
+class Command(BaseCommand):
+    help = u"Compara el costo de serialización JSON de la matriz de datos de una respuesta " \
+           u"(por cada 10000 celdas) entre los encoders disponibles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--series', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        matrix = synthetic_matrix(options['rows'], options['series'])
+        cells = options['rows'] * options['series']
+        meta = [{'frequency': 'day'}] + [{'field': {'id': f'serie_{i}'}} for i in range(options['series'])]
+
+        def run_django():
+            response = OrderedDict([('data', matrix.tolist()), ('meta', meta), ('count', len(matrix))])
+            return json.dumps(response, cls=DjangoJSONEncoder)
+
+        def run_series():
+            response = OrderedDict([('data', matrix), ('meta', meta), ('count', len(matrix))])
+            return json.dumps(response, cls=SeriesJSONEncoder)
+
+        cases = [
+            ('django (filas + DjangoJSONEncoder)', run_django, False),
+            ('series (SeriesMatrix + SeriesJSONEncoder)', run_series, False),
+        ]
+        if orjson is not None:
+            cases.append(('series + orjson', run_series, True))
+
+        self.stdout.write(f"{options['rows']} filas x {options['series']} series ({cells} celdas)")
+        for name, function, accelerated in cases:
+            with override_settings(API_JSON_ORJSON=accelerated):
+                seconds = min(timeit.repeat(function, number=1, repeat=options['repeat']))
+            self.stdout.write(f"  {name}: {seconds * 1000 * 10000 / cells:.2f} ms por 10k celdas")
+
+
+def synthetic_matrix(rows, series):
+    index = np.arange(np.datetime64('1990-01-01'), np.datetime64('1990-01-01') + rows)
+    values = np.random.random((rows, series)) * 1000
+    values[np.random.random((rows, series)) < 0.05] = np.nan
+    return SeriesMatrix(index, values)
@@ -0,0 +1,73 @@
+#! coding: utf-8
+import random
+import timeit
+
+import pandas as pd
+from django.core.management import BaseCommand
+
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import ColumnarResponseFormatter
+from series_tiempo_ar_api.apps.api.query.es_query.response_formatter import ResponseFormatter
+from series_tiempo_ar_api.apps.api.query.es_query.series import Series
+
+CASES = (
+    # (periodicity, pandas freq, cantidad de valores por serie)
+    ('day', 'D', 10000),
+    ('month', 'MS', 1000),
+)
+
+
+class Command(BaseCommand):
+    help = u"Compara el tiempo de formateo de respuestas de ES de ResponseFormatter y " \
+           u"ColumnarResponseFormatter sobre respuestas sintéticas de varias series"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for periodicity, freq, size in CASES:
+            series, responses = synthetic_responses(options['series'], periodicity, freq, size)
+            query_args = {
+                constants.PARAM_PERIODICITY: periodicity,
+                constants.PARAM_SORT: constants.SORT_ASCENDING,
+            }
+
+            times = {}
+            for formatter_class in (ResponseFormatter, ColumnarResponseFormatter):
+                def run(formatter_class=formatter_class):
+                    return list(formatter_class(series, responses, query_args).format_response())
+
+                times[formatter_class.__name__] = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+
+            self.stdout.write(f"{periodicity}: {options['series']} series x {size} valores")
+            for name, seconds in times.items():
+                self.stdout.write(f"  {name}: {seconds * 1000:.1f} ms")
+            speedup = times[ResponseFormatter.__name__] / times[ColumnarResponseFormatter.__name__]
+            self.stdout.write(f"  speedup: {speedup:.1f}x")
+
+
+def synthetic_responses(series_count, periodicity, freq, size):
+    """Genera series y respuestas de Elasticsearch sintéticas, con índices de tiempo
+    desfasados entre series y valores faltantes aleatorios
+    """
+    series = []
+    responses = []
+    dates = pd.date_range('1990-01-01', periods=size + series_count, freq=freq)
+    for i in range(series_count):
+        serie = Series(index='benchmark', series_id=f'serie_{i}', rep_mode=constants.VALUE,
+                       periodicity=periodicity)
+        hits = [
+            {
+                '_id': f'serie_{i}-{date.date()}',
+                '_source': {
+                    'timestamp': str(date.date()),
+                    constants.VALUE: random.random(),
+                }
+            }
+            for date in dates[i:i + size] if random.random() > 0.05
+        ]
+        series.append(serie)
+        responses.append({'hits': {'hits': hits, 'total': len(hits)}})
+
+    return series, responses
@@ -0,0 +1,67 @@
+#! coding: utf-8
+import timeit
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test import override_settings
+from django_datajsonar.models import Field
+
+from series_tiempo_ar_api.apps.api.query.query import Query
+from series_tiempo_ar_api.apps.api.query.series_cache import series_cache
+from series_tiempo_ar_api.apps.management import meta_keys
+
+SERIES_COUNTS = (1, 10, 40)
+
+STRATEGIES = {
+    # Valor de API_COMBINED_SEARCH_ENABLED de cada estrategia
+    'msearch': False,
+    'combined': True,
+}
+
+
+class Command(BaseCommand):
+    help = u"Compara la latencia de MultiSearch (una búsqueda por serie) contra la búsqueda " \
+           u"combinada de CombinedSearch, para queries de 1, 10 y 40 series del índice de series"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodicity', default='R/P1M',
+                            help=u"Periodicidad (ISO 8601) de las series a consultar")
+        parser.add_argument('--limit', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        series_ids = self.get_series_ids(options['periodicity'], max(SERIES_COUNTS))
+        descriptors = series_cache.get_many(series_ids)
+
+        for count in SERIES_COUNTS:
+            self.stdout.write(f"{count} series, limit {options['limit']}:")
+            for strategy, enabled in STRATEGIES.items():
+                def run(ids=series_ids[:count]):
+                    query = Query(index=settings.TS_INDEX)
+                    for series_id in ids:
+                        query.add_series(series_id, descriptors[series_id])
+                    query.add_pagination(0, options['limit'])
+                    query.es_query.execute_searches()
+
+                with override_settings(API_COMBINED_SEARCH_ENABLED=enabled, API_COMBINED_SEARCH_MIN_SERIES=1):
+                    seconds = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+                self.stdout.write(f"  {strategy}: {seconds * 1000:.1f} ms")
+
+    @staticmethod
+    def get_series_ids(periodicity, count):
+        """Series disponibles de la periodicidad pasada, de la menor cantidad de
+        distribuciones posible (series que comparten índice de tiempo)
+        """
+        series_ids = list(
+            Field.objects
+            .filter(enhanced_meta__key=meta_keys.AVAILABLE,
+                    distribution__enhanced_meta__key=meta_keys.PERIODICITY,
+                    distribution__enhanced_meta__value=periodicity)
+            .order_by('distribution')
+            .values_list('identifier', flat=True)[:count]
+        )
+
+        if len(series_ids) < count:
+            raise CommandError(u"Se necesitan {} series de periodicidad {}, hay {}".format(
+                count, periodicity, len(series_ids)))
+        return series_ids
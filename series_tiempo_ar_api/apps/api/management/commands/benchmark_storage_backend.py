@@ -0,0 +1,88 @@
+#! coding: utf-8
+import timeit
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django_datajsonar.models import Distribution, Field
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.connections import connections
+
+from series_tiempo_ar_api.apps.api.query.query import Query, DATA_BACKENDS
+from series_tiempo_ar_api.apps.api.query.series_cache import series_cache
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.libs.indexing.columnar_store import get_columnar_store
+from series_tiempo_ar_api.libs.indexing.indexer.distribution_indexer import DistributionIndexer
+from series_tiempo_ar_api.libs.indexing.indexer.operations import column_transformations
+
+QUERIES = {
+    # nombre: (cantidad de series, collapse, limit)
+    '1 serie': (1, None, 100),
+    '1 serie, 1000 valores': (1, None, 1000),
+    '10 series, collapse anual': (10, 'year', 100),
+    '10 series, 1000 valores': (10, None, 1000),
+}
+
+
+class Command(BaseCommand):
+    help = u"Compara latencia de queries y tamaño de los datos entre el backend de Elasticsearch " \
+           u"y el backend columnar, para series ya indexadas en settings.TS_INDEX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--build', action='store_true',
+                            help=u"Escribe el backend columnar de las series a partir de sus distribuciones")
+
+    def handle(self, *args, **options):
+        series_ids = list(
+            Field.objects.filter(enhanced_meta__key=meta_keys.AVAILABLE)
+            .order_by('distribution')
+            .values_list('identifier', flat=True)[:options['series']]
+        )
+        if not series_ids:
+            raise CommandError(u"No hay series indexadas")
+
+        store = get_columnar_store(settings.TS_INDEX)
+        if options['build']:
+            self.build_store(store, series_ids)
+
+        self.compare_sizes(store, series_ids)
+        descriptors = series_cache.get_many(series_ids)
+        for name, (count, collapse, limit) in QUERIES.items():
+            self.stdout.write(name)
+            for backend, query_class in DATA_BACKENDS.items():
+                def run(ids=series_ids[:count]):
+                    query = Query(index=settings.TS_INDEX)
+                    query.es_query = query_class(settings.TS_INDEX)
+                    for series_id in ids:
+                        query.add_series(series_id, descriptors[series_id])
+                    if collapse:
+                        query.add_collapse(collapse=collapse)
+                    query.add_pagination(0, limit)
+                    query.run()
+
+                seconds = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+                self.stdout.write(f"  {backend}: {seconds * 1000:.1f} ms")
+
+    @staticmethod
+    def build_store(store, series_ids):
+        indexer = DistributionIndexer(index=settings.TS_INDEX)
+        for distribution in Distribution.objects.filter(field__identifier__in=series_ids).distinct():
+            fields = {field.title: field.identifier for field in distribution.field_set.all()}
+            df = indexer.init_df(distribution, fields)
+            for series_id in df.columns.intersection(series_ids):
+                for freq, agg, transform_df in column_transformations(df[series_id]):
+                    store.write(series_id, freq, agg, transform_df)
+
+    def compare_sizes(self, store, series_ids):
+        docs = Search(index=settings.TS_INDEX).filter('terms', series_id=series_ids).count()
+        stats = connections.get_connection().indices.stats(index=settings.TS_INDEX, metric='store,docs')
+        index_stats = stats['indices'][settings.TS_INDEX]['primaries']
+        # Tamaño estimado de los documentos de las series, proporcional a su cantidad en el índice
+        es_bytes = index_stats['store']['size_in_bytes'] * docs / max(index_stats['docs']['count'], 1)
+
+        columnar_bytes = sum(store.series_size(series_id) for series_id in series_ids)
+
+        self.stdout.write(f"{len(series_ids)} series:")
+        self.stdout.write(f"  elasticsearch: {docs} documentos, ~{es_bytes / 1024:.0f} KB")
+        self.stdout.write(f"  columnar: {columnar_bytes / 1024:.0f} KB")
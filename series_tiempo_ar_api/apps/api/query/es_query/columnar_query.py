@@ -0,0 +1,99 @@
+#! coding: utf-8
+"""Lectura de datos de series desde el backend columnar (libs/indexing/columnar_store.py),
+con la misma interfaz que ESQuery: filtros, paginación y colapsos se resuelven con
+indexado de arrays en lugar de búsquedas de Elasticsearch
+"""
+import numpy as np
+
+from series_tiempo_ar_api.apps.api.exceptions import QueryError
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query import strings
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import \
+    ColumnarResponseFormatter, ArrayResponse, MONTHS_PER_PERIOD
+from series_tiempo_ar_api.apps.api.query.es_query.es_query import ESQuery
+from series_tiempo_ar_api.libs.indexing.columnar_store import get_columnar_store
+
+
+class ColumnarQuery(ESQuery):
+
+    def __init__(self, index, store=None):
+        super(ColumnarQuery, self).__init__(index)
+        self.store = store or get_columnar_store(index)
+
+    def execute_searches(self):
+        if not self.series:
+            raise QueryError(strings.EMPTY_QUERY_ERROR)
+
+        for serie in self.series:
+            serie.add_collapse(self.args[constants.PARAM_PERIODICITY])
+        self.setup_series_pagination()
+
+        responses = [self._read_series(serie) for serie in self.series]
+        self.data = ColumnarResponseFormatter(self.series, responses, self.args).format_response()
+        self.count = max([response.total for response in responses])
+
+    def _read_series(self, serie):
+        if serie.runtime_collapse:
+            return self._read_runtime_collapse(serie)
+
+        arrays = self.store.read(serie.series_id, serie.periodicity, serie.collapse_agg)
+        if arrays is None:
+            return empty_response()
+
+        dates, values = self._filter_range(serie, arrays.dates, arrays.values[serie.rep_mode])
+        total = len(dates)
+        if self.args[constants.PARAM_SORT] != constants.SORT_ASCENDING:
+            dates, values = dates[::-1], values[::-1]
+
+        # Misma semántica que el slicing [from:size] de Elasticsearch sobre los documentos
+        page = slice(serie.es_start, serie.es_end)
+        dates, values = dates[page], values[page]
+
+        available = ~np.isnan(values)
+        return ArrayResponse(dates[available], values[available], total)
+
+    def _read_runtime_collapse(self, serie):
+        """Equivalente a la date_histogram que arma Series.add_collapse para las
+        agregaciones calculadas en runtime (máximo y mínimo): agrupa los valores
+        originales de la serie por período
+        """
+        arrays = self.store.read(serie.series_id, serie.original_periodicity, constants.AGG_DEFAULT)
+        if arrays is None:
+            return empty_response()
+
+        dates, values = self._filter_range(serie, arrays.dates, arrays.values[serie.rep_mode])
+        if not dates.size:
+            return empty_response()
+
+        periods = period_start(dates, serie.periodicity)
+        buckets, first_indexes = np.unique(periods, return_index=True)
+        reduce_function = np.fmax if serie.collapse_agg == constants.AGG_MAX else np.fmin
+        bucket_values = reduce_function.reduceat(values, first_indexes)
+        return ArrayResponse(buckets, bucket_values, len(dates))
+
+    @staticmethod
+    def _filter_range(serie, dates, values):
+        start = np.searchsorted(dates, np.datetime64(str(serie.start_date), 'D')) if serie.start_date else 0
+        end = np.searchsorted(dates, np.datetime64(str(serie.end_date), 'D'), side='right') \
+            if serie.end_date else len(dates)
+        return dates[start:end], values[start:end]
+
+
+def empty_response():
+    return ArrayResponse(np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64), 0)
+
+
+def period_start(dates, interval):
+    """Devuelve la fecha de comienzo del período (según 'interval') de cada fecha
+    pasada, con los mismos límites que los buckets de date_histogram de Elasticsearch
+    """
+    if interval == 'day':
+        return dates
+
+    if interval == 'week':
+        # Semanas de lunes a domingo. El 1970-01-01 (día 0) fue jueves
+        days = dates.astype(np.int64)
+        return (days - (days + 3) % 7).astype('datetime64[D]')
+
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    return (months - months % MONTHS_PER_PERIOD[interval]).astype('datetime64[M]').astype('datetime64[D]')
@@ -0,0 +1,157 @@
+#! coding: utf-8
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from iso8601 import iso8601
+
+from series_tiempo_ar_api.apps.api.helpers import get_relative_delta
+from series_tiempo_ar_api.apps.api.query import constants
+
+# Cantidad de meses de cada intervalo de tiempo mensual o mayor
+MONTHS_PER_PERIOD = {
+    'month': 1,
+    'quarter': 3,
+    'semester': 6,
+    'year': 12,
+}
+
+DAYS_PER_PERIOD = {
+    'day': 1,
+    'week': 7,
+}
+
+
+class ArrayResponse(NamedTuple):
+    """Respuesta de una serie leída del backend columnar, equivalente a la respuesta
+    de Elasticsearch: fechas y valores de la página pedida (sin faltantes), y
+    cantidad total de valores que cumplen los filtros
+    """
+    dates: np.ndarray
+    values: np.ndarray
+    total: int
+
+
+class SeriesMatrix(object):
+    """Resultado de una query en formato columnar: un índice de tiempo (datetime64)
+    y una matriz de valores float64 (una columna por serie, NaN para valores faltantes).
+    Las filas ([fecha, valor1, valor2, ...]) se arman recién al serializar
+    """
+
+    def __init__(self, index, values):
+        self.index = index
+        self.values = values
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return SeriesMatrix(self.index[item], self.values[item])
+
+        return self._rows(self.index[item:item + 1 or None], self.values[item:item + 1 or None])[0]
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def reverse(self):
+        self.index = self.index[::-1]
+        self.values = self.values[::-1]
+
+    def tolist(self, nan_to_none=True):
+        return self._rows(self.index, self.values, nan_to_none)
+
+    @staticmethod
+    def _rows(index, values, nan_to_none=True):
+        dates = np.datetime_as_string(index).tolist()
+        if nan_to_none:
+            cells = values.astype(object)
+            cells[np.isnan(values)] = None
+        else:
+            cells = values
+        return [[date] + row for date, row in zip(dates, cells.tolist())]
+
+
+class ColumnarResponseFormatter(object):
+    """Alternativa a ResponseFormatter: carga cada respuesta de Elasticsearch en
+    arrays tipados y los alinea sobre un índice de tiempo continuo en forma vectorizada
+    """
+
+    def __init__(self, series, responses, args):
+        self.series = series
+        self.responses = responses
+        self.args = args
+
+    def format_response(self):
+        columns = [self._load_response(serie, response) for serie, response in zip(self.series, self.responses)]
+
+        dates = np.unique(np.concatenate([column_dates for column_dates, _ in columns]))
+        if not dates.size:  # No hay datos
+            return SeriesMatrix(dates, np.empty((0, len(self.series))))
+
+        periodicity = self.args[constants.PARAM_PERIODICITY]
+        index = np.union1d(dates, continuous_date_index(dates[0], dates[-1], periodicity))
+
+        values = np.full((index.size, len(columns)), np.nan)
+        for i, (column_dates, column_values) in enumerate(columns):
+            values[np.searchsorted(index, column_dates), i] = column_values
+
+        if self.args[constants.PARAM_SORT] != constants.SORT_ASCENDING:
+            index = index[::-1]
+            values = values[::-1]
+
+        return SeriesMatrix(index, values)
+
+    @staticmethod
+    def _load_response(serie, response):
+        """Devuelve un par de arrays (fechas, valores) con los datos de la respuesta
+        (dict crudo de Elasticsearch, o ArrayResponse) de la serie
+        """
+        if isinstance(response, ArrayResponse):
+            return response.dates, response.values
+
+        if serie.runtime_collapse:
+            buckets = response['aggregations']['test']['buckets']
+            dates = [bucket['key_as_string'] for bucket in buckets]
+            values = [bucket['test']['value'] for bucket in buckets]
+        else:
+            rep_mode = serie.rep_mode
+            sources = [hit['_source'] for hit in response['hits']['hits']]
+            sources = [source for source in sources if rep_mode in source]
+            dates = [source[settings.TS_TIME_INDEX_FIELD] for source in sources]
+            values = [source[rep_mode] for source in sources]
+
+        return np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=np.float64)
+
+
+def continuous_date_index(start_date, end_date, periodicity):
+    """Genera el índice de tiempo continuo de la periodicidad pasada desde start_date,
+    hasta la primera fecha mayor o igual a end_date. Es el mismo índice que recorre
+    ResponseFormatter._make_date_index_continuous
+    """
+    if periodicity in DAYS_PER_PERIOD:
+        step = np.timedelta64(DAYS_PER_PERIOD[periodicity], 'D')
+        return np.arange(start_date, end_date + step, step)
+
+    start_month = start_date.astype('datetime64[M]')
+    if start_month.astype('datetime64[D]') != start_date:
+        # Fechas que no son comienzo de mes: el resultado de sumar meses depende del día
+        return _iterative_date_index(start_date, end_date, periodicity)
+
+    step = np.timedelta64(MONTHS_PER_PERIOD[periodicity], 'M')
+    end_month = end_date.astype('datetime64[M]')
+    if end_month.astype('datetime64[D]') != end_date:
+        end_month += np.timedelta64(1, 'M')
+
+    return np.arange(start_month, end_month + step, step).astype('datetime64[D]')
+
+
+def _iterative_date_index(start_date, end_date, periodicity):
+    current_date = iso8601.parse_date(str(start_date))
+    end_date = iso8601.parse_date(str(end_date))
+    dates = [current_date.date()]
+    while current_date < end_date:
+        current_date += get_relative_delta(periodicity)
+        dates.append(current_date.date())
+
+    return np.array(dates, dtype='datetime64[D]')
@@ -0,0 +1,101 @@
+#! coding: utf-8
+"""Estrategia alternativa a MultiSearch para queries de varias series: una única
+búsqueda con los filtros de todas las series (unidos por 'should'), cuyos hits se
+separan por serie en memoria. Sólo aplica a series distintas que comparten intervalo
+y agregación, sin agregaciones calculadas en runtime (ver CombinedSearch.applies).
+Se activa con settings.API_COMBINED_SEARCH_ENABLED
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from elasticsearch_dsl import Search, Q
+from elasticsearch_dsl.connections import connections
+
+# Tamaño de página por default de Elasticsearch, usado si la búsqueda no fue paginada
+ES_DEFAULT_SIZE = 10
+
+
+class CombinedSearch(object):
+
+    def __init__(self, index, series):
+        self.index = index
+        self.series = series
+        # Búsqueda (ya filtrada, ordenada y paginada) de cada serie, indexada por series_id.
+        # Los hits se separan por series_id: con ids repetidos la estrategia no aplica
+        self.searches = OrderedDict()
+        # Campos de '_source' pedidos por todas las series, más el usado para separar los hits
+        self.source_fields = {'series_id'}
+        for serie in series:
+            search_dict = serie.search.to_dict()
+            self.searches[serie.series_id] = search_dict
+            self.source_fields.update(search_dict.get('_source', []))
+
+    def applies(self):
+        """Heurística de uso: suficientes series, todas distintas, que filtran por la
+        misma agregación, sin aggregations de ES, y cuyas páginas sumadas entren en una
+        única búsqueda
+        """
+        if not settings.API_COMBINED_SEARCH_ENABLED:
+            return False
+
+        if len(self.searches) < len(self.series):
+            # Una misma serie pedida más de una vez, ej. 'ids=serie,serie:percent_change'
+            return False
+
+        if len(self.searches) < settings.API_COMBINED_SEARCH_MIN_SERIES:
+            return False
+
+        if any('aggs' in search for search in self.searches.values()):
+            return False
+
+        if len(set(serie.collapse_agg for serie in self.series)) > 1:
+            return False
+
+        return self._size() <= settings.API_COMBINED_SEARCH_MAX_SIZE
+
+    def execute(self):
+        """Ejecuta la búsqueda y devuelve una respuesta por serie, en el mismo orden
+        que self.series y con el mismo formato que las de MultiSearch. Devuelve None
+        si la página de resultados de alguna serie quedó incompleta
+        """
+        response = connections.get_connection().search(index=self.index,
+                                                       doc_type=settings.TS_DOC_TYPE,
+                                                       body=self._search().to_dict())
+        totals = {bucket['key']: bucket['doc_count'] for bucket in response['aggregations']['series']['buckets']}
+
+        hits = {series_id: [] for series_id in self.searches}
+        for hit in response['hits']['hits']:
+            hits[hit['_source']['series_id']].append(hit)
+
+        responses = {}
+        for series_id, search in self.searches.items():
+            start, end = _page_bounds(search)
+            series_hits = hits[series_id]
+            total = totals.get(series_id, 0)
+            if len(series_hits) < min(end, total):
+                # El corte global por timestamp dejó afuera valores de esta serie
+                return None
+
+            responses[series_id] = {'hits': {'hits': series_hits[start:end], 'total': total}}
+
+        return [responses[serie.series_id] for serie in self.series]
+
+    def _search(self):
+        queries = [Q(search['query']) for search in self.searches.values()]
+        first_search = next(iter(self.searches.values()))
+
+        search = Search()
+        search = search.filter('bool', should=queries, minimum_should_match=1)
+        search = search.source(sorted(self.source_fields))
+        search = search.sort(*first_search.get('sort', []))
+        search = search.extra(size=self._size())
+        search.aggs.bucket('series', 'terms', field='series_id', size=len(self.searches))
+        return search
+
+    def _size(self):
+        return sum(_page_bounds(search)[1] for search in self.searches.values())
+
+
+def _page_bounds(search_dict):
+    start = search_dict.get('from', 0)
+    return start, start + search_dict.get('size', ES_DEFAULT_SIZE)
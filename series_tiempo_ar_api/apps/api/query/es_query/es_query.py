@@ -1,13 +1,25 @@
 #! coding: utf-8
 from django.conf import settings
+from elasticsearch import TransportError
 from elasticsearch_dsl import MultiSearch
+from elasticsearch_dsl.connections import connections
 
 from series_tiempo_ar_api.apps.api.exceptions import QueryError
 from series_tiempo_ar_api.apps.api.query import constants
 from series_tiempo_ar_api.apps.api.query import strings
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import ColumnarResponseFormatter
+from series_tiempo_ar_api.apps.api.query.es_query.combined_search import CombinedSearch
 from series_tiempo_ar_api.apps.api.query.es_query.response_formatter import ResponseFormatter
 from series_tiempo_ar_api.apps.api.query.es_query.series import Series
 
+RESPONSE_FORMATTERS = {
+    'columnar': ColumnarResponseFormatter,
+    'dict': ResponseFormatter,
+}
+
+# Cantidad de filas armadas por vez al iterar resultados
+RESULTS_CHUNK_SIZE = 500
+
 
 class ESQuery(object):
     """Representa una query de la API de series de tiempo, que termina
@@ -33,14 +45,15 @@ class ESQuery(object):
         }
 
     def add_series(self, series_id, rep_mode, periodicity,
-                   collapse_agg=constants.API_DEFAULT_VALUES[constants.PARAM_COLLAPSE_AGG]):
+                   collapse_agg=constants.API_DEFAULT_VALUES[constants.PARAM_COLLAPSE_AGG],
+                   data_hash=None):
         # Fix a casos en donde collapse agg no es avg pero los valores serían iguales a avg
         # Estos valores no son indexados! Entonces seteamos la aggregation a avg manualmente
         if periodicity == constants.COLLAPSE_INTERVALS[-1]:
             collapse_agg = constants.AGG_DEFAULT
 
         self.args[constants.PARAM_PERIODICITY] = periodicity
-        self._init_series(series_id, rep_mode, collapse_agg)
+        self._init_series(series_id, rep_mode, collapse_agg, data_hash)
 
     def get_series_ids(self):
         """Devuelve una lista de series cargadas"""
@@ -68,12 +81,13 @@ class ESQuery(object):
         for serie in self.series:
             serie.periodicity = interval
 
-    def _init_series(self, series_id, rep_mode, collapse_agg):
+    def _init_series(self, series_id, rep_mode, collapse_agg, data_hash=None):
         self.series.append(Series(series_id=series_id,
                                   index=self.index,
                                   rep_mode=rep_mode,
                                   periodicity=self.args[constants.PARAM_PERIODICITY],
-                                  collapse_agg=collapse_agg))
+                                  collapse_agg=collapse_agg,
+                                  data_hash=data_hash))
 
     def add_pagination(self, start, limit, start_dates=None):
         if not self.series:
@@ -113,21 +127,57 @@ class ESQuery(object):
         if not self.series:
             raise QueryError(strings.EMPTY_QUERY_ERROR)
 
+        for serie in self.series:
+            serie.add_collapse(self.args[constants.PARAM_PERIODICITY])
+        self.setup_series_pagination()
+
+        responses = None
+        combined_search = CombinedSearch(self.index, self.series)
+        if combined_search.applies():
+            responses = combined_search.execute()
+
+        if responses is None:
+            responses = self._execute_multi_search()
+
+        formatter = RESPONSE_FORMATTERS[settings.TS_RESPONSE_FORMATTER](self.series, responses, self.args)
+        self.data = formatter.format_response()
+
+        self.count = max([response['hits']['total'] for response in responses])
+
+    def _execute_multi_search(self):
+        """Ejecuta la búsqueda de cada serie en un único request msearch. Devuelve
+        las respuestas crudas (dicts), sin envolverlas en objetos Response de
+        elasticsearch_dsl: los formatters sólo leen '_source' de cada hit
+        """
         multi_search = MultiSearch(index=self.index,
                                    doc_type=settings.TS_DOC_TYPE)
 
         for serie in self.series:
-            serie.add_collapse(self.args[constants.PARAM_PERIODICITY])
-            self.setup_series_pagination()
             multi_search = multi_search.add(serie.search)
 
-        responses = multi_search.execute()
-        formatter = ResponseFormatter(self.series, responses, self.args)
-        self.data = formatter.format_response()
+        responses = connections.get_connection().msearch(index=self.index,
+                                                         doc_type=settings.TS_DOC_TYPE,
+                                                         body=multi_search.to_dict())['responses']
+        for response in responses:
+            if response.get('error'):
+                raise TransportError('N/A', response['error']['type'], response['error'])
 
-        self.count = max([response.hits.total for response in responses])
+        return responses
 
     def get_results_data(self) -> list:
+        # Recién acá se arman las filas si los datos son columnares (SeriesMatrix)
+        return list(self.get_results_page())
+
+    def iter_results_data(self, chunk_size=RESULTS_CHUNK_SIZE):
+        """Itera sobre las filas de resultados, armándolas de a chunk_size filas"""
+        data = self.get_results_page()
+        for start in range(0, len(data), chunk_size):
+            yield from data[start:start + chunk_size]
+
+    def get_results_page(self):
+        """Devuelve la página de resultados pedida, sin armar las filas: un SeriesMatrix
+        si se usa el formateo columnar, o una lista de filas
+        """
         if self.data is None:
             raise RuntimeError(strings.DATA_NOT_INITIALIZED)
 
@@ -0,0 +1,22 @@
+#! coding: utf-8
+"""Lectura de datos de series desde los archivos mapeados en memoria publicados al
+terminar la indexación (libs/indexing/mmap_store.py). Si alguna de las series pedidas
+no está publicada, o lo está con datos de una indexación anterior, la query se
+resuelve contra Elasticsearch
+"""
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_query import ColumnarQuery
+from series_tiempo_ar_api.apps.api.query.es_query.es_query import ESQuery
+from series_tiempo_ar_api.libs.indexing.mmap_store import get_mmap_store
+
+
+class MmapQuery(ColumnarQuery):
+
+    def __init__(self, index):
+        super(MmapQuery, self).__init__(index, store=get_mmap_store(index))
+
+    def execute_searches(self):
+        self.store.refresh()
+        if self.series and all(self.store.is_fresh(serie.series_id, serie.data_hash) for serie in self.series):
+            super(MmapQuery, self).execute_searches()
+        else:
+            ESQuery.execute_searches(self)
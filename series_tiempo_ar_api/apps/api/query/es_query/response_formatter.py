@@ -1,4 +1,5 @@
 #! coding: utf-8
+from django.conf import settings
 from iso8601 import iso8601
 
 from series_tiempo_ar_api.apps.api.helpers import get_relative_delta
@@ -27,17 +28,19 @@ class ResponseFormatter(object):
         for i, response in enumerate(self.responses):
             rep_mode = self.series[i].rep_mode
 
-            if self.series[i].collapse_agg in (constants.AGG_MIN, constants.AGG_MAX):
-                for hit in response.aggregations.test.buckets:
+            if self.series[i].runtime_collapse:
+                for hit in response['aggregations']['test']['buckets']:
                     data = hit['test']['value']
                     timestamp_dict = self.data_dict.setdefault(hit['key_as_string'], {})
                     timestamp_dict[self._data_dict_series_key(self.series[i])] = data
             else:
-                response = filter(lambda hit, mode=rep_mode: mode in hit, response)
-                for hit in response:
-                    timestamp_dict = self.data_dict.setdefault(hit.timestamp, {})
+                for hit in response['hits']['hits']:
+                    source = hit['_source']
+                    if rep_mode not in source:
+                        continue
+                    timestamp_dict = self.data_dict.setdefault(source[settings.TS_TIME_INDEX_FIELD], {})
                     series = self._data_dict_series_key(self.series[i])
-                    timestamp_dict[series] = hit[rep_mode]
+                    timestamp_dict[series] = source[rep_mode]
 
         if not self.data_dict:  # No hay datos
             return []
@@ -10,25 +10,39 @@ from series_tiempo_ar_api.apps.api.query.es_query.periods_between import periods
 
 
 class Series(object):
-    def __init__(self, index, series_id, rep_mode, periodicity, collapse_agg=None):
+    def __init__(self, index, series_id, rep_mode, periodicity, collapse_agg=None, data_hash=None):
         self.index = index
         self.series_id = series_id
         self.rep_mode = rep_mode
         self.original_periodicity = periodicity
         self.periodicity = periodicity
         self.collapse_agg = collapse_agg or constants.API_DEFAULT_VALUES[constants.PARAM_COLLAPSE_AGG]
+        # Hash de los datos de la última indexación, para validar copias locales de los datos
+        self.data_hash = data_hash
+        # True si la agregación se calcula en Elasticsearch al momento de la query (date_histogram)
+        self.runtime_collapse = False
+        # Filtros y paginación aplicados a la búsqueda, para backends que no usan self.search
+        self.start_date = None
+        self.end_date = None
+        self.es_start = 0
+        self.es_end = None
         self.search = self.init_search()
 
     def init_search(self):
         search = Search(index=self.index)
 
         search = search.sort(settings.TS_TIME_INDEX_FIELD)  # Default: ascending sort
+        # Sólo se leen el índice de tiempo y el modo de representación pedido
+        search = search.source([settings.TS_TIME_INDEX_FIELD, self.rep_mode])
         # Filtra los resultados por la serie pedida. Si se hace en memoria filtramos
-        # por la agg default, y calculamos la agg pedida en runtime
-        agg = self.collapse_agg if self.collapse_agg not in constants.IN_MEMORY_AGGS else constants.AGG_DEFAULT
-        search = search.filter('bool',
-                               must=[Q('match', series_id=self.series_id),
-                                     Q('match', aggregation=agg)])
+        # por la agg default, y calculamos la agg pedida en runtime. Si máximo y mínimo
+        # están precalculados, la agregación a filtrar depende del intervalo (ver add_collapse)
+        must = [Q('match', series_id=self.series_id)]
+        if self.collapse_agg not in constants.IN_MEMORY_AGGS:
+            must.append(Q('match', aggregation=self.collapse_agg))
+        elif not settings.TS_PRECOMPUTED_MIN_MAX:
+            must.append(Q('match', aggregation=constants.AGG_DEFAULT))
+        search = search.filter('bool', must=must)
 
         return search
 
@@ -38,12 +52,24 @@ class Series(object):
             'gte': start
         }
         self.search = self.search.filter('range', timestamp=_filter)
+        self.start_date = start
+        self.end_date = end
 
     def add_collapse(self, periodicity):
         if self.collapse_agg not in constants.IN_MEMORY_AGGS:
             self.search = self.search.filter('bool', must=[Q('match', interval=periodicity)])
 
-        elif periodicity != self.original_periodicity:
+        elif periodicity == self.original_periodicity:  # Ignoramos la in memory agg
+            self.collapse_agg = constants.AGG_DEFAULT
+            must = [Q('match', interval=periodicity)]
+            if settings.TS_PRECOMPUTED_MIN_MAX:
+                must.append(Q('match', aggregation=self.collapse_agg))
+            self.search = self.search.filter('bool', must=must)
+
+        elif settings.TS_PRECOMPUTED_MIN_MAX:
+            self.search = self.search.filter('bool', must=[Q('match', interval=periodicity),
+                                                           Q('match', aggregation=self.collapse_agg)])
+        else:
             # Agregamos la aggregation (?) para que se ejecute en ES en runtime
             self.search.aggs.bucket('test',
                                     A('date_histogram',
@@ -51,9 +77,7 @@ class Series(object):
                                       interval=periodicity,
                                       format='yyyy-MM-dd').
                                     metric('test', self.collapse_agg, field=self.rep_mode))
-        else:  # Ignoramos la in memory ag
-            self.collapse_agg = constants.AGG_DEFAULT
-            self.search = self.search.filter('bool', must=[Q('match', interval=periodicity)])
+            self.runtime_collapse = True
 
         self.periodicity = periodicity
 
@@ -66,6 +90,8 @@ class Series(object):
             es_offset += extra_offset(self.periodicity)
 
         self.search = self.search[es_start:es_offset]
+        self.es_start = es_start
+        self.es_end = es_offset
 
     def get_es_start(self, request_start_dates, start):
         """Calcula el comienzo de la query para esta serie particular. El parámetro
@@ -7,33 +7,33 @@ import iso8601
 from django.conf import settings
 from django.http import JsonResponse
 from elasticsearch import TransportError
-from django_datajsonar import models
 
 from series_tiempo_ar_api.apps.api.exceptions import CollapseError, EndOfPeriodError
 from series_tiempo_ar_api.apps.api.helpers import validate_positive_int
 from series_tiempo_ar_api.apps.api.query.query import Query
 from series_tiempo_ar_api.apps.api.query.response import \
     ResponseFormatterGenerator
+from series_tiempo_ar_api.apps.api.query.series_cache import series_cache
 from series_tiempo_ar_api.apps.api.query.strings import SERIES_DOES_NOT_EXIST
 from series_tiempo_ar_api.apps.api.query import strings
 from series_tiempo_ar_api.apps.api.query import constants
-from series_tiempo_ar_api.apps.management import meta_keys
 
 
 class QueryPipeline(object):
     """Pipeline del proceso de queries de la serie de tiempo. Ejecuta
     varias operaciones o comandos sobre un objeto query, usando los
-    parámetros pasados por el request"""
-    def __init__(self):
+    parámetros pasados por el request. Las descripciones de las series ya leídas en el
+    request ('descriptors', ver conditional.get_series_descriptors) se reusan en lugar de
+    volver a pedirlas al caché de series"""
+    def __init__(self, descriptors=None):
         self.commands = self.init_commands()
+        self.descriptors = descriptors
 
     def run(self, args):
         query = Query()
-        for cmd in self.commands:
-            cmd_instance = cmd()
-            cmd_instance.run(query, args)
-            if cmd_instance.errors:
-                return self.generate_error_response_from_cmd(cmd_instance)
+        failed_cmd = self.apply_commands(query, args)
+        if failed_cmd is not None:
+            return self.generate_error_response_from_cmd(failed_cmd)
 
         _format = args.get(constants.PARAM_FORMAT,
                            constants.API_DEFAULT_VALUES[constants.PARAM_FORMAT])
@@ -45,6 +45,23 @@ class QueryPipeline(object):
         except EndOfPeriodError as e:
             return self.generate_error_response([e.message])
 
+    def validate(self, args):
+        """Devuelve True si los argumentos pasados generan una query válida. Aplica las
+        operaciones a una query nueva, sin ejecutar la búsqueda
+        """
+        return self.apply_commands(Query(), args) is None
+
+    def apply_commands(self, query, args):
+        """Aplica las operaciones a la query. Devuelve la primera operación con errores,
+        o None
+        """
+        for cmd in self.commands:
+            cmd_instance = cmd(self.descriptors) if cmd is IdsField else cmd()
+            cmd_instance.run(query, args)
+            if cmd_instance.errors:
+                return cmd_instance
+        return None
+
     @staticmethod
     def generate_error_response(errors_list):
         response = {'errors': list(errors_list)}
@@ -221,10 +238,14 @@ class IdsField(BaseOperation):
     a base de el parseo el parámetro 'ids', que contiene datos de varias series a la vez
     """
 
-    def __init__(self):
+    def __init__(self, descriptors=None):
         BaseOperation.__init__(self)
         # Lista EN ORDEN de las operaciones de collapse a aplicar a las series
         self.aggs = []
+        # Descripciones de las series pedidas, obtenidas en bloque, indexadas por identifier
+        self.series_models = {}
+        # Descripciones ya leídas por el llamador, o None para pedirlas al caché de series
+        self.descriptors = descriptors
 
     def run(self, query, args):
         # Ejemplo de formato del parámetro 'ids':
@@ -249,6 +270,7 @@ class IdsField(BaseOperation):
             self._append_error(strings.SERIES_OVER_LIMIT.format(limit))
             return
 
+        self.series_models = self._get_models([serie_string.split(':')[0] for serie_string in series])
         for serie_string in series:
             self.process_serie_string(query, serie_string, rep_mode, collapse_agg)
             if self.errors:
@@ -295,16 +317,21 @@ class IdsField(BaseOperation):
         pedida es un ID contenido en la base de datos. De no
         encontrarse, llena la lista de errores según corresponda.
         """
-        field_model = models.Field.objects.filter(identifier=series_id)
-        if not field_model:
+        field_model = self.series_models.get(series_id)
+        if not field_model or not field_model.available:
             self._append_error(SERIES_DOES_NOT_EXIST.format(series_id), series_id=series_id)
             return None
 
-        available = field_model[0].enhanced_meta.filter(key=meta_keys.AVAILABLE)
-        if not available or available[0] == 'False':
-            self._append_error(SERIES_DOES_NOT_EXIST.format(series_id), series_id=series_id)
-            return None
-        return field_model[0]
+        return field_model
+
+    def _get_models(self, series_ids):
+        """Obtiene las descripciones de todas las series pedidas de una vez, desde
+        el caché de series o, para las faltantes, con una única query a la base de datos.
+        Devuelve un dict identifier: SeriesDescriptor
+        """
+        if self.descriptors is not None:
+            return self.descriptors
+        return series_cache.get_many(series_ids)
 
     def _parse_single_series(self, serie):
         """Parsea una serie invididual. Actualiza la lista de errores
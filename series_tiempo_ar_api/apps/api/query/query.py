@@ -1,20 +1,26 @@
 #! coding: utf-8
-import json
 from collections import OrderedDict
 from typing import Union
 
 from django.conf import settings
-from django_datajsonar.models import Catalog, Dataset, Distribution, Field
+from django_datajsonar.models import Field
 from iso8601 import iso8601
 
 from series_tiempo_ar_api.apps.api.exceptions import CollapseError
 from series_tiempo_ar_api.apps.api.helpers import get_periodicity_human_format
 from series_tiempo_ar_api.apps.api.query import constants
 from series_tiempo_ar_api.apps.api.query.metadata_response import MetadataResponse
-from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.apps.api.query.series_descriptor import SeriesDescriptor
+from .es_query.columnar_query import ColumnarQuery
 from .es_query.es_query import ESQuery
+from .es_query.mmap_query import MmapQuery
 
-datajson_entity = Union[Catalog, Dataset, Distribution, Field]
+# Backends de datos de las series, ver settings.TS_DATA_BACKEND
+DATA_BACKENDS = {
+    'elasticsearch': ESQuery,
+    'columnar': ColumnarQuery,
+    'mmap': MmapQuery,
+}
 
 
 def rep_mode_units(rep_mode: str) -> str:
@@ -25,13 +31,15 @@ class Query(object):
     """Encapsula la query pedida por un usuario. Tiene dos componentes
     principales: la parte de datos obtenida haciendo llamadas a
     Elasticsearch, y los metadatos guardados en la base de datos
-    relacional
+    relacional, leídos a través de un SeriesDescriptor por serie
     """
     def __init__(self, index=settings.TS_INDEX):
         self.es_index = index
-        self.es_query = ESQuery(index)
+        self.es_query = DATA_BACKENDS[settings.TS_DATA_BACKEND](index)
         self.series_models = []
         self.series_rep_modes = []
+        # Periodicidad (formato 'human') de cada serie, calculada una única vez al agregarla
+        self.series_periodicities = []
         self.metadata_config = constants.API_DEFAULT_VALUES[constants.PARAM_METADATA]
         self.metadata_flatten = False
 
@@ -48,41 +56,35 @@ class Query(object):
             return [model.title for model in self.series_models]
 
         if how == constants.HEADER_PARAM_DESCRIPTIONS:
-            return [json.loads(model.metadata).get('description', '') for model in self.series_models]
+            return [model.description for model in self.series_models]
 
         return self.es_query.get_series_ids()
 
     def add_pagination(self, start, limit):
-        start_dates = {serie.identifier: meta_keys.get(serie, meta_keys.INDEX_START) for serie in self.series_models}
+        start_dates = {serie.identifier: serie.index_start for serie in self.series_models}
         start_dates = {k: iso8601.parse_date(v) if v is not None else None for k, v in start_dates.items()}
         return self.es_query.add_pagination(start, limit, start_dates=start_dates)
 
     def add_filter(self, start_date, end_date):
         return self.es_query.add_filter(start_date, end_date)
 
-    def add_series(self, name, field_model,
+    def add_series(self, name, field_model: Union[SeriesDescriptor, Field],
                    rep_mode=constants.API_DEFAULT_VALUES[constants.PARAM_REP_MODE],
                    collapse_agg=constants.API_DEFAULT_VALUES[constants.PARAM_COLLAPSE_AGG]):
-        periodicities = [
-            get_periodicity_human_format(
-                field.distribution.enhanced_meta.get(key=meta_keys.PERIODICITY).value)
-            for field in self.series_models
-        ]
+        if isinstance(field_model, Field):
+            field_model = SeriesDescriptor.from_field(field_model)
 
-        self.series_models.append(field_model)
-        self.series_rep_modes.append(rep_mode)
-        series_periodicity = get_periodicity_human_format(
-            field_model.distribution.enhanced_meta.get(key=meta_keys.PERIODICITY).value)
-
-        periodicity = get_periodicity_human_format(
-            field_model.distribution.enhanced_meta.get(key=meta_keys.PERIODICITY).value)
-        if periodicities and series_periodicity not in periodicities:
+        series_periodicity = get_periodicity_human_format(field_model.periodicity)
+        periodicity = series_periodicity
+        if self.series_periodicities and series_periodicity not in self.series_periodicities:
             # Hay varias series con distintas periodicities, colapso los datos
-            periodicities.append(series_periodicity)
-            periodicity = self.get_max_periodicity(periodicities)
+            periodicity = self.get_max_periodicity(self.series_periodicities + [series_periodicity])
             self.add_collapse(collapse=periodicity)
 
-        self.es_query.add_series(name, rep_mode, periodicity, collapse_agg)
+        self.series_models.append(field_model)
+        self.series_rep_modes.append(rep_mode)
+        self.series_periodicities.append(series_periodicity)
+        self.es_query.add_series(name, rep_mode, periodicity, collapse_agg, field_model.data_hash)
 
     @staticmethod
     def get_max_periodicity(periodicities):
@@ -105,17 +107,21 @@ class Query(object):
     def _validate_collapse(self, collapse):
         order = constants.COLLAPSE_INTERVALS
 
-        for serie in self.series_models:
-            periodicity = serie.distribution.enhanced_meta.get(key=meta_keys.PERIODICITY).value
-            periodicity = get_periodicity_human_format(periodicity)
+        for periodicity in self.series_periodicities:
             if order.index(periodicity) > order.index(collapse):
                 raise CollapseError
 
-    def run(self):
+    def run(self, columnar=False):
+        """Ejecuta la query y arma la respuesta. Si 'columnar' es True, los datos
+        se devuelven sin armar las filas (ver ESQuery.get_results_page)
+        """
         response = OrderedDict()  # Garantiza el orden de los objetos cargados
-        self.es_query.run()
+        self.es_query.execute_searches()
         if self.metadata_config != constants.METADATA_ONLY:
-            response['data'] = self.es_query.get_results_data()
+            if columnar:
+                response['data'] = self.es_query.get_results_page()
+            else:
+                response['data'] = self.es_query.get_results_data()
 
         if self.metadata_config != constants.METADATA_NONE:
             response['meta'] = self.get_metadata()
@@ -123,6 +129,13 @@ class Query(object):
         response['count'] = self.es_query.get_results_count()
         return response
 
+    def iter_data(self):
+        """Ejecuta la búsqueda y devuelve un iterador de las filas de datos, que
+        se arman a medida que son consumidas. No calcula metadatos
+        """
+        self.es_query.execute_searches()
+        return self.es_query.iter_results_data()
+
     def get_metadata(self):
         """Arma la respuesta de metadatos: una lista de objetos con
         un metadato por serie de tiempo pedida, más una extra para el
@@ -189,8 +202,8 @@ class Query(object):
         for field in self.series_models:
             result.append({
                 'id': field.identifier,
-                'distribution': field.distribution.identifier,
-                'dataset': field.distribution.dataset.identifier
+                'distribution': field.distribution_identifier,
+                'dataset': field.dataset_identifier
             })
         return result
 
@@ -200,7 +213,7 @@ class Query(object):
     def reverse(self):
         self.es_query.reverse()
 
-    def append_rep_mode_metadata(self, serie_model: Field, meta_response: dict):
+    def append_rep_mode_metadata(self, serie_model: SeriesDescriptor, meta_response: dict):
         rep_mode = self.series_rep_modes[self.series_models.index(serie_model)]
 
         if self.metadata_flatten:
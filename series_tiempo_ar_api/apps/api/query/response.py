@@ -3,12 +3,18 @@
 """Módulo con funciones generadoras de respuestas HTTP para llamadas
 a la API
 """
-import unicodecsv
+import csv
+import json
+
 from django.conf import settings
-from django.http.response import JsonResponse, HttpResponse
+from django.http.response import JsonResponse, HttpResponse, StreamingHttpResponse
 
 from series_tiempo_ar_api.apps.api.exceptions import InvalidFormatError
 from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.serializers import get_json_encoder, SeriesJSONEncoder
+
+# Cantidad de filas de CSV enviadas por chunk en respuestas streaming
+CSV_CHUNK_ROWS = 500
 
 
 class BaseFormatter(object):
@@ -20,59 +26,106 @@ class JsonFormatter(BaseFormatter):
     def run(self, query, query_args):
         """Genera una respuesta JSON"""
 
-        response = query.run()
-        response['params'] = self._generate_params_field(query, query_args)
-        return JsonResponse(response)
+        encoder = get_json_encoder()
+        # El encoder de series escribe los datos directamente desde los arrays columnares
+        response = JsonResponse(query.run(columnar=issubclass(encoder, SeriesJSONEncoder)), encoder=encoder)
+        identifiers = query.get_series_identifiers()
+        # El caché de respuestas guarda el contenido sin 'params', y lo agrega con los
+        # argumentos de cada request (ver apps/api/response_cache.py)
+        response.content_without_params = response.content
+        response.series_identifiers = identifiers
+        response.content = add_params_field(response.content, generate_params_field(query_args, identifiers), encoder)
+        return response
 
-    @staticmethod
-    def _generate_params_field(query, args):
-        """Genera el campo adicional de parámetros pasados de la
-        respuesta. Contiene todos los argumentos pasados en la llamada,
-        más una lista de identifiers de field, distribution y dataset
-        por cada serie pedida
-        """
-        params = args.copy()
-        params['identifiers'] = query.get_series_identifiers()
-        return params
+
+def generate_params_field(args, identifiers):
+    """Genera el campo adicional de parámetros pasados de la
+    respuesta. Contiene todos los argumentos pasados en la llamada,
+    más una lista de identifiers de field, distribution y dataset
+    por cada serie pedida
+    """
+    params = args.copy()
+    params['identifiers'] = identifiers
+    return params
+
+
+def add_params_field(content, params, encoder):
+    """Agrega el campo 'params' como último campo del objeto JSON 'content' (bytes)"""
+    params_json = json.dumps(params, cls=encoder).encode(settings.DEFAULT_CHARSET)
+    if content.strip() == b'{}':
+        return b'{"params": ' + params_json + b'}'
+    return content.rstrip()[:-1] + b', "params": ' + params_json + b'}'
 
 
 class CSVFormatter(BaseFormatter):
     def run(self, query, query_args):
         """Genera una respuesta CSV, con columnas
-        (indice tiempo, serie1, serie2, ...) y un dato por fila
+        (indice tiempo, serie1, serie2, ...) y un dato por fila.
+        Las filas se generan y envían a medida que se escriben
         """
 
-        # Saco metadatos, no se usan para el formato CSV
-        query.set_metadata_config(constants.METADATA_NONE)
-
         header = query_args.get(constants.PARAM_HEADER,
                                 constants.API_DEFAULT_VALUES[constants.PARAM_HEADER])
         series_ids = query.get_series_ids(how=header)
-        data = query.run()['data']
-
-        response = HttpResponse(content_type='text/csv')
-        content = 'attachment; filename="{}"'
-        response['Content-Disposition'] = content.format(constants.CSV_RESPONSE_FILENAME)
+        # Sólo datos, los metadatos no se usan para el formato CSV
+        data = query.iter_data()
 
         delim = query_args.get(constants.PARAM_DELIM,
                                constants.API_DEFAULT_VALUES[constants.PARAM_DELIM])
-        writer = unicodecsv.writer(response, delimiter=str(delim))
-        header = [settings.INDEX_COLUMN] + series_ids
-
-        writer.writerow(header)
         decimal_char = query_args.get(constants.PARAM_DEC_CHAR, '.')
-        if decimal_char != '.':
-            # Reemplazo los puntos decimales por el char pedido
-            for row in data:
-                row = [str(el).replace('.', decimal_char) if el else None for el in row]
-                writer.writerow(row)
+        content = generate_csv([settings.INDEX_COLUMN] + series_ids, data, delim, decimal_char)
+
+        if settings.API_CSV_STREAMING:
+            response = StreamingHttpResponse(content, content_type='text/csv')
         else:
-            for row in data:
-                writer.writerow(row)
+            response = HttpResponse(content, content_type='text/csv')
 
+        content = 'attachment; filename="{}"'
+        response['Content-Disposition'] = content.format(constants.CSV_RESPONSE_FILENAME)
         return response
 
 
+class _Echo:
+    """Pseudo archivo: devuelve lo escrito en vez de guardarlo. Permite usar un csv.writer
+    para generar las líneas del CSV una a una
+    """
+    def write(self, value):
+        return value
+
+
+def generate_csv(header, rows, delim, decimal_char='.', chunk_size=CSV_CHUNK_ROWS):
+    """Generador del contenido CSV de los datos pasados, de a chunk_size filas"""
+    writer = csv.writer(_Echo(), delimiter=str(delim))
+    yield writer.writerow(header)
+
+    format_row = row_formatter(decimal_char)
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(format_row(row)))
+        if len(chunk) == chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+def row_formatter(decimal_char):
+    """Devuelve la función que formatea una fila de datos (índice de tiempo, valores...)
+    con el caracter decimal pedido
+    """
+    if decimal_char == '.':
+        return lambda row: row
+
+    table = str.maketrans('.', decimal_char)
+
+    def format_row(row):
+        values = [str(value).translate(table) if value is not None else None for value in row[1:]]
+        return [row[0]] + values
+
+    return format_row
+
+
 class ResponseFormatterGenerator(object):
 
     formatters = {
@@ -0,0 +1,51 @@
+#! coding: utf-8
+"""Serialización JSON de las respuestas de la API. Los encoders de este módulo se
+pasan a JsonResponse (parámetro 'encoder'), ver get_json_encoder
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import SeriesMatrix
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class SeriesJSONEncoder(DjangoJSONEncoder):
+    """Encoder de respuestas de la API que acepta los datos en formato columnar
+    (SeriesMatrix), armando las filas recién al serializar. Si orjson está instalado
+    y habilitado (settings.API_JSON_ORJSON) serializa la respuesta entera con él; si no,
+    se comporta igual que DjangoJSONEncoder. En los dos casos las celdas de la matriz
+    pasan por objetos de Python: escribir los valores directamente desde el array con
+    orjson y agregarles la fecha de cada fila resultó más lento
+    """
+
+    def encode(self, o):
+        if orjson is not None and settings.API_JSON_ORJSON:
+            # Las fechas pasan por default() para mantener el formato de DjangoJSONEncoder
+            return orjson.dumps(o, default=self.orjson_default, option=orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+
+        return super(SeriesJSONEncoder, self).encode(o)
+
+    def orjson_default(self, o):
+        if isinstance(o, SeriesMatrix):
+            # orjson escribe los NaN como null, sin convertirlos antes a None
+            return o.tolist(nan_to_none=False)
+        return self.default(o)
+
+    def default(self, o):
+        if isinstance(o, SeriesMatrix):
+            return o.tolist()
+        return super(SeriesJSONEncoder, self).default(o)
+
+
+JSON_ENCODERS = {
+    'series': SeriesJSONEncoder,
+    'django': DjangoJSONEncoder,
+}
+
+
+def get_json_encoder():
+    return JSON_ENCODERS[settings.API_JSON_ENCODER]
@@ -0,0 +1,126 @@
+#! coding: utf-8
+"""Caché en memoria (por worker) de las descripciones de series de tiempo, para
+evitar consultar la base de datos relacional en cada query a la API.
+
+Cada entrada guarda la versión de la distribución de la serie al momento de ser
+leída. La versión es un contador en Redis, incrementado cada vez que se termina
+de indexar la distribución (ver invalidate_distribution), lo que invalida las
+entradas en todos los workers.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django_datajsonar.models import Distribution
+from django_rq import get_connection
+from redis.exceptions import RedisError
+
+from .series_descriptor import SeriesDescriptor, load_descriptors
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'series_cache:distribution_version:{}'
+
+
+class SeriesCache:
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # identifier: (version, timestamp, SeriesDescriptor)
+        self.lock = threading.Lock()
+
+    def get_many(self, series_ids: Iterable[str]) -> Dict[str, SeriesDescriptor]:
+        """Devuelve las descripciones de las series pedidas que existan, leyendo
+        de la base de datos únicamente las que no estén cacheadas o estén desactualizadas
+        """
+        series_ids = list(series_ids)
+        try:
+            result = self._get_cached(series_ids)
+        except RedisError as e:
+            logger.warning(u'Error leyendo versiones del caché de series: %s', e)
+            return load_descriptors(series_ids)
+
+        missing = [series_id for series_id in series_ids if series_id not in result]
+        if not missing:
+            return result
+
+        loaded = load_descriptors(missing)
+        try:
+            self._store(loaded.values())
+        except RedisError as e:
+            logger.warning(u'Error guardando descripciones en el caché de series: %s', e)
+
+        result.update(loaded)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def _get_cached(self, series_ids: List[str]) -> Dict[str, SeriesDescriptor]:
+        now = time.monotonic()
+        with self.lock:
+            cached = {series_id: self.entries[series_id]
+                      for series_id in series_ids if series_id in self.entries}
+
+        cached = {series_id: entry for series_id, entry in cached.items() if now - entry[1] < self.ttl}
+        if not cached:
+            return {}
+
+        versions = get_versions([descriptor.distribution_pk for _, _, descriptor in cached.values()])
+        result = {}
+        with self.lock:
+            for series_id, (version, _, descriptor) in cached.items():
+                if versions[descriptor.distribution_pk] == version:
+                    result[series_id] = descriptor
+                    self.entries.move_to_end(series_id)
+                else:
+                    self.entries.pop(series_id, None)
+        return result
+
+    def _store(self, descriptors: Iterable[SeriesDescriptor]):
+        descriptors = list(descriptors)
+        if not descriptors:
+            return
+
+        versions = get_versions([descriptor.distribution_pk for descriptor in descriptors])
+        now = time.monotonic()
+        with self.lock:
+            for descriptor in descriptors:
+                self.entries[descriptor.identifier] = (versions[descriptor.distribution_pk], now, descriptor)
+                self.entries.move_to_end(descriptor.identifier)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+def get_versions(distribution_pks: List[int]) -> Dict[int, int]:
+    """Lee las versiones de las distribuciones pasadas con una única llamada a Redis"""
+    distribution_pks = list(set(distribution_pks))
+    values = get_connection().mget([VERSION_KEY.format(pk) for pk in distribution_pks])
+    return {pk: int(value or 0) for pk, value in zip(distribution_pks, values)}
+
+
+def invalidate_distribution(distribution):
+    """Invalida las entradas cacheadas de todas las series de la distribución
+    pasada, en todos los workers
+    """
+    get_connection().incr(VERSION_KEY.format(distribution.pk))
+
+
+def invalidate_all():
+    """Invalida las entradas cacheadas de todas las series, en todos los workers. Usado
+    al terminar una corrida de indexación, cuando los datos escritos por la corrida pasan
+    a ser visibles en el índice
+    """
+    pipeline = get_connection().pipeline(transaction=False)
+    for pk in Distribution.objects.values_list('pk', flat=True).iterator():
+        pipeline.incr(VERSION_KEY.format(pk))
+    pipeline.execute()
+
+
+series_cache = SeriesCache(max_size=settings.SERIES_CACHE_SIZE, ttl=settings.SERIES_CACHE_TTL)
@@ -0,0 +1,153 @@
+#! coding: utf-8
+import hashlib
+import json
+from typing import NamedTuple, Optional, Dict, Iterable, Union
+
+from django_datajsonar.models import Catalog, Dataset, Distribution, Field
+
+from series_tiempo_ar_api.apps.management import meta_keys
+
+datajson_entity = Union[Catalog, Dataset, Distribution, Field]
+
+
+class SeriesDescriptor(NamedTuple):
+    """Descripción inmutable de una serie de tiempo: todos los datos de la base
+    relacional que necesita una query de la API, leídos una única vez.
+    Puede ser compartida entre requests (ver series_cache)
+    """
+    identifier: str
+    title: str
+    description: str
+    units: Optional[str]
+    periodicity: Optional[str]  # Formato ISO 8601, ej. 'R/P1M'
+    index_start: Optional[str]
+    index_end: Optional[str]
+    available: bool
+    distribution_pk: int
+    distribution_identifier: str
+    dataset_identifier: str
+    data_hash: Optional[str]  # Hash de los datos de la distribución en la última indexación
+    last_indexed: Optional[str]  # Fecha y hora ISO 8601 de la última indexación con cambios
+    # Metadatos completos de los cuatro niveles, data.json-like. NO modificar,
+    # usar una copia
+    metadata: Dict[str, dict]
+    metadata_hash: str  # Hash de 'metadata', ver get_metadata_hash
+    metadata_updated: Optional[str]  # Fecha y hora ISO 8601 del último cambio de 'metadata'
+
+    @classmethod
+    def from_field(cls, field: Field) -> 'SeriesDescriptor':
+        """Arma la descripción de la serie a partir de su modelo. Aprovecha los
+        metadatos enriquecidos si fueron traídos con prefetch_related
+        """
+        distribution = field.distribution
+        dataset = distribution.dataset
+        field_meta = _enhanced_meta_dict(field)
+        distribution_meta = _enhanced_meta_dict(distribution)
+        full_metadata = get_full_metadata(field)
+
+        return cls(
+            identifier=field.identifier,
+            title=field.title,
+            description=full_metadata['field'].get('description', ''),
+            units=full_metadata['field'].get('units'),
+            periodicity=distribution_meta.get(meta_keys.PERIODICITY),
+            index_start=field_meta.get(meta_keys.INDEX_START),
+            index_end=field_meta.get(meta_keys.INDEX_END),
+            available=meta_keys.AVAILABLE in field_meta,
+            distribution_pk=distribution.pk,
+            distribution_identifier=distribution.identifier,
+            dataset_identifier=dataset.identifier,
+            data_hash=distribution_meta.get(meta_keys.LAST_HASH),
+            last_indexed=distribution_meta.get(meta_keys.LAST_INDEXED),
+            metadata=full_metadata,
+            metadata_hash=get_metadata_hash(full_metadata),
+            metadata_updated=distribution_meta.get(meta_keys.METADATA_UPDATED),
+        )
+
+
+def load_descriptors(series_ids: Iterable[str]) -> Dict[str, SeriesDescriptor]:
+    """Busca los modelos de todas las series pedidas en una única query, trayendo
+    junto a ellos su distribución, dataset y catálogo, y los metadatos enriquecidos
+    de todos los niveles. Devuelve un dict identifier: SeriesDescriptor
+    """
+    fields = Field.objects\
+        .filter(identifier__in=set(series_ids))\
+        .select_related('distribution__dataset__catalog')\
+        .prefetch_related('enhanced_meta',
+                          'distribution__enhanced_meta',
+                          'distribution__dataset__enhanced_meta',
+                          'distribution__dataset__catalog__enhanced_meta')
+
+    result = {}
+    for field in fields:
+        if field.identifier not in result:
+            result[field.identifier] = SeriesDescriptor.from_field(field)
+    return result
+
+
+def get_full_metadata(field: Field) -> Dict[str, dict]:
+    """Devuelve un diccionario (data.json-like) de los metadatos
+    de la serie, con los metadatos enriquecidos de cada nivel:
+
+    {
+        "catalog": {<catalog_meta>},
+        "dataset": {<dataset_meta>},
+        "distribution": {<distribution_meta>},
+        "field": {<field_meta>},
+    }
+    """
+    distribution = field.distribution
+    dataset = distribution.dataset
+    catalog = dataset.catalog
+
+    dataset_meta = _get_full_metadata_for_model(dataset)
+    replace_dataset_theme(dataset, dataset_meta)
+
+    return {
+        'catalog': _get_full_metadata_for_model(catalog),
+        'dataset': dataset_meta,
+        'distribution': _get_full_metadata_for_model(distribution),
+        'field': _get_full_metadata_for_model(field),
+    }
+
+
+def get_metadata_hash(full_metadata: Dict[str, dict]) -> str:
+    """Hash de los metadatos completos de una serie, sin los metadatos enriquecidos que
+    registran sus propios cambios
+    """
+    distribution_meta = {key: value for key, value in full_metadata['distribution'].items()
+                         if key not in (meta_keys.METADATA_HASH, meta_keys.METADATA_UPDATED)}
+    metadata = dict(full_metadata, distribution=distribution_meta)
+    serialized = json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+def replace_dataset_theme(dataset: Dataset, dataset_meta: dict):
+    """Reemplaza los 'id' de los themes en los metadatos del dataset
+    pasado por un dict con el detalle de cada theme (el id, su label
+    y descripción)
+    """
+    if not dataset.themes:
+        return
+
+    themes: list = dataset_meta.get('theme', [])
+    theme_details: list = json.loads(dataset.themes)
+    dataset_meta['theme'] = []
+    for theme_id in themes:
+        for theme_dict in theme_details:
+            if theme_id == theme_dict['id']:
+                dataset_meta['theme'].append(theme_dict)
+
+
+def _get_full_metadata_for_model(model: datajson_entity) -> dict:
+    metadata = {}
+    json_fields = json.loads(model.metadata)
+
+    metadata.update(json_fields)
+    metadata.update(_enhanced_meta_dict(model))
+    return metadata
+
+
+def _enhanced_meta_dict(model: datajson_entity) -> dict:
+    # Se usa .all() y no .filter(key=...) para aprovechar los prefetch
+    return {enhanced_meta.key: enhanced_meta.value for enhanced_meta in model.enhanced_meta.all()}
@@ -0,0 +1,167 @@
+#! coding: utf-8
+"""Caché de respuestas completas de la API de series, usando el framework de caché
+de Django (alias settings.API_RESPONSE_CACHE_ALIAS).
+
+La clave de cada respuesta se arma con los argumentos del request en forma canónica
+más las versiones de las distribuciones de las series pedidas (ver
+series_cache.get_versions): al reindexar una distribución se incrementa su versión
+y las respuestas que incluían alguna de sus series dejan de ser usadas.
+
+Las respuestas JSON se guardan sin el campo 'params', que se agrega en cada acierto con
+los argumentos del request, por lo que requests que difieren sólo en valores default
+explícitos comparten la respuesta. Por eso los argumentos se validan antes de buscar la
+respuesta: un valor default explícito puede ser inválido en combinación con otros
+parámetros (por ejemplo 'limit' con 'last'). Las respuestas en streaming (CSV) se
+guardan si su contenido no supera API_RESPONSE_CACHE_MAX_STREAMING_BYTES.
+"""
+import hashlib
+import itertools
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django_rq import get_connection
+from redis.exceptions import RedisError
+
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.pipeline import QueryPipeline
+from series_tiempo_ar_api.apps.api.query.response import add_params_field, generate_params_field
+from series_tiempo_ar_api.apps.api.query.serializers import get_json_encoder
+from series_tiempo_ar_api.apps.api.query.series_cache import series_cache, get_versions
+
+logger = logging.getLogger(__name__)
+
+KEY_FORMAT = 'api_response:{}'
+HITS_KEY = 'api_response_cache:hits'
+MISSES_KEY = 'api_response_cache:misses'
+
+# Headers de la respuesta guardados junto al contenido
+CACHED_HEADERS = ['Content-Disposition']
+
+# Parámetros cuya ausencia no equivale a su valor default: sin 'collapse' no se agregan
+# los datos
+NOT_DEFAULTED_PARAMS = [constants.PARAM_COLLAPSE]
+
+
+class ResponseCache:
+
+    def get_response(self, args, generate_response, descriptors=None, valid=None):
+        """Devuelve la respuesta cacheada para los argumentos pasados o, de no
+        existir, la genera llamando a generate_response(args) y la guarda. 'descriptors'
+        (descripciones de las series pedidas) y 'valid' (resultado de la validación de los
+        argumentos) se calculan si no se pasan ya calculados en el request
+        """
+        if not settings.API_RESPONSE_CACHE_ENABLED:
+            return generate_response(args)
+
+        try:
+            key = self.get_key(args, descriptors)
+        except RedisError as e:
+            logger.warning(u'Error leyendo versiones del caché de respuestas: %s', e)
+            return generate_response(args)
+
+        if valid is None:
+            valid = QueryPipeline(descriptors).validate(args)
+        if key is None or not valid:
+            return generate_response(args)
+
+        cache = caches[settings.API_RESPONSE_CACHE_ALIAS]
+        cached = cache.get(key)
+        if cached is not None:
+            self._count(HITS_KEY)
+            return self._build_response(cached, args)
+
+        self._count(MISSES_KEY)
+        response = generate_response(args)
+        if response.status_code != 200:
+            return response
+
+        content = self._buffer_streaming(response) if response.streaming else response.content
+        if content is not None:
+            cache.set(key, self._serialize_response(response, content), settings.API_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    @staticmethod
+    def get_key(args, descriptors=None):
+        """Clave de la respuesta, o None si alguna serie pedida no existe"""
+        ids = args.get(constants.PARAM_IDS)
+        if not ids:
+            return None
+
+        series_ids = set(serie_string.split(':')[0] for serie_string in ids.split(','))
+        if descriptors is None:
+            descriptors = series_cache.get_many(series_ids)
+        descriptors = {series_id: descriptors[series_id] for series_id in series_ids if series_id in descriptors}
+        if len(descriptors) < len(series_ids):
+            return None
+
+        versions = get_versions([descriptor.distribution_pk for descriptor in descriptors.values()])
+        key = u'{}|{}'.format(canonical_args(args), sorted(versions.items()))
+        return KEY_FORMAT.format(hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def _buffer_streaming(response):
+        """Lee el contenido de una respuesta en streaming hasta
+        API_RESPONSE_CACHE_MAX_STREAMING_BYTES. Devuelve el contenido completo, o None si
+        es mayor: en ambos casos la respuesta se sigue enviando desde lo ya leído
+        """
+        chunks = []
+        size = 0
+        iterator = iter(response.streaming_content)
+        for chunk in iterator:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > settings.API_RESPONSE_CACHE_MAX_STREAMING_BYTES:
+                response.streaming_content = itertools.chain(chunks, iterator)
+                return None
+
+        content = b''.join(chunks)
+        response.streaming_content = [content]
+        return content
+
+    @staticmethod
+    def _serialize_response(response, content):
+        headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+        # Respuestas JSON de la API: el campo 'params' depende de los argumentos del request
+        identifiers = getattr(response, 'series_identifiers', None)
+        if identifiers is not None:
+            content = response.content_without_params
+        return content, response['Content-Type'], headers, identifiers
+
+    @staticmethod
+    def _build_response(cached, args):
+        content, content_type, headers, identifiers = cached
+        if identifiers is not None:
+            content = add_params_field(content, generate_params_field(args, identifiers), get_json_encoder())
+        response = HttpResponse(content, content_type=content_type)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    @staticmethod
+    def _count(key):
+        try:
+            get_connection().incr(key)
+        except RedisError as e:
+            logger.warning(u'Error actualizando contadores del caché de respuestas: %s', e)
+
+
+def canonical_args(args):
+    """Forma canónica de los argumentos de un request: pares (clave, valor)
+    ordenados por clave, con los valores default de los parámetros no pasados. 'ids' se
+    mantiene tal cual, el orden de las series define el de las columnas de la respuesta
+    """
+    canonical = {key: str(value) for key, value in constants.API_DEFAULT_VALUES.items()
+                 if key not in NOT_DEFAULTED_PARAMS}
+    canonical.update((key, value) for key, value in args.items() if value is not None)
+    return repr(sorted(canonical.items()))
+
+
+def get_stats():
+    """Devuelve los contadores de aciertos y fallos del caché, de todos los workers"""
+    hits, misses = get_connection().mget([HITS_KEY, MISSES_KEY])
+    return {'hits': int(hits or 0), 'misses': int(misses or 0)}
+
+
+response_cache = ResponseCache()
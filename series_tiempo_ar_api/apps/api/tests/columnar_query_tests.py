@@ -0,0 +1,90 @@
+#! coding: utf-8
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_query import ColumnarQuery, period_start
+from series_tiempo_ar_api.libs.indexing.columnar_store import get_columnar_store
+from series_tiempo_ar_api.libs.indexing.indexer.operations import process_column
+
+SERIES_ID = 'columnar_series'
+
+
+class ColumnarQueryTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ColumnarQueryTests, cls).setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(TS_COLUMNAR_STORE_ROOT=cls.root)
+        cls.settings_override.enable()
+        index = pd.date_range('2000-01-01', periods=48, freq='MS')
+        cls.col = pd.Series(np.arange(1, 49, dtype=float), index=index, name=SERIES_ID)
+        process_column(cls.col, 'test_index', get_columnar_store('test_index'))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.root)
+        super(ColumnarQueryTests, cls).tearDownClass()
+
+    def setUp(self):
+        self.query = ColumnarQuery('test_index')
+
+    def test_pagination(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month')
+        self.query.add_pagination(10, 5)
+        data = self.query.run()
+
+        self.assertEqual(data, [['2000-11-01', 11.0], ['2000-12-01', 12.0], ['2001-01-01', 13.0],
+                                ['2001-02-01', 14.0], ['2001-03-01', 15.0]])
+        self.assertEqual(self.query.get_results_count(), 48)
+
+    def test_sort_desc(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month')
+        self.query.sort(constants.SORT_DESCENDING)
+        self.query.add_pagination(0, 2)
+
+        self.assertEqual(self.query.run(), [['2003-12-01', 48.0], ['2003-11-01', 47.0]])
+
+    def test_collapse_sum(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month', constants.AGG_SUM)
+        self.query.add_collapse('year')
+        self.query.add_pagination(0, 10)
+
+        expected = [[f'{year}-01-01', float(self.col[str(year)].sum())] for year in range(2000, 2004)]
+        self.assertEqual(self.query.run(), expected)
+
+    def test_runtime_collapse_max(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month', constants.AGG_MAX)
+        self.query.add_collapse('quarter')
+        self.query.add_filter('2001-01-01', None)
+        self.query.add_pagination(0, 2)
+
+        self.assertEqual(self.query.run(), [['2001-01-01', 15.0], ['2001-04-01', 18.0]])
+
+    @override_settings(TS_PRECOMPUTED_MIN_MAX=True)
+    def test_precomputed_collapse_max(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month', constants.AGG_MAX)
+        self.query.add_collapse('quarter')
+        self.query.add_filter('2001-01-01', None)
+        self.query.add_pagination(0, 2)
+
+        self.assertEqual(self.query.run(), [['2001-01-01', 15.0], ['2001-04-01', 18.0]])
+
+    def test_range_filter(self):
+        self.query.add_series(SERIES_ID, constants.VALUE, 'month')
+        self.query.add_filter('2003-11-01', None)
+        self.query.add_pagination(0, 10)
+
+        self.assertEqual(self.query.run(), [['2003-11-01', 47.0], ['2003-12-01', 48.0]])
+
+    def test_period_start_week(self):
+        dates = np.array(['2018-01-01', '2018-01-07', '2018-01-08'], dtype='datetime64[D]')  # Lunes, domingo, lunes
+
+        self.assertEqual([str(date) for date in period_start(dates, 'week')],
+                         ['2018-01-01', '2018-01-01', '2018-01-08'])
@@ -0,0 +1,57 @@
+#! coding: utf-8
+import numpy as np
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.apps.api.management.commands.benchmark_response_formatter import synthetic_responses
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.es_query.columnar_response_formatter import \
+    ColumnarResponseFormatter, continuous_date_index
+from series_tiempo_ar_api.apps.api.query.es_query.response_formatter import ResponseFormatter
+
+
+class ColumnarResponseFormatterTests(SimpleTestCase):
+
+    def _assert_same_response(self, periodicity, freq, sort):
+        series, responses = synthetic_responses(3, periodicity, freq, 100)
+        args = {constants.PARAM_PERIODICITY: periodicity, constants.PARAM_SORT: sort}
+
+        expected = ResponseFormatter(series, responses, args).format_response()
+        result = ColumnarResponseFormatter(series, responses, args).format_response()
+        self.assertEqual(result.tolist(), expected)
+
+    def test_same_response_as_dict_formatter_daily(self):
+        self._assert_same_response('day', 'D', constants.SORT_ASCENDING)
+
+    def test_same_response_as_dict_formatter_business_daily(self):
+        self._assert_same_response('day', 'B', constants.SORT_ASCENDING)
+
+    def test_same_response_as_dict_formatter_monthly_desc(self):
+        self._assert_same_response('month', 'MS', constants.SORT_DESCENDING)
+
+    def test_same_response_as_dict_formatter_quarterly(self):
+        self._assert_same_response('quarter', 'QS', constants.SORT_ASCENDING)
+
+    def test_empty_response(self):
+        series, responses = synthetic_responses(2, 'month', 'MS', 0)
+        args = {constants.PARAM_PERIODICITY: 'month', constants.PARAM_SORT: constants.SORT_ASCENDING}
+
+        result = ColumnarResponseFormatter(series, responses, args).format_response()
+        self.assertEqual(result.tolist(), [])
+
+    def test_matrix_slicing_and_reverse(self):
+        series, responses = synthetic_responses(2, 'month', 'MS', 20)
+        args = {constants.PARAM_PERIODICITY: 'month', constants.PARAM_SORT: constants.SORT_ASCENDING}
+        expected = ResponseFormatter(series, responses, args).format_response()
+
+        result = ColumnarResponseFormatter(series, responses, args).format_response()
+        first_rows = result[:5]
+        first_rows.reverse()
+
+        self.assertEqual(list(first_rows), list(reversed(expected[:5])))
+        self.assertEqual(result[-1], expected[-1])
+
+    def test_continuous_index_ends_on_first_date_after_end(self):
+        index = continuous_date_index(np.datetime64('2000-01-01'), np.datetime64('2000-05-15'), 'quarter')
+
+        expected = np.array(['2000-01-01', '2000-04-01', '2000-07-01'], dtype='datetime64[D]')
+        np.testing.assert_array_equal(index, expected)
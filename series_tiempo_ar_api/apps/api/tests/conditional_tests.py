@@ -0,0 +1,104 @@
+#! coding: utf-8
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django_datajsonar.models import Field
+
+from series_tiempo_ar_api.apps.api.query.series_cache import invalidate_distribution, series_cache
+from series_tiempo_ar_api.apps.management import meta_keys
+
+SERIES_NAME = settings.TEST_SERIES_NAME.format('month')
+
+
+class ConditionalRequestTests(TestCase):
+
+    client = Client()
+    endpoint = reverse('api:series:series')
+
+    def setUp(self):
+        self.distribution = Field.objects.get(identifier=SERIES_NAME).distribution
+        self.distribution.enhanced_meta.create(key=meta_keys.LAST_HASH, value='hash')
+        self.distribution.enhanced_meta.create(key=meta_keys.LAST_INDEXED, value='2018-06-01T10:00:00+00:00')
+        invalidate_distribution(self.distribution)
+
+    def tearDown(self):
+        self.distribution.enhanced_meta.filter(key__in=[meta_keys.LAST_HASH, meta_keys.LAST_INDEXED,
+                                                        meta_keys.METADATA_UPDATED]).delete()
+        invalidate_distribution(self.distribution)
+
+    def test_response_has_validators(self):
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME})
+
+        self.assertTrue(response.has_header('ETag'))
+        self.assertEqual(response['Last-Modified'], 'Fri, 01 Jun 2018 10:00:00 GMT')
+
+    def test_matching_etag_returns_not_modified_without_search(self):
+        etag = self.client.get(self.endpoint, data={'ids': SERIES_NAME})['ETag']
+
+        with mock.patch('series_tiempo_ar_api.apps.api.views.QueryPipeline') as pipeline:
+            response = self.client.get(self.endpoint, data={'ids': SERIES_NAME}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        pipeline.assert_not_called()
+
+    def test_etag_depends_on_params(self):
+        etag = self.client.get(self.endpoint, data={'ids': SERIES_NAME})['ETag']
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME, 'limit': '1'},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_when_data_changes(self):
+        etag = self.client.get(self.endpoint, data={'ids': SERIES_NAME})['ETag']
+        self.distribution.enhanced_meta.filter(key=meta_keys.LAST_HASH).update(value='new_hash')
+        invalidate_distribution(self.distribution)
+
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_since_last_indexing(self):
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME},
+                                   HTTP_IF_MODIFIED_SINCE='Sat, 02 Jun 2018 10:00:00 GMT')
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_metadata_changes(self):
+        etag = self.client.get(self.endpoint, data={'ids': SERIES_NAME})['ETag']
+        field = Field.objects.get(identifier=SERIES_NAME)
+        metadata = json.loads(field.metadata)
+        metadata['description'] = 'Nueva descripción'
+        field.metadata = json.dumps(metadata)
+        field.save()
+        invalidate_distribution(self.distribution)
+
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_since_metadata_update(self):
+        self.distribution.enhanced_meta.create(key=meta_keys.METADATA_UPDATED, value='2018-06-03T10:00:00+00:00')
+        invalidate_distribution(self.distribution)
+
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME},
+                                   HTTP_IF_MODIFIED_SINCE='Sat, 02 Jun 2018 10:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], 'Sun, 03 Jun 2018 10:00:00 GMT')
+
+    def test_invalid_query_has_no_validators(self):
+        response = self.client.get(self.endpoint, data={'ids': SERIES_NAME, 'limit': '-1'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    @override_settings(API_RESPONSE_CACHE_ENABLED=True)
+    def test_series_read_once_per_request(self):
+        caches[settings.API_RESPONSE_CACHE_ALIAS].clear()
+        with mock.patch.object(series_cache, 'get_many', wraps=series_cache.get_many) as get_many:
+            response = self.client.get(self.endpoint, data={'ids': SERIES_NAME})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_many.call_count, 1)
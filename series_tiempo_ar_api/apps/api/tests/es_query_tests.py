@@ -2,11 +2,12 @@
 import iso8601
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from nose.tools import raises
 
 from series_tiempo_ar_api.apps.api.exceptions import QueryError
 from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.es_query.combined_search import CombinedSearch
 from series_tiempo_ar_api.apps.api.query.query import ESQuery
 from .helpers import get_series_id
 
@@ -497,3 +498,39 @@ class QueryTest(TestCase):
 
         # Todas las series generadas tienen max_limit como longitud. Ver support/generate_data.py
         self.assertEqual(self.query.get_results_count(), self.max_limit)
+
+
+class CombinedSearchTest(TestCase):
+
+    def _run(self, enabled, start=0, limit=50, sort=constants.SORT_ASCENDING, repeated=False):
+        with override_settings(API_COMBINED_SEARCH_ENABLED=enabled, API_COMBINED_SEARCH_MIN_SERIES=1):
+            query = ESQuery(settings.TEST_INDEX)
+            query.add_series(SERIES_NAME, 'value', 'month')
+            query.add_series(settings.TEST_SERIES_NAME_DELAYED.format('month'), 'value', 'month')
+            if repeated:
+                query.add_series(SERIES_NAME, constants.PCT_CHANGE, 'month')
+            query.sort(sort)
+            query.add_pagination(start, limit)
+            data = query.run()
+            return data, query.get_results_count()
+
+    def test_same_results_as_multi_search(self):
+        self.assertEqual(self._run(enabled=True), self._run(enabled=False))
+
+    def test_same_results_as_multi_search_descending(self):
+        self.assertEqual(self._run(enabled=True, sort=constants.SORT_DESCENDING),
+                         self._run(enabled=False, sort=constants.SORT_DESCENDING))
+
+    def test_same_results_as_multi_search_with_offset(self):
+        self.assertEqual(self._run(enabled=True, start=20), self._run(enabled=False, start=20))
+
+    def test_repeated_series_same_results_as_multi_search(self):
+        self.assertEqual(self._run(enabled=True, repeated=True), self._run(enabled=False, repeated=True))
+
+    @override_settings(API_COMBINED_SEARCH_ENABLED=True, API_COMBINED_SEARCH_MIN_SERIES=1)
+    def test_repeated_series_not_combined(self):
+        query = ESQuery(settings.TEST_INDEX)
+        query.add_series(SERIES_NAME, 'value', 'month')
+        query.add_series(SERIES_NAME, constants.PCT_CHANGE, 'month')
+
+        self.assertFalse(CombinedSearch(query.index, query.series).applies())
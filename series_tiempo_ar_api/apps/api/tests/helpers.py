@@ -94,3 +94,10 @@ def init_daily_series(dataset):
 
 def get_series_id(periodicity):
     return settings.TEST_SERIES_NAME.format(periodicity)
+
+
+def get_response_content(response) -> bytes:
+    """Contenido de la respuesta pasada, sea streaming (CSV) o no"""
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
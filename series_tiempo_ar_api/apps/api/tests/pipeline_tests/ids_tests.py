@@ -1,10 +1,13 @@
 #! coding: utf-8
 from django.conf import settings
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from series_tiempo_ar_api.apps.api.query.pipeline import \
     IdsField
 from series_tiempo_ar_api.apps.api.query.query import Query
+from series_tiempo_ar_api.apps.api.query.series_descriptor import load_descriptors
 from series_tiempo_ar_api.apps.api.query.strings import SERIES_DOES_NOT_EXIST
 from series_tiempo_ar_api.apps.api.tests.helpers import setup_database
 from ..helpers import get_series_id
@@ -157,3 +160,14 @@ class IdsTest(TestCase):
 
         self.cmd.run(self.query, {'ids': multi_series})
         self.assertIn(invalid, self.cmd.failed_series)
+
+    def test_models_fetched_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as single_series_queries:
+            load_descriptors([SERIES_NAME])
+
+        ids = [get_series_id('month'), get_series_id('year'), get_series_id('day')]
+        with CaptureQueriesContext(connection) as multi_series_queries:
+            descriptors = load_descriptors(ids)
+
+        self.assertEqual(len(single_series_queries), len(multi_series_queries))
+        self.assertEqual(set(descriptors.keys()), set(ids))
@@ -9,6 +9,7 @@ from series_tiempo_ar_api.apps.management import meta_keys
 from series_tiempo_ar_api.apps.api.exceptions import CollapseError
 from django_datajsonar.models import Field
 from series_tiempo_ar_api.apps.api.query.query import Query
+from series_tiempo_ar_api.apps.api.query.series_descriptor import SeriesDescriptor
 from .helpers import get_series_id
 
 SERIES_NAME = get_series_id('month')
@@ -257,3 +258,15 @@ class QueryTests(TestCase):
 
         self.assertEqual(field_meta['representation_mode'], rep_mode)
         self.assertEqual(field_meta['representation_mode_units'], constants.VERBOSE_REP_MODES[rep_mode])
+
+    def test_add_series_does_not_query_db(self):
+        descriptor = SeriesDescriptor.from_field(self.field)
+        year_descriptor = SeriesDescriptor.from_field(Field.objects.get(identifier=get_series_id('year')))
+
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                self.query.add_series(self.single_series, descriptor)
+            self.query.add_series(get_series_id('year'), year_descriptor)
+            self.query.add_collapse(collapse='year')
+
+        self.assertEqual(self.query.series_periodicities, ['month'] * 10 + ['year'])
@@ -0,0 +1,143 @@
+#! coding: utf-8
+import json
+
+from django.core.cache import caches
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django_datajsonar.models import Field
+
+from series_tiempo_ar_api.apps.api.query import constants
+from series_tiempo_ar_api.apps.api.query.pipeline import QueryPipeline
+from series_tiempo_ar_api.apps.api.query.response import add_params_field, generate_params_field
+from series_tiempo_ar_api.apps.api.query.series_cache import invalidate_distribution
+from series_tiempo_ar_api.apps.api.response_cache import ResponseCache, get_stats
+from .helpers import get_series_id
+
+SERIES_NAME = get_series_id('month')
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        caches[settings.API_RESPONSE_CACHE_ALIAS].clear()
+        self.cache = ResponseCache()
+        self.calls = 0
+
+    def generate_response(self, args):
+        self.calls += 1
+        return JsonResponse({'data': [], 'args': args})
+
+    def test_repeated_request_served_from_cache(self):
+        args = {constants.PARAM_IDS: SERIES_NAME, constants.PARAM_LIMIT: '10'}
+        response = self.cache.get_response(args, self.generate_response)
+        cached = self.cache.get_response(dict(args), self.generate_response)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+
+    def test_different_args_not_shared(self):
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME}, self.generate_response)
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME, constants.PARAM_LIMIT: '10'},
+                                self.generate_response)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_explicit_default_args_with_last_not_served_from_cache(self):
+        pipeline = QueryPipeline()
+        last = {constants.PARAM_IDS: SERIES_NAME, constants.PARAM_LAST: '5'}
+        self.cache.get_response(last, pipeline.run)
+        for param, value in ((constants.PARAM_LIMIT, '100'),
+                             (constants.PARAM_START, '0'),
+                             (constants.PARAM_SORT, constants.SORT_ASCENDING)):
+            response = self.cache.get_response(dict(last, **{param: value}), pipeline.run)
+
+            self.assertEqual(response.status_code, constants.RESPONSE_ERROR_CODE)
+
+    def test_collapse_not_defaulted(self):
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME}, self.generate_response)
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME, constants.PARAM_COLLAPSE: 'year'},
+                                self.generate_response)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_params_field_uses_request_args(self):
+        def api_response(args):
+            self.calls += 1
+            response = JsonResponse({'data': []})
+            response.content_without_params = response.content
+            response.series_identifiers = [{'id': SERIES_NAME}]
+            response.content = add_params_field(response.content, generate_params_field(args, [{'id': SERIES_NAME}]),
+                                                json.JSONEncoder)
+            return response
+
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME}, api_response)
+        args = {constants.PARAM_IDS: SERIES_NAME, constants.PARAM_LIMIT: '100'}
+        cached = json.loads(self.cache.get_response(args, api_response).content.decode())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cached['data'], [])
+        self.assertEqual(cached['params'], dict(args, identifiers=[{'id': SERIES_NAME}]))
+
+    def test_small_streaming_response_cached(self):
+        def csv_response(args):
+            self.calls += 1
+            return StreamingHttpResponse(iter(['indice_tiempo\n', '2018-01-01\n']), content_type='text/csv')
+
+        args = {constants.PARAM_IDS: SERIES_NAME, constants.PARAM_FORMAT: 'csv'}
+        response = self.cache.get_response(args, csv_response)
+        cached = self.cache.get_response(args, csv_response)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(b''.join(response.streaming_content), cached.content)
+
+    @override_settings(API_RESPONSE_CACHE_MAX_STREAMING_BYTES=10)
+    def test_large_streaming_response_not_cached(self):
+        def csv_response(args):
+            self.calls += 1
+            return StreamingHttpResponse(iter(['indice_tiempo\n', '2018-01-01\n']), content_type='text/csv')
+
+        args = {constants.PARAM_IDS: SERIES_NAME, constants.PARAM_FORMAT: 'csv'}
+        response = self.cache.get_response(args, csv_response)
+        self.cache.get_response(args, csv_response)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(b''.join(response.streaming_content), b'indice_tiempo\n2018-01-01\n')
+
+    def test_ids_order_is_part_of_key(self):
+        other = get_series_id('year')
+        self.cache.get_response({constants.PARAM_IDS: SERIES_NAME + ',' + other}, self.generate_response)
+        self.cache.get_response({constants.PARAM_IDS: other + ',' + SERIES_NAME}, self.generate_response)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_reindexed_distribution_invalidates_response(self):
+        args = {constants.PARAM_IDS: SERIES_NAME}
+        self.cache.get_response(args, self.generate_response)
+        invalidate_distribution(Field.objects.get(identifier=SERIES_NAME).distribution)
+        self.cache.get_response(args, self.generate_response)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_error_responses_not_cached(self):
+        def error_response(args):
+            self.calls += 1
+            return JsonResponse({'errors': []}, status=constants.RESPONSE_ERROR_CODE)
+
+        args = {constants.PARAM_IDS: SERIES_NAME}
+        self.cache.get_response(args, error_response)
+        self.cache.get_response(args, error_response)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_hit_and_miss_counters(self):
+        stats = get_stats()
+        args = {constants.PARAM_IDS: SERIES_NAME}
+        self.cache.get_response(args, self.generate_response)
+        self.cache.get_response(args, self.generate_response)
+
+        new_stats = get_stats()
+        self.assertEqual(new_stats['hits'], stats['hits'] + 1)
+        self.assertEqual(new_stats['misses'], stats['misses'] + 1)
@@ -8,7 +8,7 @@ from series_tiempo_ar_api.apps.api.query import constants
 from series_tiempo_ar_api.apps.api.query.query import Query
 from series_tiempo_ar_api.apps.api.query.response import \
     ResponseFormatterGenerator
-from .helpers import get_series_id
+from .helpers import get_series_id, get_response_content
 
 SERIES_NAME = get_series_id('month')
 
@@ -40,15 +40,17 @@ class ResponseTests(TestCase):
     def test_csv_response_header_ids(self):
         generator = ResponseFormatterGenerator('csv').get_formatter()
         response = generator.run(self.query, {'header': 'ids'})
-        line_end = str(response.content).find('\n')
-        header = response.content[:line_end]
+        content = get_response_content(response)
+        line_end = str(content).find('\n')
+        header = content[:line_end]
         self.assertTrue(self.single_series in str(header))
 
     def test_csv_response_header(self):
         generator = ResponseFormatterGenerator('csv').get_formatter()
         response = generator.run(self.query, {'header': 'titles'})
-        line_end = str(response.content).find('\n')
-        header = response.content[:line_end]
+        content = get_response_content(response)
+        line_end = str(content).find('\n')
+        header = content[:line_end]
         self.assertTrue(self.series_name in str(header))
 
     def test_csv_name(self):
@@ -62,8 +64,9 @@ class ResponseTests(TestCase):
     def test_csv_response_header_description(self):
         generator = ResponseFormatterGenerator('csv').get_formatter()
         response = generator.run(self.query, {'header': 'descriptions'})
-        line_end = str(response.content).find('\n')
-        header = response.content[:line_end]
+        content = get_response_content(response)
+        line_end = str(content).find('\n')
+        header = content[:line_end]
         self.assertIn(self.series_desc, str(header))
 
     def test_csv_different_decimal_empty_rows(self):
@@ -76,4 +79,16 @@ class ResponseTests(TestCase):
         generator = ResponseFormatterGenerator('csv').get_formatter()
         response = generator.run(query, {'decimal': ','})
 
-        self.assertFalse("None" in str(response.content))
+        self.assertFalse("None" in str(get_response_content(response)))
+
+    def test_csv_decimal_char_replaced(self):
+        query = Query(index=settings.TEST_INDEX)
+        field = Field.objects.get(identifier=self.single_series)
+        query.add_series(self.single_series, field, rep_mode='change')
+
+        generator = ResponseFormatterGenerator('csv').get_formatter()
+        rows = [row.split(';') for row in
+                get_response_content(generator.run(query, {'decimal': ',', 'sep': ';'})).decode().splitlines()]
+
+        for row in rows[1:]:
+            self.assertNotIn('.', row[1])
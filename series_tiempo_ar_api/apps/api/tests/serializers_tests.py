@@ -0,0 +1,43 @@
+#! coding: utf-8
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.apps.api.management.commands.benchmark_json_serialization import synthetic_matrix
+from series_tiempo_ar_api.apps.api.query.serializers import SeriesJSONEncoder
+
+
+class SeriesJSONEncoderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.matrix = synthetic_matrix(100, 3)
+        self.meta = [{'updated': datetime.datetime(2018, 1, 1, 10, 30, 0, 123456), 'title': u'Índice'}]
+
+    def _expected(self):
+        response = OrderedDict([('data', self.matrix.tolist()), ('meta', self.meta)])
+        return json.loads(json.dumps(response, cls=DjangoJSONEncoder))
+
+    def _encode(self):
+        response = OrderedDict([('data', self.matrix), ('meta', self.meta)])
+        return json.loads(json.dumps(response, cls=SeriesJSONEncoder))
+
+    @override_settings(API_JSON_ORJSON=False)
+    def test_same_output_as_django_encoder(self):
+        self.assertEqual(self._encode(), self._expected())
+
+    @override_settings(API_JSON_ORJSON=True)
+    def test_same_output_as_django_encoder_accelerated(self):
+        self.assertEqual(self._encode(), self._expected())
+
+    @override_settings(API_JSON_ORJSON=True)
+    def test_reversed_matrix_accelerated(self):
+        self.matrix.reverse()
+        self.assertEqual(self._encode(), self._expected())
+
+    @override_settings(API_JSON_ORJSON=True)
+    def test_empty_matrix_accelerated(self):
+        self.matrix = self.matrix[:0]
+        self.assertEqual(self._encode(), self._expected())
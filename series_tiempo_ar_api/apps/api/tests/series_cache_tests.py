@@ -0,0 +1,57 @@
+#! coding: utf-8
+from django.test import TestCase
+from django_datajsonar.models import Field
+
+from series_tiempo_ar_api.apps.api.query.series_cache import SeriesCache, invalidate_distribution
+from series_tiempo_ar_api.apps.api.query.series_descriptor import SeriesDescriptor
+from .helpers import get_series_id
+
+SERIES_NAME = get_series_id('month')
+
+
+class SeriesCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = SeriesCache(max_size=2, ttl=60)
+
+    def test_descriptor_from_cache_does_not_query_db(self):
+        self.cache.get_many([SERIES_NAME])
+
+        with self.assertNumQueries(0):
+            descriptors = self.cache.get_many([SERIES_NAME])
+
+        self.assertEqual(descriptors[SERIES_NAME].identifier, SERIES_NAME)
+
+    def test_descriptor_metadata(self):
+        field = Field.objects.get(identifier=SERIES_NAME)
+        descriptor = self.cache.get_many([SERIES_NAME])[SERIES_NAME]
+
+        self.assertEqual(descriptor, SeriesDescriptor.from_field(field))
+        self.assertEqual(descriptor.periodicity, 'R/P1M')
+        self.assertEqual(descriptor.description, 'test_series_description')
+        self.assertTrue(descriptor.available)
+
+    def test_invalid_series_not_returned(self):
+        self.assertEqual(self.cache.get_many(['invalid']), {})
+
+    def test_invalidated_distribution_is_read_again(self):
+        self.cache.get_many([SERIES_NAME])
+        invalidate_distribution(Field.objects.get(identifier=SERIES_NAME).distribution)
+
+        with self.assertNumQueries(5):
+            self.cache.get_many([SERIES_NAME])
+
+    def test_least_recently_used_series_evicted(self):
+        self.cache.get_many([SERIES_NAME, get_series_id('year')])
+        self.cache.get_many([SERIES_NAME])
+        self.cache.get_many([get_series_id('day')])
+
+        self.assertIn(SERIES_NAME, self.cache.entries)
+        self.assertNotIn(get_series_id('year'), self.cache.entries)
+
+    def test_expired_entries_are_read_again(self):
+        cache = SeriesCache(max_size=2, ttl=0)
+        cache.get_many([SERIES_NAME])
+
+        with self.assertNumQueries(5):
+            cache.get_many([SERIES_NAME])
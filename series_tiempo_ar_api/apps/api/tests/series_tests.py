@@ -1,7 +1,8 @@
 from datetime import datetime
 
 from dateutil.relativedelta import relativedelta
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 
 from series_tiempo_ar_api.apps.api.query import constants
 from series_tiempo_ar_api.apps.api.query.es_query.series import Series
@@ -142,3 +143,40 @@ class SeriesStartOffsetTests(TestCase):
 
         self.assertEqual(start, 50)
         self.assertEqual(other_start, 49)
+
+
+class SeriesSourceFilterTests(TestCase):
+
+    def test_only_time_index_and_rep_mode_requested(self):
+        series = Series(index='test', series_id='series_id', rep_mode=constants.PCT_CHANGE, periodicity='month')
+
+        self.assertEqual(series.search.to_dict()['_source'], [settings.TS_TIME_INDEX_FIELD, constants.PCT_CHANGE])
+
+
+@override_settings(TS_PRECOMPUTED_MIN_MAX=True)
+class PrecomputedMinMaxTests(TestCase):
+
+    def test_collapse_filters_by_aggregation(self):
+        series = Series(index='test', series_id='series_id', rep_mode=constants.VALUE,
+                        periodicity='month', collapse_agg=constants.AGG_MAX)
+        series.add_collapse('year')
+
+        search = series.search.to_dict()
+        self.assertNotIn('aggs', search)
+        self.assertIn({'match': {'aggregation': constants.AGG_MAX}}, must_filters(search))
+        self.assertFalse(series.runtime_collapse)
+
+    def test_original_periodicity_filters_by_average(self):
+        series = Series(index='test', series_id='series_id', rep_mode=constants.VALUE,
+                        periodicity='month', collapse_agg=constants.AGG_MIN)
+        series.add_collapse('month')
+
+        self.assertIn({'match': {'aggregation': constants.AGG_DEFAULT}}, must_filters(series.search.to_dict()))
+        self.assertEqual(series.collapse_agg, constants.AGG_DEFAULT)
+
+
+def must_filters(search_dict):
+    filters = []
+    for _filter in search_dict['query']['bool']['filter']:
+        filters.extend(_filter['bool']['must'])
+    return filters
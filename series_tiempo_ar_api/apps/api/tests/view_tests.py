@@ -7,6 +7,8 @@ from django.http import JsonResponse
 from django.test import TestCase, Client
 from django.urls import reverse
 
+from .helpers import get_response_content
+
 SERIES_NAME = settings.TEST_SERIES_NAME.format('month')
 
 
@@ -35,7 +37,7 @@ class ViewTests(TestCase):
                                          data={'ids': SERIES_NAME, 'format': 'CSV'})
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, response_upper.content)
+        self.assertEqual(get_response_content(response), get_response_content(response_upper))
 
     def test_collapse_agg_ignore_case(self):
         response = self.client.get(self.endpoint,
@@ -86,14 +88,14 @@ class ViewTests(TestCase):
                                    data={'ids': SERIES_NAME, 'format': 'csv', 'sep': ';'})
 
         # CSV de sólo números, la única manera que haya ';' es que sea el delimiter
-        self.assertIn(b';', response.content)
+        self.assertIn(b';', get_response_content(response))
 
     def test_csv_decimal_char(self):
         decimal = ','
         response = self.client.get(self.endpoint,
                                    data={'ids': SERIES_NAME, 'format': 'csv', 'decimal': decimal})
 
-        reader = csv.reader(str(response.content).splitlines())
+        reader = csv.reader(str(get_response_content(response)).splitlines())
 
         for line in reader:
             self.assertTrue(len(line), 2)
@@ -105,11 +107,18 @@ class ViewTests(TestCase):
                                          'decimal': ',',
                                          'sep': delim})
 
-        reader = csv.reader(str(response.content).splitlines(), delimiter=delim)
+        reader = csv.reader(str(get_response_content(response)).splitlines(), delimiter=delim)
 
         for line in reader:
             self.assertTrue(len(line), 2)
 
+    def test_csv_streaming_response(self):
+        response = self.client.get(self.endpoint,
+                                   data={'ids': SERIES_NAME, 'format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
     def test_start_over_limit_returns_400(self):
         response = self.client.get(self.endpoint,
                                    data={'ids': SERIES_NAME,
@@ -1,14 +1,18 @@
 #! coding: utf-8
-from series_tiempo_ar_api.apps.api.query import constants
+from django.views.decorators.http import condition
+
+from .conditional import get_query_args, series_etag, series_last_modified, get_series_descriptors, \
+    is_valid_query
 from .query.pipeline import QueryPipeline
+from .response_cache import response_cache
 
 
+@condition(etag_func=series_etag, last_modified_func=series_last_modified)
 def query_view(request):
-    query = QueryPipeline()
+    # Descripciones de las series y validación ya calculadas para los validadores condicionales
+    descriptors = get_series_descriptors(request)
+    query = QueryPipeline(descriptors)
     # Formateo argumentos a lowercase, excepto ids
-    ids = request.GET.get(constants.PARAM_IDS)
-    args = {key: value.lower() for key, value in request.GET.items()}
-    args[constants.PARAM_IDS] = ids
+    args = get_query_args(request)
 
-    response = query.run(args)
-    return response
+    return response_cache.get_response(args, query.run, descriptors=descriptors, valid=is_valid_query(request))
@@ -55,7 +55,7 @@ class CsvDumpWriter:
             fields = {field.title: field.identifier for field in fields}
             periodicity = meta_keys.get(distribution, meta_keys.PERIODICITY)
 
-            df = read_distribution_csv(distribution)
+            df = read_distribution_csv(distribution, indexable_only=True)
             df.apply(self.write_serie, args=(periodicity, fields, writer))
         except Exception as e:
             msg = f'[{self.tag} Error en la distribución {distribution.identifier}: {e.__class__}: {e}'
@@ -0,0 +1,77 @@
+#! coding: utf-8
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from series_tiempo_ar_api.apps.api.helpers import freq_pandas_to_interval
+from series_tiempo_ar_api.libs.indexing.indexer.operations import column_transformations, elastic_actions
+
+
+class Command(BaseCommand):
+    help = u"Compara las acciones por segundo generadas para el bulk request de una " \
+           u"distribución sintética con DataFrame.apply por fila (implementación anterior) " \
+           u"contra el generador por columnas (elastic_actions). Las transformaciones de " \
+           u"cada serie se calculan antes, y no se incluyen en los tiempos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--columns', type=int, default=500)
+        parser.add_argument('--periods', type=int, default=240, help=u"Valores mensuales por serie")
+
+    def handle(self, *args, **options):
+        index = pd.date_range('2000-01-01', periods=options['periods'], freq='MS')
+        df = pd.DataFrame(np.random.rand(options['periods'], options['columns']) * 1000,
+                          index=index,
+                          columns=[f'serie_{i}' for i in range(options['columns'])])
+
+        transformations = [(col, list(column_transformations(df[col]))) for col in df.columns]
+        for name, function in (('DataFrame.apply', apply_actions), ('elastic_actions', generator_actions)):
+            start = time.perf_counter()
+            count = sum(1 for _ in function(transformations))
+            seconds = time.perf_counter() - start
+            self.stdout.write(f"{name}: {count} acciones en {seconds:.1f} s ({count / seconds:.0f} acciones/s)")
+
+
+def generator_actions(transformations):
+    for col, col_transformations in transformations:
+        for freq, agg, transform_df in col_transformations:
+            yield from elastic_actions(transform_df, settings.TS_INDEX, col, freq, agg)
+
+
+def apply_actions(transformations):
+    """Implementación anterior: una acción por fila con DataFrame.apply, y concatenación
+    de las listas de cada columna
+    """
+    result = []
+    for col, col_transformations in transformations:
+        actions = []
+        for freq, agg, transform_df in col_transformations:
+            rows = transform_df.apply(elastic_index, axis='columns', args=(settings.TS_INDEX, col, freq, agg))
+            actions.extend(rows.values.flatten())
+        result.append(actions)
+    return reduce(lambda x, y: x + y, result)
+
+
+def elastic_index(row, index, series_id, freq, agg):
+    timestamp = str(row.name)
+    timestamp = timestamp[:timestamp.find('T')]
+    freq = freq_pandas_to_interval(freq.freqstr)
+    source = {
+        settings.TS_TIME_INDEX_FIELD: timestamp,
+        'series_id': series_id,
+        "interval": freq,
+        "aggregation": agg
+    }
+    for column, value in row.iteritems():
+        if value is not None and np.isfinite(value):
+            source[column] = float(str(value))
+
+    return {
+        "_index": index,
+        "_type": settings.TS_DOC_TYPE,
+        "_id": series_id + '-' + freq + '-' + agg + '-' + timestamp,
+        "_source": source
+    }
@@ -0,0 +1,64 @@
+#! coding: utf-8
+import os
+import time
+import tracemalloc
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Count
+from django_datajsonar.models import Distribution
+
+from series_tiempo_ar_api.utils.csv_reader import distribution_csv_path, series_columns, detect_encoding, \
+    parse_inferred_csv, parse_typed_csv, csv_engine
+
+
+class Command(BaseCommand):
+    help = u"Compara tiempo de parseo y pico de memoria de los archivos de datos de las " \
+           u"distribuciones con más series, entre la lectura con tipos inferidos (implementación " \
+           u"anterior) y la lectura con los tipos conocidos de sus Field (utils/csv_reader.py). " \
+           u"El pico de memoria es el registrado por tracemalloc, que no incluye la memoria " \
+           u"reservada por pyarrow"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--distributions', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        distributions = Distribution.objects.filter(present=True) \
+            .annotate(fields=Count('field')) \
+            .order_by('-fields')[:options['distributions']]
+        if not distributions:
+            raise CommandError(u"No hay distribuciones cargadas")
+
+        self.stdout.write(f"Engine: {csv_engine()}")
+        for distribution in distributions:
+            path = distribution_csv_path(distribution)
+            columns = series_columns(distribution)
+            encoding = detect_encoding(path)
+            size = os.path.getsize(path) / 1024 / 1024
+            self.stdout.write(f"{distribution.identifier}: {distribution.fields} fields, {size:.1f} MB")
+
+            parsers = (
+                ('inferido', lambda: parse_inferred_csv(path, encoding)),
+                ('tipado', lambda: parse_typed_csv(path, encoding, columns, indexable_only=False)),
+                ('tipado, sólo series', lambda: parse_typed_csv(path, encoding, columns, indexable_only=True)),
+            )
+            for name, parse in parsers:
+                seconds, peak = measure(parse, options['repeat'])
+                self.stdout.write(f"  {name}: {seconds * 1000:.0f} ms, pico de {peak / 1024 / 1024:.1f} MB")
+
+
+def measure(parse, repeat):
+    """Mejor tiempo de 'repeat' parseos, y pico de memoria de uno"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        parse()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
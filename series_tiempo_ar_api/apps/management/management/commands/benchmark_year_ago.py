@@ -0,0 +1,59 @@
+#! coding: utf-8
+import timeit
+
+import numpy as np
+import pandas as pd
+from django.core.management import BaseCommand
+
+from series_tiempo_ar_api.libs.indexing.indexer.operations import get_value_a_year_ago, year_ago_operation
+
+CASES = (
+    # (nombre, pandas freq)
+    ('diaria', 'D'),
+    ('días hábiles', 'B'),
+    ('semanal', '7D'),
+)
+
+
+class Command(BaseCommand):
+    help = u"Compara el cálculo de variaciones interanuales de series diarias y semanales " \
+           u"iterativo (get_value_a_year_ago por valor) contra el vectorizado (year_ago_operation)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        for name, freq in CASES:
+            start = pd.Timestamp('2000-01-01')
+            index = pd.date_range(start, start + pd.DateOffset(years=options['years']), freq=freq)
+            col = pd.Series(np.random.rand(len(index)) + 1, index=index)
+
+            times = {}
+            for implementation, function in (('iterativo', iterative_year_ago_operation),
+                                             ('vectorizado', year_ago_operation)):
+                def run(function=function):
+                    function(col, pct_change)
+
+                times[implementation] = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+
+            self.stdout.write(f"{name}: {len(col)} valores")
+            for implementation, seconds in times.items():
+                self.stdout.write(f"  {implementation}: {seconds * 1000:.1f} ms")
+            self.stdout.write(f"  speedup: {times['iterativo'] / times['vectorizado']:.1f}x")
+
+
+def pct_change(x, y):
+    return (x - y) / y
+
+
+def iterative_year_ago_operation(col, operation):
+    """Implementación anterior de year_ago_column para series diarias y semanales"""
+    array = []
+    for idx, val in col.iteritems():
+        value = get_value_a_year_ago(idx, col, validate=True)
+        if value != 0:
+            array.append(operation(val, value))
+        else:
+            array.append(None)
+    return array
@@ -5,6 +5,17 @@ AVAILABLE = 'available'
 PERIODICITY = 'frequency'
 CHANGED = 'changed'
 LAST_HASH = 'last_hash'
+LAST_INDEXED = 'last_indexed'
+# Validadores HTTP de la última descarga indexada de la distribución, ver scraping.py
+ETAG = 'etag'
+LAST_MODIFIED = 'last_modified'
+# Hash y última fecha de los datos indexados de una serie, ver indexer/incremental.py
+INDEXED_DATA_HASH = 'indexed_data_hash'
+INDEXED_DATA_END = 'indexed_data_end'
+# Hash de los metadatos de las series de la distribución, y fecha de su último cambio, ver
+# apps/api/conditional.py
+METADATA_HASH = 'metadata_hash'
+METADATA_UPDATED = 'metadata_updated'
 
 INDEX_START = 'time_index_start'
 INDEX_END = 'time_index_end'
@@ -6,8 +6,12 @@ from django_rq import job
 
 from django_datajsonar.models import Node
 from series_tiempo_ar_api.apps.management.models import ReadDataJsonTask
-from series_tiempo_ar_api.libs.indexing.catalog_reader import index_catalog
+from series_tiempo_ar_api.libs.indexing import pending_jobs
+from series_tiempo_ar_api.libs.indexing.catalog_reader import read_catalog
+from series_tiempo_ar_api.libs.indexing.indexer.blue_green import start_building_index
+from series_tiempo_ar_api.libs.indexing.indexer.session import IndexingSession
 from series_tiempo_ar_api.libs.indexing.report.report_generator import ReportGenerator
+from series_tiempo_ar_api.libs.indexing.tasks import job_done
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +28,8 @@ def schedule_api_indexing(force=False):
 
     read_datajson(task, force=force)
 
-    # Si se corre el comando sincrónicamete (local/testing), generar el reporte
+    # Si se corre el comando sincrónicamete (local/testing), los jobs de la corrida, y su
+    # cierre, ya terminaron. Si no, el reporte lo genera la tarea del sincronizador
     if not settings.RQ_QUEUES['indexing'].get('ASYNC', True):
         task = ReadDataJsonTask.objects.get(id=task.id)
         ReportGenerator(task).generate()
@@ -37,11 +42,27 @@ def schedule_force_api_indexing():
 
 @job('api_index')
 def read_datajson(task, read_local=False, force=False):
-    """Tarea raíz de indexación. Itera sobre todos los nodos indexables (federados) e
-    inicia la tarea de indexación sobre cada uno de ellos
+    """Tarea raíz de indexación. Itera sobre todos los nodos indexables (federados) y
+    encola la lectura de cada uno de ellos (ver catalog_reader.read_catalog), que a su
+    vez encola la indexación de sus distribuciones. La corrida se cierra al
+    terminar el último de sus jobs (ver libs/indexing/pending_jobs.py), aún si esta
+    tarea falla
     """
-    nodes = Node.objects.filter(indexable=True)
-    task.status = task.RUNNING
+    pending_jobs.add(task.id)
+    try:
+        nodes = Node.objects.filter(indexable=True)
+        task.status = task.RUNNING
 
-    for node in nodes:
-        index_catalog(node, task, read_local, force)
+        # Las corridas forzadas con TS_BLUE_GREEN_REINDEX indexan en un índice nuevo, publicado
+        # al terminar la corrida. El resto indexa en el índice actual
+        index = settings.TS_INDEX
+        if force and settings.TS_BLUE_GREEN_REINDEX:
+            index = start_building_index(task)
+        elif settings.TS_INDEXING_SESSION_ENABLED:
+            IndexingSession(settings.TS_INDEX).start()
+
+        for node in nodes:
+            pending_jobs.add(task.id)
+            read_catalog.delay(node.id, task.id, read_local, force, index=index)
+    finally:
+        job_done(task.id)
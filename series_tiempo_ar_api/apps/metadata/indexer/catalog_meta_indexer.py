@@ -2,7 +2,6 @@
 import json
 
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import streaming_bulk
 from elasticsearch_dsl.connections import connections
 from pydatajson import DataJson
 from django_datajsonar.models import Field, Node, Metadata, ContentType
@@ -11,6 +10,7 @@ from series_tiempo_ar_api.apps.management import meta_keys
 from series_tiempo_ar_api.apps.metadata import constants
 from series_tiempo_ar_api.apps.metadata.indexer.index import init_index
 from series_tiempo_ar_api.apps.metadata.models import IndexMetadataTask
+from series_tiempo_ar_api.libs.indexing.bulk import BulkWriter
 
 
 class CatalogMetadataIndexer:
@@ -38,14 +38,12 @@ class CatalogMetadataIndexer:
             self.task.info(self.task, "No hay series para indexar en este catálogo")
             return False
 
-        index_ok = False
-        for success, info in streaming_bulk(self.elastic, self.generate_actions()):
-            if not success:
-                self.task.info(self.task, 'Error indexando: {}'.format(info))
-            else:
-                index_ok = True
+        writer = BulkWriter(self.elastic)
+        for info in writer.write(self.generate_actions()):
+            self.task.info(self.task, 'Error indexando: {}'.format(info))
 
-        return index_ok
+        self.task.info(self.task, 'Indexación de metadatos: {}'.format(writer.stats))
+        return writer.stats.docs > 0
 
     def generate_actions(self):
         fields = self.get_available_fields()
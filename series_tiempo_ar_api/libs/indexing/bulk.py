@@ -0,0 +1,222 @@
+#! coding: utf-8
+"""Escritura de documentos a Elasticsearch con bulk requests, compartida por los
+indexadores de series, metadatos y analytics. Las acciones se agrupan en requests
+de a lo sumo ES_BULK_CHUNK_SIZE documentos y ES_BULK_MAX_CHUNK_BYTES bytes, enviados por
+ES_BULK_THREADS threads. La cola de requests pendientes es acotada: si Elasticsearch es
+más lento que la generación de acciones, la generación espera. Los documentos
+rechazados por sobrecarga (status 429) se reintentan con backoff exponencial
+"""
+import logging
+import threading
+import time
+from queue import Queue, Empty
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from elasticsearch import Elasticsearch, TransportError
+from elasticsearch.helpers import expand_action
+
+from series_tiempo_ar_api.libs.indexing import constants
+
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS = 429
+
+
+class BulkStats:
+    """Métricas de una escritura: documentos escritos y rechazados, bytes enviados
+    (sin contar reintentos), documentos reintentados y duración
+    """
+
+    def __init__(self):
+        self.docs = 0
+        self.bytes = 0
+        self.retries = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.docs / self.seconds if self.seconds else 0.0
+
+    def update(self, other: 'BulkStats'):
+        """Suma las métricas de otra escritura"""
+        self.docs += other.docs
+        self.bytes += other.bytes
+        self.retries += other.retries
+        self.rejected += other.rejected
+        self.seconds += other.seconds
+
+    def __str__(self):
+        return u"{} documentos ({:.1f} MB) en {:.1f} s ({:.0f} docs/s), {} reintentos, {} rechazados".format(
+            self.docs, self.bytes / 1024 / 1024, self.seconds, self.docs_per_second, self.retries, self.rejected)
+
+
+class BulkWriter:
+    """Si se pasa refresh_index, el refresco de ese índice se desactiva cuando la
+    escritura supera ES_BULK_DISABLE_REFRESH_DOCS documentos, y se restaura al terminar.
+    Sólo para índices con un único escritor: con varios escritores concurrentes, el
+    primero en terminar restaura el refresco de los demás (ver indexer/session.py)
+    """
+
+    def __init__(self, elastic: Elasticsearch, refresh_index: Optional[str] = None,
+                 chunk_size: int = None, max_chunk_bytes: int = None, threads: int = None):
+        self.elastic = elastic
+        self.refresh_index = refresh_index
+        self.chunk_size = chunk_size or settings.ES_BULK_CHUNK_SIZE
+        self.max_chunk_bytes = max_chunk_bytes or settings.ES_BULK_MAX_CHUNK_BYTES
+        self.threads = threads or settings.ES_BULK_THREADS
+        self.max_retries = settings.ES_BULK_MAX_RETRIES
+        self.stats = BulkStats()
+
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._refresh_checked = False
+        self._refresh_to_restore = False
+        self._previous_refresh = None
+
+    def write(self, actions: Iterable[dict]) -> Iterator[dict]:
+        """Escribe las acciones, con el mismo formato que las de los helpers de
+        elasticsearch-py. Genera la respuesta de cada acción fallida
+        """
+        start = time.perf_counter()
+        chunks = Queue(maxsize=self.threads * 2)
+        results = Queue()
+        workers = [threading.Thread(target=self._worker, args=(chunks, results), daemon=True)
+                   for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+
+        queued = 0
+        try:
+            for chunk in self._chunks(actions):
+                chunks.put(chunk)
+                queued += len(chunk)
+                if queued > settings.ES_BULK_DISABLE_REFRESH_DOCS:
+                    self._disable_refresh()
+                yield from self._drain(results)
+        except BaseException:
+            self._abort.set()
+            raise
+        finally:
+            for _ in workers:
+                chunks.put(None)
+            for worker in workers:
+                worker.join()
+            self._restore_refresh()
+            self.stats.seconds += time.perf_counter() - start
+
+        yield from self._drain(results)
+
+    def _chunks(self, actions: Iterable[dict]) -> Iterator[List[Tuple[str, ...]]]:
+        """Agrupa las acciones serializadas (línea de acción y de datos, si tiene)"""
+        serializer = self.elastic.transport.serializer
+        chunk, chunk_bytes = [], 0
+        for action in actions:
+            action, data = expand_action(action)
+            lines = (serializer.dumps(action),) if data is None else (serializer.dumps(action), serializer.dumps(data))
+            size = sum(len(line.encode('utf-8')) + 1 for line in lines)
+
+            if chunk and (len(chunk) == self.chunk_size or chunk_bytes + size > self.max_chunk_bytes):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+
+            chunk.append(lines)
+            chunk_bytes += size
+            self.stats.bytes += size
+
+        if chunk:
+            yield chunk
+
+    def _worker(self, chunks: Queue, results: Queue):
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if self._abort.is_set():
+                continue
+
+            try:
+                for error in self._send(chunk):
+                    results.put((error, None))
+            except Exception as e:
+                self._abort.set()
+                results.put((None, e))
+
+    def _send(self, chunk: List[Tuple[str, ...]]) -> List[dict]:
+        """Envía el bulk request, reintentando los documentos rechazados con status 429.
+        Devuelve la respuesta de los documentos que fallaron
+        """
+        errors = []
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self.stats.retries += len(chunk)
+                time.sleep(min(settings.ES_BULK_MAX_BACKOFF, settings.ES_BULK_INITIAL_BACKOFF * 2 ** (attempt - 1)))
+
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.elastic.bulk('\n'.join(line for lines in chunk for line in lines) + '\n')
+            except TransportError as e:
+                if e.status_code == TOO_MANY_REQUESTS and not last_attempt:
+                    continue
+                raise
+
+            to_retry, ok, failed = [], 0, 0
+            for lines, item in zip(chunk, response['items']):
+                op_type, info = item.popitem()
+                status = info.get('status', 500)
+                if 200 <= status < 300:
+                    ok += 1
+                elif status == TOO_MANY_REQUESTS and not last_attempt:
+                    to_retry.append(lines)
+                else:
+                    failed += 1
+                    errors.append({op_type: info})
+
+            with self._lock:
+                self.stats.docs += ok
+                self.stats.rejected += failed
+            chunk = to_retry
+            if not chunk:
+                break
+
+        return errors
+
+    @staticmethod
+    def _drain(results: Queue) -> Iterator[dict]:
+        while True:
+            try:
+                error, exception = results.get_nowait()
+            except Empty:
+                return
+            if exception is not None:
+                raise exception
+            yield error
+
+    def _disable_refresh(self):
+        if self.refresh_index is None or self._refresh_checked:
+            return
+
+        index_settings = self.elastic.indices.get_settings(index=self.refresh_index, name='index.refresh_interval')
+        refresh = [value['settings']['index'].get('refresh_interval') for value in index_settings.values()
+                   if value.get('settings')]
+        self._refresh_checked = True
+        disabled = str(constants.DEACTIVATE_REFRESH_BODY['index']['refresh_interval'])
+        if refresh and str(refresh[0]) == disabled:
+            return  # Ya desactivado por quien administra el índice, no lo restauramos
+
+        self._previous_refresh = refresh[0] if refresh else None
+        self.elastic.indices.put_settings(index=self.refresh_index, body=constants.DEACTIVATE_REFRESH_BODY)
+        self._refresh_to_restore = True
+
+    def _restore_refresh(self):
+        if not self._refresh_to_restore:
+            return
+
+        self._refresh_to_restore = False
+        try:
+            self.elastic.indices.put_settings(index=self.refresh_index,
+                                              body={'index': {'refresh_interval': self._previous_refresh}})
+        except TransportError as e:
+            logger.error(u'Error restaurando el refresco del índice %s: %s', self.refresh_index, e)
@@ -3,15 +3,32 @@ from __future__ import division
 
 import json
 
+from django.conf import settings
+from django_rq import job
 from pydatajson import DataJson
 
-from django_datajsonar.models import Distribution
+from django_datajsonar.models import Distribution, Node
 from series_tiempo_ar_api.apps.management.models import ReadDataJsonTask
-from series_tiempo_ar_api.libs.indexing.tasks import index_distribution
-from .strings import READ_ERROR
+from series_tiempo_ar_api.libs.indexing import pending_jobs
+from series_tiempo_ar_api.libs.indexing.tasks import index_distribution, job_done
+from .downloader import DistributionDownloader
+from .strings import READ_ERROR, DOWNLOAD_STATS
 
 
-def index_catalog(node, task, read_local=False, force=False):
+@job('api_index', timeout=settings.CATALOG_READ_JOB_TIMEOUT)
+def read_catalog(node_id, task_id, read_local=False, force=False, index=settings.TS_INDEX):
+    """Job de lectura de un catálogo, encolado por read_datajson. Corre aparte de la tarea
+    raíz, con su propio timeout, porque incluye la descarga anticipada de todas las
+    distribuciones del catálogo
+    """
+    try:
+        index_catalog(Node.objects.get(id=node_id), ReadDataJsonTask.objects.get(id=task_id),
+                      read_local, force, index=index)
+    finally:
+        job_done(task_id)
+
+
+def index_catalog(node, task, read_local=False, force=False, index=settings.TS_INDEX):
     """Ejecuta el pipeline de lectura, guardado e indexado de datos
     y metadatos sobre cada distribución del catálogo especificado
     """
@@ -27,5 +44,15 @@ def index_catalog(node, task, read_local=False, force=False):
     distributions = Distribution.objects.filter(present=True,
                                                 dataset__indexable=True,
                                                 dataset__catalog__identifier=node.catalog_id)
-    for distribution in distributions:
-        index_distribution.delay(distribution.identifier, node.id, task.id, read_local, force=force)
+    if read_local or not settings.DISTRIBUTION_PREFETCH_ENABLED:
+        for distribution in distributions:
+            pending_jobs.add(task.id)
+            index_distribution.delay(distribution.identifier, node.id, task.id, read_local, index=index, force=force)
+        return
+
+    # Cada distribución se encola apenas termina su descarga
+    downloader = DistributionDownloader(conditional=not force)
+    for distribution in downloader.prefetch(distributions):
+        pending_jobs.add(task.id)
+        index_distribution.delay(distribution.identifier, node.id, task.id, read_local, index=index, force=force)
+    ReadDataJsonTask.info(task, DOWNLOAD_STATS.format(node.catalog_id, downloader.stats))
@@ -0,0 +1,108 @@
+#! coding: utf-8
+"""Backend de datos columnar, alternativo a los documentos por punto de Elasticsearch.
+Cada combinación (serie, intervalo, agregación) se guarda como un único archivo .npz
+con el índice de tiempo (datetime64[D]) y un array float64 por modo de representación
+(NaN para valores faltantes). Las queries se resuelven con indexado de arrays, ver
+apps/api/query/es_query/columnar_query.py
+"""
+import os
+import shutil
+import tempfile
+from typing import NamedTuple, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from series_tiempo_ar_api.apps.api.helpers import freq_pandas_to_interval
+from series_tiempo_ar_api.libs.indexing import constants
+
+REP_MODES = [
+    constants.VALUE,
+    constants.CHANGE,
+    constants.PCT_CHANGE,
+    constants.CHANGE_YEAR_AGO,
+    constants.PCT_CHANGE_YEAR_AGO,
+]
+
+DATES_KEY = 'dates'
+
+
+class SeriesArrays(NamedTuple):
+    """Datos de una serie en un intervalo y agregación: fechas ordenadas en forma
+    ascendente y un array de valores por modo de representación, todos del mismo largo
+    """
+    dates: np.ndarray
+    values: Dict[str, np.ndarray]
+
+
+class ColumnarStore:
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def write(self, series_id: str, freq: pd.DateOffset, agg: str, transform_df: pd.DataFrame):
+        """Guarda los valores de todos los modos de representación de la serie en el
+        intervalo y agregación pasados (ver operations.column_transformations).
+        El archivo se reemplaza en forma atómica
+        """
+        path = self._path(series_id, freq_pandas_to_interval(freq.freqstr), agg)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        arrays = {}
+        for rep_mode in REP_MODES:
+            values = transform_df[rep_mode].values.astype(np.float64)
+            # Igual que en Elasticsearch, los valores no finitos se consideran faltantes
+            values[~np.isfinite(values)] = np.nan
+            arrays[rep_mode] = values
+        arrays[DATES_KEY] = transform_df.index.values.astype('datetime64[D]')
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.savez(tmp_file, **arrays)
+        os.replace(tmp_path, path)
+
+    def read(self, series_id: str, interval: str, agg: str) -> Optional[SeriesArrays]:
+        path = self._path(series_id, interval, agg)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            return SeriesArrays(dates=data[DATES_KEY],
+                                values={rep_mode: data[rep_mode] for rep_mode in REP_MODES})
+
+    def read_all(self, series_id: str) -> Iterator[Tuple[str, str, SeriesArrays]]:
+        """Devuelve (intervalo, agregación, arrays) de todos los archivos guardados de la serie"""
+        series_dir = self._series_dir(series_id)
+        if not os.path.isdir(series_dir):
+            return
+
+        for filename in sorted(os.listdir(series_dir)):
+            if not filename.endswith('.npz'):
+                continue
+            interval, agg = filename[:-len('.npz')].split('-', 1)
+            yield interval, agg, self.read(series_id, interval, agg)
+
+    def delete_series(self, series_ids: Iterable[str]):
+        for series_id in series_ids:
+            shutil.rmtree(self._series_dir(series_id), ignore_errors=True)
+
+    def series_size(self, series_id: str) -> int:
+        """Tamaño en bytes de los archivos guardados de la serie"""
+        series_dir = self._series_dir(series_id)
+        if not os.path.isdir(series_dir):
+            return 0
+
+        return sum(os.path.getsize(os.path.join(series_dir, filename)) for filename in os.listdir(series_dir))
+
+    def _series_dir(self, series_id: str) -> str:
+        return os.path.join(self.root, quote(series_id, safe=''))
+
+    def _path(self, series_id: str, interval: str, agg: str) -> str:
+        return os.path.join(self._series_dir(series_id), '{}-{}.npz'.format(interval, agg))
+
+
+def get_columnar_store(index: str) -> ColumnarStore:
+    """Store de los datos del índice de series pasado"""
+    return ColumnarStore(os.path.join(settings.TS_COLUMNAR_STORE_ROOT, index))
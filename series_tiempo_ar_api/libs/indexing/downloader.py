@@ -0,0 +1,141 @@
+#! coding: utf-8
+"""Descarga anticipada de los archivos de datos de las distribuciones de un catálogo al
+caché local (ver utils/csv_reader.py), antes de encolar sus jobs de indexación. Las
+descargas se hacen con DISTRIBUTION_DOWNLOAD_THREADS threads, con a lo sumo
+DISTRIBUTION_DOWNLOAD_HOST_CONNECTIONS requests simultáneos y un intervalo mínimo de
+DISTRIBUTION_DOWNLOAD_HOST_INTERVAL segundos entre requests a un mismo host. Así los
+workers de 'api_index' leen los archivos del disco en lugar de esperar a los servidores
+de origen
+"""
+import logging
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django_datajsonar.models import Distribution
+
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.utils.csv_reader import distribution_url, distribution_csv_path, fetch, \
+    save_prefetched_download
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadStats:
+    """Métricas de una descarga de distribuciones: archivos descargados de su URL, sin
+    cambios (304) y con errores, bytes descargados y duración
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return u"{} archivos ({:.1f} MB) en {:.1f} s ({:.1f} MB/s), {} sin cambios, {} errores".format(
+            self.files, self.bytes / 1024 / 1024, self.seconds, self.bytes_per_second / 1024 / 1024,
+            self.not_modified, self.errors)
+
+
+class HostLimiter:
+    """Limita los requests simultáneos a un host, y el intervalo entre sus comienzos"""
+
+    def __init__(self, connections: int, interval: float):
+        self.semaphore = threading.BoundedSemaphore(connections)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        with self.lock:
+            wait = self.next_start - time.monotonic()
+            self.next_start = max(self.next_start, time.monotonic()) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *_):
+        self.semaphore.release()
+
+
+class DistributionDownloader:
+
+    def __init__(self, threads: int = None, conditional: bool = True):
+        """Con 'conditional', las descargas se piden con los validadores HTTP (ETag,
+        Last-Modified) de la última descarga indexada de cada distribución
+        """
+        self.threads = threads or settings.DISTRIBUTION_DOWNLOAD_THREADS
+        self.conditional = conditional
+        self.stats = DownloadStats()
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, distributions: Iterable[Distribution]) -> Iterator[Distribution]:
+        """Descarga los datos de las distribuciones, devolviendo cada una a medida que
+        termina su descarga. Los errores se loguean y la distribución se devuelve igual:
+        su job de indexación reintenta la descarga y registra el error
+        """
+        by_url = OrderedDict()
+        for distribution in distributions:
+            try:
+                url = distribution_url(distribution)
+            except ValueError:
+                yield distribution
+                continue
+            by_url.setdefault(url, []).append(distribution)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            # Los metadatos se leen de la base antes, para no abrir una conexión por thread
+            futures = {executor.submit(self._download, url, same_url[0], *self._validators(same_url[0])): same_url
+                       for url, same_url in by_url.items()}
+            for future in as_completed(futures):
+                yield from futures[future]
+        self.stats.seconds += time.time() - start
+
+    def _validators(self, distribution: Distribution) -> Tuple[Optional[str], Optional[str]]:
+        if not self.conditional or distribution.data_file:
+            return None, None
+        return meta_keys.get(distribution, meta_keys.ETAG), meta_keys.get(distribution, meta_keys.LAST_MODIFIED)
+
+    def _download(self, url: str, distribution: Distribution, etag: Optional[str], last_modified: Optional[str]):
+        try:
+            if distribution.data_file:
+                # Copia local del archivo guardado por django_datajsonar, sin request a la URL
+                distribution_csv_path(distribution)
+                return
+
+            with self._limiter(url):
+                result = fetch(url, etag, last_modified)
+            save_prefetched_download(url, result)
+        except Exception as e:
+            logger.warning(u"Error descargando la distribución %s: %s", distribution.identifier, e)
+            with self._lock:
+                self.stats.errors += 1
+            return
+
+        with self._lock:
+            if result.path is None:
+                self.stats.not_modified += 1
+            else:
+                self.stats.files += 1
+                self.stats.bytes += result.size
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(settings.DISTRIBUTION_DOWNLOAD_HOST_CONNECTIONS,
+                                                   settings.DISTRIBUTION_DOWNLOAD_HOST_INTERVAL)
+            return self._limiters[host]
@@ -0,0 +1,247 @@
+#! coding: utf-8
+"""Reindexación completa de las series en un índice nuevo (blue/green). settings.TS_INDEX
+es el alias leído por la API: las corridas forzadas indexan en un índice nuevo, y al
+terminar, si su contenido es válido, el alias pasa a apuntar a él en un único cambio
+atómico que borra al índice anterior. Mientras tanto las queries se siguen resolviendo
+contra el índice anterior, sin los borrados y reescrituras de la indexación en el lugar.
+
+La publicación se hace al cerrar la corrida, cuando terminaron todos sus jobs (ver
+libs/indexing/pending_jobs.py). Los metadatos de las distribuciones se actualizan
+durante la corrida: al publicar el índice se actualiza la fecha de última indexación de
+todas y se invalidan las respuestas cacheadas con los datos del índice anterior. Si el
+índice nuevo se descarta, se restauran los metadatos de las distribuciones y series
+guardados al iniciar la corrida en TS_BLUE_GREEN_METADATA_ROOT, que describen los datos
+del índice actual
+"""
+import json
+import os
+import shutil
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+from django_datajsonar.models import Distribution, Field, Metadata, ContentType
+from elasticsearch import Elasticsearch
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.connections import connections
+
+from series_tiempo_ar_api.apps.api.query.series_cache import invalidate_all
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.libs.indexing.columnar_store import get_columnar_store
+from .metadata import touch_indexed_distributions
+from .session import IndexingSession
+
+# Metadatos no escritos por la indexación, que no se restauran al descartar un índice
+NOT_INDEXING_META_KEYS = [
+    meta_keys.HITS_TOTAL,
+    meta_keys.HITS_30_DAYS,
+    meta_keys.HITS_90_DAYS,
+    meta_keys.HITS_180_DAYS,
+]
+
+
+def building_index_name(task) -> str:
+    """Nombre del índice nuevo construido por la corrida de indexación 'task'"""
+    return '{}-{}'.format(settings.TS_INDEX, task.id)
+
+
+def start_building_index(task) -> str:
+    """Crea el índice nuevo de la corrida, con la configuración de carga masiva de una
+    sesión de indexación, y devuelve su nombre
+    """
+    index = building_index_name(task)
+    drop_orphan_indices(connections.get_connection(), keep=[index])
+    save_metadata_snapshot(index)
+    IndexingSession(index).start()
+    return index
+
+
+def promote_building_index(task) -> List[str]:
+    """Termina la construcción del índice nuevo de la corrida y, si es válido, mueve el
+    alias settings.TS_INDEX a él. Devuelve los errores de validación: si hay alguno, el
+    índice nuevo se borra y se mantiene el anterior
+    """
+    elastic = connections.get_connection()
+    index = building_index_name(task)
+    if not elastic.indices.exists(index=index):
+        return []
+
+    IndexingSession(index, elastic=elastic).end()
+
+    series_count = Field.objects.count()
+    current_counts = {}
+    if elastic.indices.exists(index=settings.TS_INDEX):
+        current_counts = series_doc_counts(elastic, settings.TS_INDEX, series_count)
+    carry_over_series(elastic, index, settings.TS_INDEX, current_counts, series_count)
+
+    errors = validate_series_index(series_doc_counts(elastic, index, series_count), current_counts)
+    if errors:
+        # Los datos indexados en la corrida se descartaron. Todos los jobs de la corrida
+        # terminaron, ninguno vuelve a escribir los metadatos ni el índice
+        if not restore_metadata_snapshot(index):
+            # Sin los metadatos anteriores, la próxima indexación debe reindexar todas las
+            # distribuciones sobre el índice actual
+            Metadata.objects.filter(key__in=[meta_keys.LAST_HASH, meta_keys.INDEXED_DATA_HASH]).delete()
+        invalidate_all()
+        drop_orphan_indices(elastic)
+        return errors
+
+    swap_alias(elastic, index, settings.TS_INDEX)
+    if settings.TS_COLUMNAR_STORE_ENABLED:
+        swap_columnar_store(index, settings.TS_INDEX)
+    remove_metadata_snapshot(index)
+    drop_orphan_indices(elastic)
+    touch_indexed_distributions()
+    return []
+
+
+def save_metadata_snapshot(index: str):
+    """Guarda los metadatos de indexación de las distribuciones y series, previos a la
+    construcción del índice nuevo 'index'
+    """
+    rows = indexing_metadata().values_list('content_type_id', 'object_id', 'key', 'value')
+    os.makedirs(settings.TS_BLUE_GREEN_METADATA_ROOT, exist_ok=True)
+    with open(metadata_snapshot_path(index), 'w') as snapshot:
+        json.dump(list(rows), snapshot)
+
+
+def restore_metadata_snapshot(index: str) -> bool:
+    """Reemplaza los metadatos de indexación de las distribuciones y series por los
+    guardados al iniciar la construcción de 'index'. Devuelve False si no se guardaron
+    """
+    try:
+        with open(metadata_snapshot_path(index)) as snapshot:
+            rows = json.load(snapshot)
+    except FileNotFoundError:
+        return False
+
+    with transaction.atomic():
+        indexing_metadata().delete()
+        Metadata.objects.bulk_create([Metadata(content_type_id=content_type_id, object_id=object_id,
+                                               key=key, value=value)
+                                      for content_type_id, object_id, key, value in rows],
+                                     batch_size=1000)
+    remove_metadata_snapshot(index)
+    return True
+
+
+def remove_metadata_snapshot(index: str):
+    try:
+        os.remove(metadata_snapshot_path(index))
+    except FileNotFoundError:
+        pass
+
+
+def indexing_metadata():
+    content_types = ContentType.objects.get_for_models(Distribution, Field).values()
+    return Metadata.objects.filter(content_type__in=content_types).exclude(key__in=NOT_INDEXING_META_KEYS)
+
+
+def metadata_snapshot_path(index: str) -> str:
+    return os.path.join(settings.TS_BLUE_GREEN_METADATA_ROOT, '{}.json'.format(index))
+
+
+def drop_orphan_indices(elastic: Elasticsearch, keep=()):
+    """Borra los índices nuevos de corridas anteriores que no fueron publicados (corridas
+    descartadas o interrumpidas), salvo los de 'keep' y los apuntados por el alias
+    settings.TS_INDEX
+    """
+    keep = set(keep)
+    if elastic.indices.exists_alias(name=settings.TS_INDEX):
+        keep.update(elastic.indices.get_alias(name=settings.TS_INDEX).keys())
+
+    prefix = '{}-'.format(settings.TS_INDEX)
+    indices = elastic.indices.get(index=prefix + '*').keys()
+    for index in sorted(indices):
+        if index in keep or not index[len(prefix):].isdigit():
+            continue
+        elastic.indices.delete(index=index)
+        remove_metadata_snapshot(index)
+        if settings.TS_COLUMNAR_STORE_ENABLED:
+            shutil.rmtree(get_columnar_store(index).root, ignore_errors=True)
+
+
+def carry_over_series(elastic: Elasticsearch, index: str, current: str, current_counts: dict, series_count: int):
+    """Copia del índice actual los documentos de las series presentes que la corrida no
+    indexó (por ejemplo, por errores en la lectura de su distribución), que en la
+    indexación en el lugar conservan sus datos anteriores
+    """
+    present = set(Field.objects.filter(identifier__in=list(current_counts), present=True)
+                  .values_list('identifier', flat=True))
+    indexed = series_doc_counts(elastic, index, series_count)
+    missing = sorted(present - set(indexed))
+    if not missing:
+        return
+
+    elastic.reindex(body={'source': {'index': current, 'query': {'terms': {'series_id': missing}}},
+                          'dest': {'index': index}},
+                    refresh=True,
+                    request_timeout=settings.DISTRIBUTION_INDEX_JOB_TIMEOUT)
+
+
+def validate_series_index(counts: dict, current_counts: dict) -> List[str]:
+    """Compara la cantidad de documentos por serie del índice nuevo con la del actual.
+    Es un error que falte una serie disponible, o que tenga menos de
+    TS_BLUE_GREEN_MIN_DOCS_RATIO de los documentos que tiene en el índice actual
+    """
+    if not counts:
+        return [u'El índice nuevo no tiene documentos']
+
+    field_content_type = ContentType.objects.get_for_model(Field)
+    available_fields = Metadata.objects.filter(key=meta_keys.AVAILABLE,
+                                               value='true',
+                                               content_type=field_content_type).values_list('object_id', flat=True)
+    available = Field.objects.filter(id__in=available_fields, present=True).values_list('identifier', flat=True)
+
+    errors = []
+    for series_id in sorted(available):
+        count = counts.get(series_id, 0)
+        if not count:
+            errors.append(u'Serie {} sin documentos en el índice nuevo'.format(series_id))
+        elif count < current_counts.get(series_id, 0) * settings.TS_BLUE_GREEN_MIN_DOCS_RATIO:
+            errors.append(u'Serie {} con {} documentos en el índice nuevo ({} en el índice actual)'
+                          .format(series_id, count, current_counts[series_id]))
+    return errors
+
+
+def series_doc_counts(elastic: Elasticsearch, index: str, series_count: int) -> dict:
+    """Cantidad de documentos de cada serie del índice"""
+    search = Search(using=elastic, index=index)[:0]
+    search.aggs.bucket('series', 'terms', field='series_id', size=max(series_count, 1))
+    response = search.execute()
+    return {bucket.key: bucket.doc_count for bucket in response.aggregations.series.buckets}
+
+
+def swap_alias(elastic: Elasticsearch, index: str, alias: str):
+    """Apunta el alias al índice, borrando los índices a los que apuntaba antes. Si
+    existe un índice con el nombre del alias (indexaciones en el lugar anteriores), se
+    reemplaza por el alias
+    """
+    actions = [{"add": {"index": index, "alias": alias}}]
+    if elastic.indices.exists_alias(name=alias):
+        old_indices = elastic.indices.get_alias(name=alias).keys()
+    else:
+        old_indices = [alias] if elastic.indices.exists(index=alias) else []
+
+    for old_index in old_indices:
+        if old_index != index:
+            actions.append({"remove_index": {"index": old_index}})
+
+    elastic.indices.update_aliases(body={"actions": actions})
+
+
+def swap_columnar_store(index: str, alias: str):
+    """Mueve los archivos del backend columnar escritos en la corrida al directorio leído
+    por la API, reemplazando a los anteriores
+    """
+    new_root = get_columnar_store(index).root
+    current_root = get_columnar_store(alias).root
+    if not os.path.isdir(new_root):
+        return
+
+    old_root = current_root + '.old'
+    if os.path.isdir(current_root):
+        shutil.rmtree(old_root, ignore_errors=True)
+        os.rename(current_root, old_root)
+    os.rename(new_root, current_root)
+    shutil.rmtree(old_root, ignore_errors=True)
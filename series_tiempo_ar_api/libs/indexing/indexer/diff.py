@@ -0,0 +1,43 @@
+#! coding: utf-8
+"""Reindexación por diferencias de series cuyos datos históricos cambiaron: los ids de
+los documentos son determinísticos (serie-intervalo-agregación-fecha), por lo que se
+compara el hash del contenido de cada acción generada contra el del documento guardado
+con el mismo id, y sólo se envían al bulk request los documentos nuevos o modificados,
+más el borrado de los documentos guardados que ya no se generan
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Iterator
+
+from django.conf import settings
+from elasticsearch import Elasticsearch
+from elasticsearch_dsl import Search
+
+
+def document_hash(source: dict) -> str:
+    """Hash del _source de un documento, independiente del orden de sus claves"""
+    return hashlib.sha1(json.dumps(source, sort_keys=True).encode()).hexdigest()
+
+
+def stored_hashes(elastic: Elasticsearch, index: str, series_id: str) -> Dict[str, str]:
+    """Hash del contenido de cada documento guardado de la serie, por id"""
+    search = Search(using=elastic, index=index).filter('term', series_id=series_id)
+    return {hit.meta.id: document_hash(hit.to_dict()) for hit in search.scan()}
+
+
+def diff_actions(actions: Iterable[dict], stored: Dict[str, str], index: str) -> Iterator[dict]:
+    """Genera las acciones de 'actions' cuyo documento no está en 'stored' (ver
+    stored_hashes) o tiene otro contenido, y acciones de borrado de los documentos de
+    'stored' que no están en 'actions'. Modifica 'stored'
+    """
+    for action in actions:
+        if stored.pop(action['_id'], None) != document_hash(action['_source']):
+            yield action
+
+    for doc_id in stored:
+        yield {
+            "_op_type": "delete",
+            "_index": index,
+            "_type": settings.TS_DOC_TYPE,
+            "_id": doc_id,
+        }
@@ -1,13 +1,12 @@
 #! coding: utf-8
 import json
 import logging
-from functools import reduce
+from itertools import chain
 
 import pandas as pd
 from django.conf import settings
-from django_datajsonar.models import Distribution
+from django_datajsonar.models import ContentType, Distribution, Field, Metadata
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import parallel_bulk
 from elasticsearch_dsl import Search
 from elasticsearch_dsl.connections import connections
 from series_tiempo_ar.helpers import freq_iso_to_pandas
@@ -15,8 +14,14 @@ from series_tiempo_ar_api.apps.management import meta_keys
 
 from series_tiempo_ar_api.libs.indexing import constants
 from series_tiempo_ar_api.libs.indexing import strings
+from series_tiempo_ar_api.libs.indexing.bulk import BulkStats, BulkWriter
+from series_tiempo_ar_api.libs.indexing.columnar_store import get_columnar_store
 from series_tiempo_ar_api.libs.indexing.indexer.utils import remove_duplicated_fields
-from .operations import process_column
+from series_tiempo_ar_api.utils.csv_reader import read_distribution_csv
+from .diff import diff_actions, stored_hashes
+from .incremental import appended_since, series_data_hash
+from .operations import column_actions
+from .transformations_pool import distribution_transformations
 from .metadata import update_enhanced_meta
 from .index import tseries_index
 
@@ -28,33 +33,103 @@ class DistributionIndexer:
         self.elastic: Elasticsearch = connections.get_connection()
         self.index_name = index
         self.index = tseries_index(index)
+        self.columnar_store = get_columnar_store(index) if settings.TS_COLUMNAR_STORE_ENABLED else None
+        self.bulk_stats = BulkStats()
 
-    def run(self, distribution):
+    def run(self, distribution, incremental=False):
         fields = distribution.field_set.all()
         fields = {field.title: field.identifier for field in fields}
         df = self.init_df(distribution, fields)
 
-        # Aplica la operación de procesamiento e indexado a cada columna
-        result = [process_column(df[col], self.index_name) for col in df.columns]
-
-        if not result:  # Distribución sin series cargadas
+        # Series a las que sólo se les agregaron valores: última fecha ya indexada de cada una.
+        # Los datos del resto de las series se borran y se indexan completos, o se reindexan
+        # por diferencias con los documentos guardados si TS_DIFF_INDEXING
+        appended = {}
+        diffed = set()
+        if incremental:
+            appended = self.get_appended_series(distribution, df)
+            if settings.TS_DIFF_INDEXING:
+                diffed = set(df.columns) - set(appended)
+            self._delete_distribution_data(distribution, keep=set(appended) | diffed)
+            if self.columnar_store is not None:
+                self.columnar_store.delete_series(diffed)
+
+        if df.columns.empty:  # Distribución sin series cargadas
             return
 
-        # List flatten: si el resultado son múltiples listas las junto en una sola
-        actions = reduce(lambda x, y: x + y, result) if isinstance(result[0], list) else result
-
-        self.add_catalog_keyword(actions, distribution)
-        for success, info in parallel_bulk(self.elastic, actions):
-            if not success:
+        # Las series sin valores nuevos ya están indexadas
+        columns = [col for col in df.columns if col not in appended or appended[col] < df[col].last_valid_index()]
+
+        # Con varios procesos, el pool de transformaciones se crea antes de iniciar los
+        # threads del BulkWriter (ver transformations_pool.py)
+        with distribution_transformations(df[columns]) as columns_transformations:
+            # Aplica la operación de procesamiento e indexado a cada columna. Las acciones se
+            # generan a medida que el bulk helper las consume
+            actions = chain.from_iterable(self.series_actions(distribution, df[col], transformations,
+                                                              since=appended.get(col), diff=col in diffed)
+                                          for col, transformations in columns_transformations)
+
+            # Sin refresh_index: el refresco del índice, compartido por los jobs de todas las
+            # distribuciones, lo maneja la sesión de indexación de la corrida (ver session.py)
+            writer = BulkWriter(self.elastic)
+            for info in writer.write(actions):
                 logger.warning(strings.BULK_REQUEST_ERROR, info)
+        self.bulk_stats.update(writer.stats)
 
         remove_duplicated_fields(distribution)
         for field in distribution.field_set.exclude(title='indice_tiempo'):
             field.enhanced_meta.update_or_create(key=meta_keys.AVAILABLE, value='true')
+        self.save_indexed_data(distribution, df)
 
         # Cálculo de metadatos adicionales sobre cada serie
         df.apply(update_enhanced_meta, args=(distribution.dataset.catalog.identifier, distribution.identifier))
 
+    def series_actions(self, distribution, col, transformations, since=None, diff=False):
+        """Acciones del bulk request de la serie. Si diff, sólo las de los documentos
+        que cambiaron respecto de los guardados (ver indexer/diff.py)
+        """
+        actions = column_actions(col, self.index_name, self.columnar_store, transformations, since=since)
+        actions = self.add_catalog_keyword(actions, distribution)
+        if diff:
+            actions = diff_actions(actions, stored_hashes(self.elastic, self.index_name, col.name), self.index_name)
+        return actions
+
+    @staticmethod
+    def get_appended_series(distribution, df):
+        """Devuelve las series de df indexadas previamente cuyos datos sólo crecieron desde
+        entonces, con la última fecha con valor ya indexada de cada una
+        """
+        appended = {}
+        for field in distribution.field_set.filter(identifier__in=list(df.columns)).prefetch_related('enhanced_meta'):
+            meta = {meta.key: meta.value for meta in field.enhanced_meta.all()}
+            since = appended_since(df[field.identifier],
+                                   meta.get(meta_keys.INDEXED_DATA_HASH),
+                                   meta.get(meta_keys.INDEXED_DATA_END))
+            if since is not None:
+                appended[field.identifier] = since
+        return appended
+
+    @staticmethod
+    def save_indexed_data(distribution, df):
+        """Guarda el hash y la última fecha de los datos indexados de cada serie, para
+        detectar en la próxima indexación si sólo se le agregaron valores
+        """
+        for field in distribution.field_set.filter(identifier__in=list(df.columns)):
+            col = df[field.identifier]
+            field.enhanced_meta.update_or_create(key=meta_keys.INDEXED_DATA_HASH,
+                                                 defaults={'value': series_data_hash(col)})
+            field.enhanced_meta.update_or_create(key=meta_keys.INDEXED_DATA_END,
+                                                 defaults={'value': col.index[-1].date().isoformat()})
+
+    @staticmethod
+    def clear_indexed_data(distribution):
+        """Borra el hash y la última fecha de los datos indexados de las series, para que
+        la próxima indexación de la distribución las reescriba completas
+        """
+        Metadata.objects.filter(content_type=ContentType.objects.get_for_model(Field),
+                                object_id__in=list(distribution.field_set.values_list('id', flat=True)),
+                                key__in=[meta_keys.INDEXED_DATA_HASH, meta_keys.INDEXED_DATA_END]).delete()
+
     def init_df(self, distribution, fields):
         """Inicializa el DataFrame del CSV de la distribución pasada,
         seteando el índice de tiempo correcto y validando las columnas
@@ -89,28 +164,43 @@ class DistributionIndexer:
                 df.drop(column, axis='columns', inplace=True)
 
     def add_catalog_keyword(self, actions, distribution):
+        catalog_id = distribution.dataset.catalog.identifier
         for action in actions:
-            action['_source']['catalog'] = distribution.dataset.catalog.identifier
-
-    def reindex(self, distribution: Distribution):
-        self._delete_distribution_data(distribution)
-        self.run(distribution)
+            action['_source']['catalog'] = catalog_id
+            yield action
 
-    def _delete_distribution_data(self, distribution):
+    def reindex(self, distribution: Distribution, incremental=False):
+        """Reindexa los datos de la distribución. Si incremental, de las series a las
+        que sólo se les agregaron valores se indexan únicamente los períodos finales, y
+        si TS_DIFF_INDEXING del resto sólo los documentos que cambiaron
+        """
+        try:
+            if not incremental:
+                self._delete_distribution_data(distribution)
+            self.run(distribution, incremental=incremental)
+        except Exception:
+            # Los datos indexados de la distribución pudieron quedar reescritos en parte
+            self.clear_indexed_data(distribution)
+            raise
+
+    def _delete_distribution_data(self, distribution, keep=()):
         fields_to_delete = list(
             distribution.field_set
             .filter(present=True)
             .exclude(identifier=None)
+            .exclude(identifier__in=list(keep))
             .values_list('identifier', flat=True)
         )
         series_data = Search(using=self.elastic, index=self.index._name).filter('terms', series_id=fields_to_delete)
         series_data.delete()
 
+        if self.columnar_store is not None:
+            self.columnar_store.delete_series(fields_to_delete)
+
 
 def read_distribution_csv_as_df(distribution: Distribution) -> pd.DataFrame:
-    return pd.read_csv(distribution.data_file,
-                       parse_dates=[settings.INDEX_COLUMN],
-                       index_col=settings.INDEX_COLUMN)
+    # Mismo DataFrame leído para la validación de la distribución (ver Scraper)
+    return read_distribution_csv(distribution, indexable_only=True)
 
 
 def get_time_index_periodicity(distribution, fields):
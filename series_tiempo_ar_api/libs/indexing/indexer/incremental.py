@@ -0,0 +1,38 @@
+#! coding: utf-8
+"""Detección de series cuyos datos sólo crecieron desde la indexación anterior (se
+agregaron valores al final, sin modificar los previos). De esas series se indexan
+únicamente los períodos finales, ver operations.column_actions
+"""
+import hashlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def series_data_hash(col: pd.Series) -> str:
+    """Hash de los valores de la serie y de su índice de tiempo (comienzo y frecuencia)"""
+    digest = hashlib.sha1()
+    digest.update('{}|{}'.format(col.index[0].isoformat(), col.index.freqstr).encode())
+    digest.update(col.values.astype(np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def appended_since(col: pd.Series, indexed_hash: Optional[str], indexed_end: Optional[str]) -> Optional[pd.Timestamp]:
+    """Si los datos de la serie hasta indexed_end (última fecha de la indexación anterior)
+    son los mismos que se indexaron, devuelve la última fecha con valor indexada: los
+    datos posteriores son nuevos. Devuelve None si cambiaron los datos históricos, o no
+    hay información de la indexación anterior
+    """
+    if not indexed_hash or not indexed_end:
+        return None
+
+    indexed_end = pd.Timestamp(indexed_end)
+    if indexed_end > col.index[-1]:
+        return None
+
+    indexed = col[:indexed_end]
+    if series_data_hash(indexed) != indexed_hash:
+        return None
+
+    return indexed.last_valid_index()
@@ -21,7 +21,8 @@ def tseries_index(name: str) -> Index:
     # Actualizo el mapping
     mapping = index.get_mapping(doc_type=settings.TS_DOC_TYPE)
 
-    doc_properties = mapping[name]['mappings'][settings.TS_DOC_TYPE]['properties']
+    # Si 'name' es un alias, la respuesta está indexada por el nombre del índice
+    doc_properties = next(iter(mapping.values()))['mappings'][settings.TS_DOC_TYPE]['properties']
     if not doc_properties.get('raw_value'):
         index.put_mapping(doc_type=settings.TS_DOC_TYPE,
                           body=constants.MAPPING)
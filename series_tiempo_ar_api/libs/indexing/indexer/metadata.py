@@ -1,10 +1,17 @@
 #! coding: utf-8
+import logging
 from datetime import datetime
 import pandas as pd
+from django.utils import timezone
 from pydatajson.helpers import parse_repeating_time_interval_to_days
-from django_datajsonar.models import Field
+from django_datajsonar.models import ContentType, Distribution, Field, Metadata
+from redis.exceptions import RedisError
+
+from series_tiempo_ar_api.apps.api.query.series_cache import invalidate_all
 from series_tiempo_ar_api.apps.management import meta_keys
 
+logger = logging.getLogger(__name__)
+
 
 def update_enhanced_meta(serie: pd.Series, catalog_id: str, distribution_id: str):
     """Crea o actualiza los metadatos enriquecidos de la serie pasada. El título de
@@ -40,6 +47,22 @@ def update_enhanced_meta(serie: pd.Series, catalog_id: str, distribution_id: str
         field.enhanced_meta.update_or_create(key=meta_key, defaults={'value': value})
 
 
+def touch_indexed_distributions(distribution_ids=None):
+    """Actualiza la fecha de última indexación de las distribuciones pasadas (todas las
+    indexadas, si no se pasan), e invalida las entradas cacheadas de todas las series.
+    Usado cuando los datos escritos por una corrida pasan a ser visibles para la API
+    """
+    last_indexed = Metadata.objects.filter(key=meta_keys.LAST_INDEXED,
+                                           content_type=ContentType.objects.get_for_model(Distribution))
+    if distribution_ids is not None:
+        last_indexed = last_indexed.filter(object_id__in=list(distribution_ids))
+    last_indexed.update(value=timezone.now().isoformat())
+    try:
+        invalidate_all()
+    except RedisError as e:
+        logger.warning(u'Error invalidando el caché de series: %s', e)
+
+
 def _get_last_day_of_period(serie: pd.Series, periodicity: str) -> pd.datetime:
     frequencies_map_end = {
         "R/P1Y": "A",
@@ -27,17 +27,24 @@ def year_ago_column(col, freq, operation):
     if offset:
         values = col.values
         array = operation(values[offset:], values[:-offset])
-    else:  # Serie diaria o semanal, aplicamos la operacion iterativamente
-        for idx, val in col.iteritems():
-            value = get_value_a_year_ago(idx, col, validate=True)
-            if value != 0:
-                array.append(operation(val, value))
-            else:
-                array.append(None)
+    else:  # Serie diaria o semanal, alineamos cada valor con el de un año antes
+        array = year_ago_operation(col, operation)
 
     return pd.Series(array, index=col.index[offset:])
 
 
+def year_ago_operation(col, operation):
+    """Versión vectorizada de aplicar operation(valor, get_value_a_year_ago(...)) a cada
+    valor de la serie. La fecha de un año antes se calcula como con relativedelta (el
+    29 de febrero se compara con el 28), y si no existe en el índice (o su valor es 0)
+    el resultado es nulo
+    """
+    year_ago_values = col.reindex(col.index - pd.DateOffset(years=1)).values
+    result = operation(col.values, year_ago_values)
+    result[year_ago_values == 0] = np.nan
+    return result
+
+
 def get_value_a_year_ago(idx, col, validate=False):
     """Devuelve el valor de la serie determinada por df[col] un
     año antes del índice de tiempo 'idx'. Hace validación de si
@@ -73,73 +80,131 @@ def pct_change_a_year_ago(col, freq):
     return year_ago_column(col, freq, _pct_change)
 
 
-def process_column(col, index):
+def process_column(col, index, columnar_store=None):
     """Procesa una columna de la serie, calculando los valores de todas las
     transformaciones posibles para todos los intervalos de tiempo. Devuelve
-    la lista de acciones (dicts) a indexar en Elasticsearch
+    la lista de acciones (dicts) a indexar en Elasticsearch. Si se pasa un
+    ColumnarStore, guarda también en él los valores de cada transformación
+    """
+    return list(column_actions(col, index, columnar_store))
+
+
+def column_actions(col, index, columnar_store=None, transformations=None, since=None):
+    """Versión lazy de process_column: genera las acciones a indexar a medida que se
+    calcula cada transformación. Si se pasan las transformaciones ya calculadas de la
+    columna (ver column_transformations) se usan esas. Si se pasa 'since' (última fecha
+    ya indexada de una serie a la que sólo se le agregaron valores), se generan
+    únicamente las acciones de los períodos afectados por los valores nuevos
+    """
+    series_id = col.name
+    orig_freq = col.index.freq
+
+    if transformations is None:
+        transformations = column_transformations(col)
+
+    for freq, agg, transform_df in transformations:
+        if columnar_store is not None:
+            columnar_store.write(series_id, freq, agg, transform_df)
+
+        if since is not None:
+            transform_df = transform_df.iloc[trailing_periods_start(transform_df.index, since):]
+
+        # Marcamos a los datos de la frecuencia original como los originales
+        yield from elastic_actions(transform_df, index, series_id, freq, agg, raw_value=orig_freq == freq)
+
+
+def trailing_periods_start(index, since):
+    """Posición en el índice de tiempo de una transformación del primer período cuyos
+    valores pueden cambiar al agregarse datos posteriores a 'since': el que contiene a
+    'since' (que pudo estar incompleto) y los siguientes. Se incluye además el período
+    anterior, por los índices corridos de los colapsos semestrales fuera de fase
+    """
+    return max(index.searchsorted(since, side='right') - 2, 0)
+
+
+def column_transformations(col):
+    """Genera, para cada intervalo de tiempo y agregación posibles de la serie, una
+    tupla (freq, agg, DataFrame) con los valores de todos los modos de representación
+    (columnas) indexados por fecha. Es la información guardada en los backends de datos
     """
 
     # Filtro de valores nulos iniciales/finales
     col = col[col.first_valid_index():col.last_valid_index()]
 
     orig_freq = col.index.freq
-    series_id = col.name
 
-    actions = []
     # Lista de intervalos temporales de pandas EN ORDEN
     freqs = constants.PANDAS_FREQS
     if orig_freq not in freqs:
         raise ValueError(u'Frecuencia inválida: {}'.format(str(orig_freq)))
 
-    for freq in freqs:
-        # Promedio
-        avg = index_transform(col, lambda x: x.mean(), index, series_id, freq, 'avg')
-        actions.extend(avg.values.flatten())
+    # Valores originales de todos los modos de representación, base de las agregaciones
+    # máximo y mínimo de cada modo
+    original_df = interval_transform(col, lambda x: x.mean(), orig_freq)
 
-        if orig_freq == freq:
-            for row in avg:  # Marcamos a estos datos como los originales
-                row['_source']['raw_value'] = True
-            break
+    for freq in freqs:
+        if orig_freq == freq:  # Sólo el promedio, que son los valores originales
+            if original_df is not None:
+                yield freq, 'avg', original_df
+            return
 
-        # Suma
-        _sum = index_transform(col, sum, index, series_id, freq, 'sum')
-        actions.extend(_sum.values.flatten())
+        avg_df = None
+        for agg, transform_function in (('avg', lambda x: x.mean()),
+                                        ('sum', sum),
+                                        ('end_of_period', end_of_period)):
+            transform_df = interval_transform(col, transform_function, freq)
+            if transform_df is not None:
+                yield freq, agg, transform_df
+            if agg == 'avg':
+                avg_df = transform_df
 
-        # End of period
-        eop = index_transform(col, end_of_period, index, series_id, freq, 'end_of_period')
-        actions.extend(eop.values.flatten())
+        if avg_df is None or original_df is None:
+            continue
 
-    return actions
+        # Por nombre, para usar las agregaciones optimizadas de pandas sobre todas las columnas
+        for agg, transform_function in (('max', 'max'),
+                                        ('min', 'min')):
+            yield freq, agg, extremes_transform(original_df, avg_df, transform_function, freq)
 
 
-def index_transform(col, transform_function, index, series_id, freq, name):
-    transform_col = col.resample(freq).apply(transform_function)
-    original_freq = col.index.freq
-    # Fix a colapsos fuera de fase:
-    if freq == constants.PANDAS_SEMESTER:
-        if original_freq == constants.PANDAS_SEMESTER:
-            normalize_semestral_time_index(transform_col)
-        else:
-            months_offset = transform_col.index[0].month - 1
-            if months_offset:
-                transform_col.drop(transform_col.index[0], inplace=True)
-            offset = pd.DateOffset(months=months_offset)
-            transform_col.index = transform_col.index - offset
-            transform_col.index.freq = constants.PANDAS_SEMESTER
+def interval_transform(col, transform_function, freq):
+    transform_col = resample(col, transform_function, freq)
 
     if not transform_col.count() or transform_col.isnull().all():
-        return pd.Series()
+        return None
 
     try:
         handle_missing_values(col, transform_col)
     except ValueError:
         raise ValueError(u'Error borrando valores sobrantes durante la indexación')
-    transform_df = generate_interval_transformations_df(transform_col, freq)
-    result = transform_df.apply(elastic_index,
-                                axis='columns',
-                                args=(index, series_id, freq, name))
+    return generate_interval_transformations_df(transform_col, freq)
 
-    return result
+
+def extremes_transform(original_df, avg_df, transform_function, freq):
+    """Máximo o mínimo de cada modo de representación de los valores originales, por
+    período. Se toman los mismos períodos que el promedio del intervalo (avg_df), es
+    decir sin los períodos incompletos borrados por handle_missing_values
+    """
+    transform_df = resample(original_df, transform_function, freq)
+    return transform_df.reindex(avg_df.index)
+
+
+def resample(data, transform_function, freq):
+    """Agrupa los valores de la serie o DataFrame 'data' en períodos de frecuencia 'freq'"""
+    transform_data = data.resample(freq).apply(transform_function)
+    original_freq = data.index.freq
+    # Fix a colapsos fuera de fase:
+    if freq == constants.PANDAS_SEMESTER:
+        if original_freq == constants.PANDAS_SEMESTER:
+            normalize_semestral_time_index(transform_data)
+        else:
+            months_offset = transform_data.index[0].month - 1
+            if months_offset:
+                transform_data.drop(transform_data.index[0], inplace=True)
+            offset = pd.DateOffset(months=months_offset)
+            transform_data.index = transform_data.index - offset
+            transform_data.index.freq = constants.PANDAS_SEMESTER
+    return transform_data
 
 
 def normalize_semestral_time_index(transform_col):
@@ -175,41 +240,38 @@ def generate_interval_transformations_df(col, freq):
     return df
 
 
-def elastic_index(row, index, series_id, freq, agg):
-    """Arma el JSON entendible por el bulk request de ES y lo
-    agrega a la lista de bulk_actions
-
-    la fila tiene forma de iterable con los datos de un único
-    valor de la serie: el valor real, su variación inmnediata,
-    porcentual, etc
+def elastic_actions(transform_df, index, series_id, freq, agg, raw_value=False):
+    """Genera las acciones del bulk request de ES para los valores de transform_df,
+    una por fila: el valor real, su variación inmediata, porcentual, etc. Las columnas
+    se convierten enteras a listas de floats de Python, omitiendo los valores no finitos
     """
-
-    # Borrado de la parte de tiempo del timestamp
-    timestamp = str(row.name)
-    timestamp = timestamp[:timestamp.find('T')]
-    freq = freq_pandas_to_interval(freq.freqstr)
-    action = {
-        "_index": index,
-        "_type": settings.TS_DOC_TYPE,
-        "_id": None,
-        "_source": {}
-    }
-
-    source = {
-        settings.TS_TIME_INDEX_FIELD: timestamp,
-        'series_id': series_id,
-        "interval": freq,
-        "aggregation": agg
-    }
-
-    for column, value in row.iteritems():
-        if value is not None and np.isfinite(value):
-            # Todo: buscar método más elegante para resolver precisión incorrecta de los valores
-            # Ver issue: https://github.com/datosgobar/series-tiempo-ar-api/issues/63
-            # Convertir el np.float64 a string logra evitar la pérdida de precision. Luego se
-            # convierte a float de Python para preservar el tipado numérico del valor
-            source[column] = float(str(value))
-
-    action['_id'] = series_id + '-' + freq + '-' + agg + '-' + timestamp
-    action['_source'] = source
-    return action
+    interval = freq_pandas_to_interval(freq.freqstr)
+    timestamps = transform_df.index.strftime('%Y-%m-%d')
+
+    columns = []
+    for column in transform_df.columns:
+        values = transform_df[column].values.astype(np.float64)
+        # Los valores se indexan como floats de Python. repr (y por lo tanto tolist) de un
+        # np.float64 es la representación más corta que preserva el valor exacto
+        # Ver issue: https://github.com/datosgobar/series-tiempo-ar-api/issues/63
+        columns.append((column, values.tolist(), np.isfinite(values).tolist()))
+
+    for i, timestamp in enumerate(timestamps):
+        source = {
+            settings.TS_TIME_INDEX_FIELD: timestamp,
+            'series_id': series_id,
+            "interval": interval,
+            "aggregation": agg
+        }
+        for column, values, finite in columns:
+            if finite[i]:
+                source[column] = values[i]
+        if raw_value:
+            source['raw_value'] = True
+
+        yield {
+            "_index": index,
+            "_type": settings.TS_DOC_TYPE,
+            "_id": series_id + '-' + interval + '-' + agg + '-' + timestamp,
+            "_source": source
+        }
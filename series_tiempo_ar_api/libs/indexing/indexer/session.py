@@ -0,0 +1,116 @@
+#! coding: utf-8
+"""Sesión de indexación de una corrida completa sobre el índice de series: durante la
+corrida se desactivan el refresco y las réplicas del índice, y al terminar se restauran
+los valores anteriores y se hace un único refresh y force merge. Los valores anteriores
+se guardan en el _meta del mapping del índice, por lo que una sesión iniciada en un
+proceso (read_datajson) puede terminarse en otro (el cierre de la corrida).
+
+Junto a los valores se guarda un vencimiento (TS_INDEXING_SESSION_MAX_DURATION segundos
+desde el inicio): la sesión de una corrida interrumpida, cuyo cierre nunca se ejecuta
+(por ejemplo, un worker terminado con SIGKILL), se termina en el próximo reporte de
+indexación (ver tasks.send_indexation_report_email) o al iniciar la sesión siguiente
+"""
+import logging
+import time
+from typing import Optional
+
+from django.conf import settings
+from elasticsearch import Elasticsearch, ConnectionTimeout
+from elasticsearch_dsl.connections import connections
+
+from series_tiempo_ar_api.libs.indexing import constants
+from .index import tseries_index
+
+logger = logging.getLogger(__name__)
+
+SESSION_META_KEY = 'indexing_session'
+SESSION_DEADLINE_META_KEY = 'indexing_session_deadline'
+
+REFRESH_INTERVAL = 'refresh_interval'
+NUMBER_OF_REPLICAS = 'number_of_replicas'
+
+BULK_SETTINGS = {
+    REFRESH_INTERVAL: -1,
+    NUMBER_OF_REPLICAS: 0,
+}
+
+
+class IndexingSession:
+    """Uso: with IndexingSession(index): ... o start() y end() desde procesos distintos"""
+
+    def __init__(self, index: str, elastic: Optional[Elasticsearch] = None):
+        self.index = index
+        self.elastic = elastic or connections.get_connection()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
+
+    def start(self):
+        """Guarda la configuración actual del índice y aplica la de carga masiva. Si ya
+        hay una sesión iniciada y vigente (una corrida anterior que no terminó), se
+        mantienen los valores guardados por esa sesión, con un nuevo vencimiento. Una
+        sesión vencida se termina antes de iniciar la nueva
+        """
+        if not self.elastic.indices.exists(index=self.index):
+            tseries_index(self.index)
+        elif self.end_expired():
+            logger.warning(u'Sesión de indexación vencida terminada en el índice %s', self.index)
+        elif self.saved_settings() is not None:
+            logger.info(u'Sesión de indexación ya iniciada en el índice %s', self.index)
+            self._save(self.saved_settings())
+            return
+
+        index_settings = self.elastic.indices.get_settings(index=self.index)
+        current = next(iter(index_settings.values()))['settings']['index']
+        self._save({key: current.get(key) for key in BULK_SETTINGS})
+        self.elastic.indices.put_settings(index=self.index, body={'index': BULK_SETTINGS})
+
+    def end(self) -> bool:
+        """Restaura la configuración guardada por start(), refresca el índice y lo
+        compacta. No hace nada si no hay una sesión iniciada. Devuelve True si terminó
+        una sesión
+        """
+        saved = self.saved_settings()
+        if saved is None:
+            return False
+
+        self.elastic.indices.put_settings(index=self.index, body={'index': saved})
+        self._save(None)
+        self.elastic.indices.refresh(index=self.index)
+        try:
+            self.elastic.indices.forcemerge(index=self.index,
+                                            max_num_segments=constants.FORCE_MERGE_SEGMENTS,
+                                            request_timeout=constants.REQUEST_TIMEOUT)
+        except ConnectionTimeout:
+            logger.info(u'El force merge del índice %s continúa en segundo plano', self.index)
+        return True
+
+    def end_expired(self) -> bool:
+        """Termina la sesión si pasó su vencimiento. Devuelve True si terminó una sesión"""
+        deadline = self._meta().get(SESSION_DEADLINE_META_KEY)
+        if deadline is None or time.time() < deadline:
+            return False
+        return self.end()
+
+    def saved_settings(self) -> Optional[dict]:
+        return self._meta().get(SESSION_META_KEY)
+
+    def _meta(self) -> dict:
+        if not self.elastic.indices.exists(index=self.index):
+            return {}
+
+        mapping = self.elastic.indices.get_mapping(index=self.index, doc_type=settings.TS_DOC_TYPE)
+        return next(iter(mapping.values()))['mappings'][settings.TS_DOC_TYPE].get('_meta') or {}
+
+    def _save(self, saved: Optional[dict]):
+        meta = {}
+        if saved is not None:
+            meta = {
+                SESSION_META_KEY: saved,
+                SESSION_DEADLINE_META_KEY: time.time() + settings.TS_INDEXING_SESSION_MAX_DURATION,
+            }
+        self.elastic.indices.put_mapping(index=self.index, doc_type=settings.TS_DOC_TYPE, body={'_meta': meta})
@@ -0,0 +1,69 @@
+#! coding: utf-8
+"""Cálculo de las transformaciones de las series de una distribución (ver
+operations.column_transformations) repartido en varios procesos.
+
+Los procesos del pool se crean con fork luego de guardar el DataFrame de la distribución
+en _distribution_df: lo heredan compartiendo la memoria de sus arrays con el proceso
+padre (copy-on-write), sin serializar las columnas. Cada proceso devuelve los
+DataFrames de transformaciones de una serie, a partir de los cuales el proceso padre
+genera las acciones para el bulk request a medida que se indexan.
+
+El pool se crea al entrar a distribution_transformations, antes de iniciar los threads
+del BulkWriter: hacer fork de un proceso con threads corriendo puede dejar locks tomados
+en los procesos hijos. Las transformaciones se piden al pool en tandas de a lo sumo
+POOL_BATCHES_PER_PROCESS * POOL_CHUNKSIZE series por proceso, y se devuelven a medida que
+terminan, por lo que el proceso padre no mantiene las de todas las series a la vez.
+"""
+import multiprocessing
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .operations import column_transformations
+
+# Series enviadas juntas a cada proceso del pool
+POOL_CHUNKSIZE = 2
+# Chunks por proceso de cada tanda de series pedida al pool
+POOL_BATCHES_PER_PROCESS = 2
+
+# DataFrame de la distribución que se está indexando, leído por los procesos del pool
+_distribution_df = None
+
+
+@contextmanager
+def distribution_transformations(df):
+    """Context manager que devuelve un iterable de (columna, transformaciones) para cada
+    columna de df, en orden. Las transformaciones son la lista de tuplas (freq, agg,
+    DataFrame) de column_transformations, calculadas a medida que se recorre el iterable.
+    El iterable debe consumirse dentro del bloque 'with'
+    """
+    if not _use_pool(df):
+        yield ((column, column_transformations(df[column])) for column in df.columns)
+        return
+
+    global _distribution_df
+    _distribution_df = df
+    try:
+        # El DataFrame se mantiene durante toda la vida del pool: un proceso que lo
+        # reemplace también lo hereda
+        with multiprocessing.get_context('fork').Pool(settings.TS_INDEXING_PROCESSES) as pool:
+            yield _pool_transformations(pool, list(df.columns))
+    finally:
+        _distribution_df = None
+
+
+def _pool_transformations(pool, columns):
+    batch_size = settings.TS_INDEXING_PROCESSES * POOL_CHUNKSIZE * POOL_BATCHES_PER_PROCESS
+    for start in range(0, len(columns), batch_size):
+        batch = columns[start:start + batch_size]
+        yield from zip(batch, pool.imap(_column_transformations, batch, chunksize=POOL_CHUNKSIZE))
+
+
+def _column_transformations(column):
+    return list(column_transformations(_distribution_df[column]))
+
+
+def _use_pool(df):
+    return settings.TS_INDEXING_PROCESSES > 1 and \
+        len(df.columns) >= settings.TS_INDEXING_MIN_PARALLEL_COLUMNS and \
+        'fork' in multiprocessing.get_all_start_methods()
@@ -0,0 +1,175 @@
+#! coding: utf-8
+"""Store de datos de series de sólo lectura, mapeado en memoria, para los workers de la API.
+
+Al terminar una corrida de indexación se publica, por catálogo, un archivo inmutable
+con los arrays del backend columnar (ver columnar_store.py) de todas sus series, uno a
+continuación del otro (fechas como int64 y valores float64, 8 bytes por elemento), más
+un índice JSON con el offset de cada array. Los workers abren el archivo con np.memmap,
+por lo que comparten las páginas cacheadas por el sistema operativo, y leen los datos
+con slicing sin copias.
+
+La publicación escribe un archivo de datos nuevo y reemplaza el índice en forma atómica
+con os.replace: los workers ven la versión anterior o la nueva, nunca una a medio escribir.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import quote
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django_datajsonar.models import Field
+
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.libs.indexing.columnar_store import ColumnarStore, SeriesArrays, REP_MODES, \
+    get_columnar_store
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.index.json'
+DATA_SUFFIX = '.bin'
+
+
+def publish_catalog(catalog_identifier: str, index: str, columnar_store: ColumnarStore = None):
+    """Publica el archivo de datos del catálogo a partir del backend columnar, reemplazando
+    al anterior. Se incluyen las series disponibles con datos en el backend columnar
+    """
+    fields = Field.objects \
+        .filter(distribution__dataset__catalog__identifier=catalog_identifier,
+                enhanced_meta__key=meta_keys.AVAILABLE) \
+        .select_related('distribution') \
+        .prefetch_related('distribution__enhanced_meta') \
+        .distinct()
+
+    series_hashes = {}
+    for field in fields:
+        distribution_meta = {meta.key: meta.value for meta in field.distribution.enhanced_meta.all()}
+        series_hashes[field.identifier] = distribution_meta.get(meta_keys.LAST_HASH)
+
+    write_catalog_file(get_mmap_root(index), catalog_identifier, series_hashes,
+                       columnar_store or get_columnar_store(index))
+
+
+def write_catalog_file(root: str, catalog_identifier: str, series_hashes: Dict[str, Optional[str]],
+                       columnar_store: ColumnarStore):
+    """Escribe el archivo de datos y el índice del catálogo con las series pasadas
+    (series_id: hash de los datos de su distribución)
+    """
+    os.makedirs(root, exist_ok=True)
+    name = quote(catalog_identifier, safe='')
+    data_file = '{}.{}{}'.format(name, timezone.now().strftime('%Y%m%d%H%M%S%f'), DATA_SUFFIX)
+
+    series = {}
+    offset = 0
+    tmp_path = os.path.join(root, data_file + '.tmp')
+    with open(tmp_path, 'wb') as data:
+        for series_id, data_hash in series_hashes.items():
+            entries = {}
+            for interval, agg, arrays in columnar_store.read_all(series_id):
+                length = len(arrays.dates)
+                entry = {'dates': offset, 'length': length, 'values': {}}
+                data.write(arrays.dates.astype(np.int64).tobytes())
+                offset += length
+                for rep_mode in REP_MODES:
+                    data.write(arrays.values[rep_mode].astype(np.float64).tobytes())
+                    entry['values'][rep_mode] = offset
+                    offset += length
+                entries['{}-{}'.format(interval, agg)] = entry
+
+            if entries:
+                series[series_id] = {'data_hash': data_hash, 'entries': entries}
+    os.replace(tmp_path, os.path.join(root, data_file))
+
+    index_path = os.path.join(root, name + INDEX_SUFFIX)
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump({'data_file': data_file, 'size': offset, 'series': series}, index_file)
+    os.replace(index_path + '.tmp', index_path)
+
+    # Los workers que todavía tengan abierto un archivo anterior lo siguen leyendo hasta
+    # reabrir el índice: el archivo borrado existe hasta que se cierre
+    for filename in os.listdir(root):
+        if filename.startswith(name + '.') and filename.endswith(DATA_SUFFIX) and filename != data_file:
+            os.remove(os.path.join(root, filename))
+
+
+def get_mmap_root(index: str) -> str:
+    return os.path.join(settings.TS_MMAP_STORE_ROOT, index)
+
+
+class MmapSeriesStore:
+    """Lector de los archivos publicados por publish_catalog. Revisa si hay archivos
+    nuevos cada settings.TS_MMAP_STORE_CHECK_INTERVAL segundos como máximo
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.catalogs = {}  # nombre del índice: (versión, índice, np.memmap)
+        self.series = {}  # series_id: (metadatos de la serie en el índice, np.memmap)
+        self.last_check = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.last_check is not None and now - self.last_check < settings.TS_MMAP_STORE_CHECK_INTERVAL:
+            return
+
+        with self.lock:
+            self.last_check = now
+            catalogs = {}
+            for entry in os.scandir(self.root) if os.path.isdir(self.root) else []:
+                if not entry.name.endswith(INDEX_SUFFIX):
+                    continue
+                # El índice se reemplaza con os.replace: un archivo nuevo tiene otro inodo
+                version = (entry.inode(), entry.stat().st_mtime_ns)
+                loaded = self.catalogs.get(entry.name)
+                if loaded is None or loaded[0] != version:
+                    loaded = self._load(entry.path, version)
+                if loaded is not None:
+                    catalogs[entry.name] = loaded
+
+            series = {}
+            for _, index, data in catalogs.values():
+                for series_id, series_index in index['series'].items():
+                    series[series_id] = (series_index, data)
+            self.catalogs, self.series = catalogs, series
+
+    def _load(self, index_path, version):
+        try:
+            with open(index_path) as index_file:
+                index = json.load(index_file)
+            data_path = os.path.join(self.root, index['data_file'])
+            data = np.memmap(data_path, dtype=np.float64, mode='r') if index['size'] else np.empty(0)
+        except (OSError, ValueError) as e:
+            logger.warning(u'Error abriendo el store de series %s: %s', index_path, e)
+            return None
+        return version, index, data
+
+    def is_fresh(self, series_id: str, data_hash: Optional[str]) -> bool:
+        """True si la serie está publicada con los datos de la última indexación"""
+        series = self.series.get(series_id)
+        return series is not None and data_hash is not None and series[0]['data_hash'] == data_hash
+
+    def read(self, series_id: str, interval: str, agg: str) -> Optional[SeriesArrays]:
+        series_index, data = self.series.get(series_id, (None, None))
+        entry = series_index and series_index['entries'].get('{}-{}'.format(interval, agg))
+        if not entry:
+            return None
+
+        length = entry['length']
+        dates = data[entry['dates']:entry['dates'] + length].view('datetime64[D]')
+        values = {rep_mode: data[offset:offset + length] for rep_mode, offset in entry['values'].items()}
+        return SeriesArrays(dates=dates, values=values)
+
+
+_stores: Dict[str, MmapSeriesStore] = {}
+
+
+def get_mmap_store(index: str) -> MmapSeriesStore:
+    """Store compartido por todos los requests del proceso"""
+    if index not in _stores:
+        _stores[index] = MmapSeriesStore(get_mmap_root(index))
+    return _stores[index]
@@ -0,0 +1,34 @@
+#! coding: utf-8
+"""Cantidad de jobs pendientes de una corrida de indexación, guardada en Redis para ser
+compartida por todos los workers. Cada job de la corrida se suma antes de ser encolado
+y se resta al terminar, con o sin errores; read_datajson se cuenta como un job más
+mientras encola los de los catálogos. El último job en terminar cierra la corrida (ver
+tasks.finish_indexing_run)
+"""
+from django_rq import get_connection
+
+PENDING_JOBS_KEY = 'indexing_run:{}:pending_jobs'
+
+# Vencimiento del contador, para no dejar claves de corridas con jobs perdidos (por
+# ejemplo, de un worker terminado con SIGKILL)
+PENDING_JOBS_TTL = 7 * 24 * 60 * 60  # Segundos
+
+
+def add(task_id: int, count: int = 1):
+    key = PENDING_JOBS_KEY.format(task_id)
+    pipeline = get_connection().pipeline()
+    pipeline.incrby(key, count)
+    pipeline.expire(key, PENDING_JOBS_TTL)
+    pipeline.execute()
+
+
+def done(task_id: int) -> bool:
+    """Resta un job terminado de la corrida. Devuelve True si era el último"""
+    key = PENDING_JOBS_KEY.format(task_id)
+    remaining = get_connection().decr(key)
+    if remaining > 0:
+        return False
+
+    get_connection().delete(key)
+    # Negativo: un job reencolado manualmente luego del cierre de la corrida
+    return remaining == 0
@@ -0,0 +1,38 @@
+#! coding: utf-8
+"""Métricas de escritura (ver bulk.BulkStats) acumuladas por los jobs de una corrida de
+indexación, guardadas en Redis para ser compartidas por todos los workers. El cierre de
+la corrida las registra en la tarea como un único total (ver tasks.finish_indexing_run)
+"""
+from django_rq import get_connection
+
+from series_tiempo_ar_api.libs.indexing.bulk import BulkStats
+from series_tiempo_ar_api.libs.indexing.pending_jobs import PENDING_JOBS_TTL
+
+RUN_STATS_KEY = 'indexing_run:{}:bulk_stats'
+
+COUNTERS = ['docs', 'bytes', 'retries', 'rejected']
+
+
+def add(task_id: int, stats: BulkStats):
+    key = RUN_STATS_KEY.format(task_id)
+    pipeline = get_connection().pipeline()
+    for counter in COUNTERS:
+        pipeline.hincrby(key, counter, getattr(stats, counter))
+    pipeline.hincrbyfloat(key, 'seconds', stats.seconds)
+    pipeline.expire(key, PENDING_JOBS_TTL)
+    pipeline.execute()
+
+
+def pop(task_id: int) -> BulkStats:
+    """Devuelve las métricas acumuladas por la corrida y las borra"""
+    key = RUN_STATS_KEY.format(task_id)
+    pipeline = get_connection().pipeline()
+    pipeline.hgetall(key)
+    pipeline.delete(key)
+    values, _ = pipeline.execute()
+
+    stats = BulkStats()
+    for counter in COUNTERS:
+        setattr(stats, counter, int(values.get(counter.encode(), 0)))
+    stats.seconds = float(values.get(b'seconds', 0))
+    return stats
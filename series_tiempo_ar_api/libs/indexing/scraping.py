@@ -10,7 +10,9 @@ from django_datajsonar.models import Distribution
 from pydatajson import DataJson
 from series_tiempo_ar.validations import validate_distribution
 
-from series_tiempo_ar_api.utils.csv_reader import read_distribution_csv
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.utils.csv_reader import read_distribution_csv, download_distribution, \
+    downloaded_validators
 from .strings import NO_DISTRIBUTION_URL, NO_DATASET_IDENTIFIER
 
 logger = logging.getLogger(__name__)
@@ -42,6 +44,35 @@ class Scraper(object):
 
         return True
 
+    def is_modified(self, model: Distribution) -> bool:
+        """Indica si los datos de la distribución pueden haber cambiado desde su última
+        indexación. Las distribuciones con archivo guardado se comparan por hash. Las que
+        se descargan de su URL se piden con un GET condicional, con los validadores HTTP
+        (ETag, Last-Modified) de la última descarga indexada
+        """
+        if self.read_local:
+            return True
+
+        if model.data_file:
+            return meta_keys.get(model, meta_keys.LAST_HASH) != model.data_hash
+
+        etag = meta_keys.get(model, meta_keys.ETAG)
+        last_modified = meta_keys.get(model, meta_keys.LAST_MODIFIED)
+        if not etag and not last_modified:
+            return True
+
+        return download_distribution(model, etag, last_modified) is not None
+
+    @staticmethod
+    def save_validators(model: Distribution):
+        """Guarda los validadores HTTP de la descarga de la distribución hecha en la corrida"""
+        etag, last_modified = downloaded_validators(model)
+        for key, value in ((meta_keys.ETAG, etag), (meta_keys.LAST_MODIFIED, last_modified)):
+            if value:
+                model.enhanced_meta.update_or_create(key=key, defaults={'value': value})
+            else:
+                model.enhanced_meta.filter(key=key).delete()
+
     def init_df(self, model):
         """Wrapper de descarga de una distribución y carga en un pandas dataframe.
         No le pasamos la url a read_csv directamente para evitar problemas de
@@ -5,3 +5,7 @@ NO_DISTRIBUTION_URL = u"URL de descarga faltante en distribución {}"
 NO_DATASET_IDENTIFIER = u"Dataset identifier no encontrado en dataset padre de distribución {}"
 
 BULK_REQUEST_ERROR = u"Error en la indexación: %s"
+BULK_STATS = u"Indexación de la distribución {}: {}"
+RUN_BULK_STATS = u"Indexación de las distribuciones de la corrida: {}"
+DOWNLOAD_STATS = u"Descarga de las distribuciones del catálogo {}: {}"
+BUILDING_INDEX_DISCARDED = u"Índice {} descartado, se mantiene el índice actual"
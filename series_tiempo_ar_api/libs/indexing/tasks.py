@@ -1,20 +1,31 @@
 #! coding: utf-8
+import hashlib
 import json
 import logging
 from traceback import format_exc
 
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from django_rq import job, get_queue
 from pydatajson import DataJson
+from redis.exceptions import RedisError
 
 from django_datajsonar.models import Node
-from django_datajsonar.models import Distribution
+from django_datajsonar.models import Distribution, Catalog, Metadata, ContentType
 
+from series_tiempo_ar_api.apps.api.query.series_cache import invalidate_distribution
+from series_tiempo_ar_api.apps.api.query.series_descriptor import load_descriptors
 from series_tiempo_ar_api.apps.management import meta_keys
 from series_tiempo_ar_api.apps.management.models import ReadDataJsonTask
+from series_tiempo_ar_api.libs.indexing import pending_jobs, run_stats, strings
+from series_tiempo_ar_api.libs.indexing.indexer.blue_green import building_index_name, promote_building_index
 from series_tiempo_ar_api.libs.indexing.indexer.distribution_indexer import DistributionIndexer
+from series_tiempo_ar_api.libs.indexing.indexer.metadata import touch_indexed_distributions
+from series_tiempo_ar_api.libs.indexing.indexer.session import IndexingSession
+from series_tiempo_ar_api.libs.indexing.mmap_store import publish_catalog
 from series_tiempo_ar_api.libs.indexing.popularity import update_popularity_metadata
+from series_tiempo_ar_api.utils.csv_reader import evict_cache
 from .report.report_generator import ReportGenerator
 from .scraping import Scraper
 
@@ -26,6 +37,13 @@ logger = logging.getLogger(__name__)
 def index_distribution(distribution_id, node_id, task_id,
                        read_local=False, index=settings.TS_INDEX, force=False):
 
+    try:
+        _index_distribution(distribution_id, node_id, task_id, read_local, index, force)
+    finally:
+        job_done(task_id)
+
+
+def _index_distribution(distribution_id, node_id, task_id, read_local, index, force):
     node = Node.objects.get(id=node_id)
     task = ReadDataJsonTask.objects.get(id=task_id)
     catalog = DataJson(json.loads(node.catalog))
@@ -33,25 +51,68 @@ def index_distribution(distribution_id, node_id, task_id,
                                                   dataset__catalog__identifier=node.catalog_id)
 
     try:
-        Scraper(read_local).run(distribution_model, catalog)
+        # Las distribuciones sin cambios desde su última indexación no se descargan ni validan
+        scraper = Scraper(read_local)
+        modified = force or scraper.is_modified(distribution_model)
+        if modified:
+            scraper.run(distribution_model, catalog)
 
-        changed = True
+        changed = modified
         _hash = distribution_model.enhanced_meta.filter(key=meta_keys.LAST_HASH)
-        if _hash:
+        if modified and _hash:
             changed = _hash[0].value != distribution_model.data_hash
 
         if changed or force:
-            DistributionIndexer(index=index).reindex(distribution_model)
+            indexer = DistributionIndexer(index=index)
+            indexer.reindex(distribution_model, incremental=settings.TS_INCREMENTAL_INDEXING and not force)
+            # El total de la corrida se registra en la tarea al cerrarla (ver finish_indexing_run)
+            logger.info(strings.BULK_STATS.format(distribution_id, indexer.bulk_stats))
+            _add_run_stats(task_id, indexer.bulk_stats)
+            distribution_model.enhanced_meta.update_or_create(key=meta_keys.LAST_INDEXED,
+                                                              defaults={'value': timezone.now().isoformat()})
 
         distribution_model.enhanced_meta.update_or_create(key=meta_keys.LAST_HASH,
                                                           defaults={'value': distribution_model.data_hash})
+        if modified:
+            scraper.save_validators(distribution_model)
         distribution_model.enhanced_meta.update_or_create(key=meta_keys.CHANGED,
                                                           defaults={'value': str(changed)})
 
         update_popularity_metadata(distribution_model)
+        update_metadata_hash(distribution_model)
 
     except Exception as e:
         _handle_exception(distribution_model.dataset, distribution_id, e, node, task)
+        return
+
+    # Fuera del bloque de indexación: un error de Redis no marca a la distribución como fallida
+    try:
+        invalidate_distribution(distribution_model)
+    except RedisError as e:
+        logger.warning(u'Error invalidando el caché de la distribución %s: %s', distribution_id, e)
+
+
+def _add_run_stats(task_id, stats):
+    try:
+        run_stats.add(task_id, stats)
+    except RedisError as e:
+        logger.warning(u'Error actualizando las métricas de la corrida %s: %s', task_id, e)
+
+
+def update_metadata_hash(distribution_model):
+    """Registra la fecha del último cambio de los metadatos de las series de la
+    distribución, usada como Last-Modified de las respuestas de la API
+    """
+    identifiers = distribution_model.field_set.exclude(identifier=None).values_list('identifier', flat=True)
+    hashes = sorted(descriptor.metadata_hash for descriptor in load_descriptors(identifiers).values())
+    metadata_hash = hashlib.sha1(u''.join(hashes).encode('utf-8')).hexdigest()
+    if meta_keys.get(distribution_model, meta_keys.METADATA_HASH) == metadata_hash:
+        return
+
+    distribution_model.enhanced_meta.update_or_create(key=meta_keys.METADATA_HASH,
+                                                      defaults={'value': metadata_hash})
+    distribution_model.enhanced_meta.update_or_create(key=meta_keys.METADATA_UPDATED,
+                                                      defaults={'value': timezone.now().isoformat()})
 
 
 def _handle_exception(dataset_model, distribution_id, exc, node, task):
@@ -89,5 +150,69 @@ def _handle_exception(dataset_model, distribution_id, exc, node, task):
 
 @job("api_report", timeout=-1)
 def send_indexation_report_email():
+    if settings.TS_INDEXING_SESSION_ENABLED and IndexingSession(settings.TS_INDEX).end_expired():
+        # Sesión de una corrida interrumpida, que no llegó a cerrarse (ver finish_indexing_run)
+        logger.warning(u'Sesión de indexación vencida terminada en el índice %s', settings.TS_INDEX)
+        touch_indexed_distributions()
+
     task = ReadDataJsonTask.objects.last()
     ReportGenerator(task).generate()
+
+
+def job_done(task_id):
+    """Registra el fin de un job de la corrida de indexación. Si era el último, encola el
+    cierre de la corrida
+    """
+    try:
+        finished = pending_jobs.done(task_id)
+    except RedisError as e:
+        logger.warning(u'Error actualizando los jobs pendientes de la corrida %s: %s', task_id, e)
+        return
+
+    if finished:
+        finish_indexing_run.delay(task_id)
+
+
+@job('api_index', timeout=-1)
+def finish_indexing_run(task_id):
+    """Cierre de la corrida de indexación, encolado al terminar todos sus jobs"""
+    task = ReadDataJsonTask.objects.get(id=task_id)
+    try:
+        ReadDataJsonTask.info(task, strings.RUN_BULK_STATS.format(run_stats.pop(task_id)))
+    except RedisError as e:
+        logger.warning(u'Error leyendo las métricas de la corrida %s: %s', task_id, e)
+    end_indexing_run(task)
+    evict_cache(Distribution.objects.filter(present=True))
+    if settings.TS_MMAP_STORE_ENABLED:
+        publish_series_stores.delay()
+
+
+def end_indexing_run(task):
+    """Fin de la corrida de indexación iniciada por read_datajson: termina la sesión de
+    indexación del índice de series y, si la corrida construyó un índice nuevo, lo valida
+    y lo publica
+    """
+    if settings.TS_INDEXING_SESSION_ENABLED and IndexingSession(settings.TS_INDEX).end():
+        # Los datos escritos durante la sesión recién son visibles luego del refresco del
+        # índice: las respuestas cacheadas y los validadores (ETag, Last-Modified) de las
+        # distribuciones indexadas se calcularon con los datos anteriores
+        changed = Metadata.objects.filter(key=meta_keys.CHANGED, value=str(True),
+                                          content_type=ContentType.objects.get_for_model(Distribution))
+        touch_indexed_distributions(changed.values_list('object_id', flat=True))
+
+    if task.indexing_mode == ReadDataJsonTask.ALL and settings.TS_BLUE_GREEN_REINDEX:
+        errors = promote_building_index(task)
+        for error in errors:
+            ReadDataJsonTask.info(task, error)
+        if errors:
+            ReadDataJsonTask.info(task, strings.BUILDING_INDEX_DISCARDED.format(building_index_name(task)))
+
+
+@job('api_index', timeout=-1)
+def publish_series_stores(index=settings.TS_INDEX):
+    """Publica los archivos de datos por catálogo leídos por el backend 'mmap' de la API"""
+    for catalog_identifier in Catalog.objects.values_list('identifier', flat=True):
+        try:
+            publish_catalog(catalog_identifier, index)
+        except OSError as e:
+            logger.error(u'Error publicando los datos del catálogo %s: %s', catalog_identifier, e)
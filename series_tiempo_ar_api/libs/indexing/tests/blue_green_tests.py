@@ -0,0 +1,123 @@
+#! coding: utf-8
+import os
+import shutil
+import tempfile
+
+import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from django_datajsonar.models import Catalog, Dataset, Distribution
+
+from series_tiempo_ar_api.apps.management import meta_keys
+from series_tiempo_ar_api.libs.indexing.indexer.blue_green import swap_alias, swap_columnar_store, \
+    drop_orphan_indices, save_metadata_snapshot, restore_metadata_snapshot
+
+
+class SwapAliasTests(SimpleTestCase):
+
+    def setUp(self):
+        self.elastic = mock.Mock()
+
+    def test_alias_moved_and_previous_index_removed(self):
+        self.elastic.indices.exists_alias.return_value = True
+        self.elastic.indices.get_alias.return_value = {'indicators-1': {'aliases': {'indicators': {}}}}
+
+        swap_alias(self.elastic, 'indicators-2', 'indicators')
+        actions = self.elastic.indices.update_aliases.call_args[1]['body']['actions']
+        self.assertEqual(actions, [{"add": {"index": "indicators-2", "alias": "indicators"}},
+                                   {"remove_index": {"index": "indicators-1"}}])
+
+    def test_index_with_alias_name_replaced(self):
+        self.elastic.indices.exists_alias.return_value = False
+        self.elastic.indices.exists.return_value = True
+
+        swap_alias(self.elastic, 'indicators-2', 'indicators')
+        actions = self.elastic.indices.update_aliases.call_args[1]['body']['actions']
+        self.assertEqual(actions, [{"add": {"index": "indicators-2", "alias": "indicators"}},
+                                   {"remove_index": {"index": "indicators"}}])
+
+    def test_first_index(self):
+        self.elastic.indices.exists_alias.return_value = False
+        self.elastic.indices.exists.return_value = False
+
+        swap_alias(self.elastic, 'indicators-2', 'indicators')
+        actions = self.elastic.indices.update_aliases.call_args[1]['body']['actions']
+        self.assertEqual(actions, [{"add": {"index": "indicators-2", "alias": "indicators"}}])
+
+
+@override_settings(TS_INDEX='indicators', TS_COLUMNAR_STORE_ENABLED=False)
+class DropOrphanIndicesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.elastic = mock.Mock()
+        self.elastic.indices.exists_alias.return_value = True
+        self.elastic.indices.get_alias.return_value = {'indicators-1': {'aliases': {'indicators': {}}}}
+        self.elastic.indices.get.return_value = {'indicators-1': {}, 'indicators-2': {}, 'indicators-3': {},
+                                                 'indicators-meta': {}}
+
+    def deleted(self):
+        return [call[1]['index'] for call in self.elastic.indices.delete.call_args_list]
+
+    def test_orphan_indices_deleted(self):
+        drop_orphan_indices(self.elastic)
+
+        self.assertEqual(self.deleted(), ['indicators-2', 'indicators-3'])
+
+    def test_building_index_kept(self):
+        drop_orphan_indices(self.elastic, keep=['indicators-3'])
+
+        self.assertEqual(self.deleted(), ['indicators-2'])
+
+
+class SwapColumnarStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, index, name):
+        os.makedirs(os.path.join(self.root, index), exist_ok=True)
+        open(os.path.join(self.root, index, name), 'w').close()
+
+    def test_store_replaced(self):
+        self.write('indicators', 'old')
+        self.write('indicators-2', 'new')
+
+        with override_settings(TS_COLUMNAR_STORE_ROOT=self.root):
+            swap_columnar_store('indicators-2', 'indicators')
+
+        self.assertEqual(sorted(os.listdir(self.root)), ['indicators'])
+        self.assertEqual(os.listdir(os.path.join(self.root, 'indicators')), ['new'])
+
+
+class MetadataSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(TS_BLUE_GREEN_METADATA_ROOT=self.root)
+        self.settings.enable()
+        catalog = Catalog.objects.create(identifier='test_catalog')
+        dataset = Dataset.objects.create(catalog=catalog)
+        self.distribution = Distribution.objects.create(dataset=dataset, identifier='test_distribution')
+        self.field = self.distribution.field_set.create(identifier='test_field')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_metadata_restored(self):
+        self.distribution.enhanced_meta.create(key=meta_keys.LAST_HASH, value='old_hash')
+        save_metadata_snapshot('indicators-1')
+        self.distribution.enhanced_meta.filter(key=meta_keys.LAST_HASH).update(value='new_hash')
+        self.field.enhanced_meta.create(key=meta_keys.AVAILABLE, value='true')
+        self.field.enhanced_meta.create(key=meta_keys.HITS_TOTAL, value='10')
+
+        self.assertTrue(restore_metadata_snapshot('indicators-1'))
+        self.assertEqual(meta_keys.get(self.distribution, meta_keys.LAST_HASH), 'old_hash')
+        self.assertIsNone(meta_keys.get(self.field, meta_keys.AVAILABLE))
+        self.assertEqual(meta_keys.get(self.field, meta_keys.HITS_TOTAL), '10')
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_restore_without_snapshot(self):
+        self.assertFalse(restore_metadata_snapshot('indicators-1'))
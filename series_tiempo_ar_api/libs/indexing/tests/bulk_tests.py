@@ -0,0 +1,115 @@
+#! coding: utf-8
+import json
+
+import mock
+from django.test import SimpleTestCase, override_settings
+from elasticsearch import TransportError
+from elasticsearch.serializer import JSONSerializer
+
+from series_tiempo_ar_api.libs.indexing.bulk import BulkWriter
+
+
+def fake_elastic(statuses=()):
+    """Cliente que responde a cada bulk request con los status de 'statuses' (uno por
+    request, por defecto 201), aplicados a todos los documentos del request
+    """
+    statuses = list(statuses)
+    elastic = mock.Mock()
+    elastic.transport.serializer = JSONSerializer()
+    elastic.requests = []
+
+    def bulk(body):
+        docs = [json.loads(line) for line in body.splitlines()[::2]]
+        elastic.requests.append(docs)
+        status = statuses.pop(0) if statuses else 201
+        if isinstance(status, Exception):
+            raise status
+        return {'items': [{'index': {'_id': doc['index']['_id'], 'status': status}} for doc in docs]}
+
+    elastic.bulk.side_effect = bulk
+    return elastic
+
+
+def actions(count):
+    return ({'_index': 'index', '_type': 'doc', '_id': str(i), '_source': {'value': i}} for i in range(count))
+
+
+@override_settings(ES_BULK_MAX_RETRIES=2, ES_BULK_INITIAL_BACKOFF=0, ES_BULK_MAX_BACKOFF=0)
+class BulkWriterTests(SimpleTestCase):
+
+    def test_chunk_size(self):
+        elastic = fake_elastic()
+        writer = BulkWriter(elastic, chunk_size=10, threads=2)
+
+        self.assertFalse(list(writer.write(actions(25))))
+        self.assertEqual(sorted(len(docs) for docs in elastic.requests), [5, 10, 10])
+        self.assertEqual(writer.stats.docs, 25)
+        self.assertGreater(writer.stats.bytes, 0)
+
+    def test_chunk_bytes(self):
+        elastic = fake_elastic()
+        writer = BulkWriter(elastic, chunk_size=100, max_chunk_bytes=200, threads=1)
+
+        list(writer.write(actions(20)))
+        self.assertGreater(len(elastic.requests), 1)
+        self.assertEqual(sum(len(docs) for docs in elastic.requests), 20)
+
+    def test_rejected_documents_retried(self):
+        elastic = fake_elastic([429, 201])
+        writer = BulkWriter(elastic, chunk_size=10, threads=1)
+
+        self.assertFalse(list(writer.write(actions(10))))
+        self.assertEqual(len(elastic.requests), 2)
+        self.assertEqual(writer.stats.docs, 10)
+        self.assertEqual(writer.stats.retries, 10)
+        self.assertEqual(writer.stats.rejected, 0)
+
+    def test_rejected_request_retried(self):
+        elastic = fake_elastic([TransportError(429, 'es_rejected_execution_exception'), 201])
+        writer = BulkWriter(elastic, chunk_size=10, threads=1)
+
+        self.assertFalse(list(writer.write(actions(10))))
+        self.assertEqual(writer.stats.docs, 10)
+
+    def test_retries_exhausted(self):
+        elastic = fake_elastic([429, 429, 429])
+        writer = BulkWriter(elastic, chunk_size=10, threads=1)
+
+        errors = list(writer.write(actions(10)))
+        self.assertEqual(len(errors), 10)
+        self.assertEqual(len(elastic.requests), 3)
+        self.assertEqual(writer.stats.rejected, 10)
+
+    def test_errors_not_retried(self):
+        elastic = fake_elastic([400])
+        writer = BulkWriter(elastic, chunk_size=10, threads=1)
+
+        errors = list(writer.write(actions(10)))
+        self.assertEqual(len(errors), 10)
+        self.assertEqual(len(elastic.requests), 1)
+
+    def test_exception_propagated(self):
+        elastic = fake_elastic([TransportError(500, 'error')])
+        writer = BulkWriter(elastic, chunk_size=10, threads=1)
+
+        with self.assertRaises(TransportError):
+            list(writer.write(actions(10)))
+
+    @override_settings(ES_BULK_DISABLE_REFRESH_DOCS=10)
+    def test_refresh_disabled_and_restored(self):
+        elastic = fake_elastic()
+        elastic.indices.get_settings.return_value = {'index': {'settings': {'index': {'refresh_interval': '30s'}}}}
+        writer = BulkWriter(elastic, refresh_index='index', chunk_size=10, threads=1)
+
+        list(writer.write(actions(30)))
+        bodies = [call[1]['body'] for call in elastic.indices.put_settings.call_args_list]
+        self.assertEqual(bodies, [{'index': {'refresh_interval': -1}}, {'index': {'refresh_interval': '30s'}}])
+
+    @override_settings(ES_BULK_DISABLE_REFRESH_DOCS=10)
+    def test_refresh_already_disabled_not_restored(self):
+        elastic = fake_elastic()
+        elastic.indices.get_settings.return_value = {'index': {'settings': {'index': {'refresh_interval': '-1'}}}}
+        writer = BulkWriter(elastic, refresh_index='index', chunk_size=10, threads=1)
+
+        list(writer.write(actions(30)))
+        self.assertFalse(elastic.indices.put_settings.called)
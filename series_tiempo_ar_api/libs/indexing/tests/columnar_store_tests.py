@@ -0,0 +1,60 @@
+#! coding: utf-8
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing import constants
+from series_tiempo_ar_api.libs.indexing.columnar_store import ColumnarStore
+from series_tiempo_ar_api.libs.indexing.indexer.operations import process_column
+
+
+class ColumnarStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = ColumnarStore(self.root)
+        index = pd.date_range('2000-01-01', periods=36, freq='MS')
+        self.col = pd.Series(np.arange(36, dtype=float), index=index, name='serie/1')
+        self.col.iloc[10] = np.nan
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_same_values_as_es_documents(self):
+        actions = process_column(self.col, 'test_index', self.store)
+
+        for interval, agg in (('month', 'avg'), ('year', 'sum'), ('quarter', 'end_of_period')):
+            sources = [action['_source'] for action in actions
+                       if action['_source']['interval'] == interval and action['_source']['aggregation'] == agg]
+            arrays = self.store.read('serie/1', interval, agg)
+
+            self.assertEqual(len(arrays.dates), len(sources))
+            for i, source in enumerate(sources):
+                for rep_mode, values in arrays.values.items():
+                    if rep_mode in source:
+                        self.assertEqual(values[i], source[rep_mode])
+                    else:
+                        self.assertTrue(np.isnan(values[i]))
+
+    def test_original_interval_only_average(self):
+        process_column(self.col, 'test_index', self.store)
+
+        self.assertIsNotNone(self.store.read('serie/1', 'month', 'avg'))
+        self.assertIsNone(self.store.read('serie/1', 'month', 'sum'))
+
+    def test_delete_series(self):
+        process_column(self.col, 'test_index', self.store)
+        self.store.delete_series(['serie/1'])
+
+        self.assertIsNone(self.store.read('serie/1', 'month', 'avg'))
+        self.assertEqual(self.store.series_size('serie/1'), 0)
+
+    def test_values_read(self):
+        process_column(self.col, 'test_index', self.store)
+        arrays = self.store.read('serie/1', 'month', 'avg')
+
+        np.testing.assert_array_equal(arrays.values[constants.VALUE], self.col.values)
+        self.assertEqual(str(arrays.dates[0]), '2000-01-01')
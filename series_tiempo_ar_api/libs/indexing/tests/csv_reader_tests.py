@@ -0,0 +1,230 @@
+#! coding: utf-8
+import io
+import os
+import shutil
+import tempfile
+
+import mock
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.utils import csv_reader
+
+CSV = u'indice_tiempo,serie\n2017-01-01,1.5\n2017-02-01,2.5\n'
+
+
+def distribution(content, name='data.csv', data_hash='hash', columns=('indice_tiempo', 'serie')):
+    model = mock.Mock(download_url='http://datos.gob.ar/{}'.format(name), data_hash=data_hash)
+    model.field_set.exclude.return_value.values_list.return_value = list(columns)
+    model.data_file.name = name
+    model.data_file.open.side_effect = lambda mode: io.BytesIO(content)
+    return model
+
+
+class DistributionCsvCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(DISTRIBUTION_CACHE_ROOT=self.root,
+                                          DISTRIBUTION_DF_CACHE_SIZE=4,
+                                          DISTRIBUTION_ENCODING_SAMPLE_BYTES=1024)
+        self.settings.enable()
+        csv_reader._parsed.clear()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_read(self):
+        df = csv_reader.read_distribution_csv(distribution(CSV.encode()))
+
+        self.assertEqual(list(df['serie']), [1.5, 2.5])
+        self.assertEqual(len(os.listdir(self.root)), 1)
+
+    def test_parsed_once(self):
+        model = distribution(CSV.encode())
+        with mock.patch.object(csv_reader, 'parse_csv', wraps=csv_reader.parse_csv) as parse_csv:
+            df = csv_reader.read_distribution_csv(model)
+            df.drop('serie', axis='columns', inplace=True)
+            df = csv_reader.read_distribution_csv(model)
+            csv_reader.read_distribution_csv(model, indexable_only=True)
+
+        self.assertEqual(parse_csv.call_count, 1)
+        self.assertEqual(model.data_file.open.call_count, 1)
+        self.assertIn('serie', df.columns)
+
+    def test_new_version_keeps_previous_copy(self):
+        csv_reader.read_distribution_csv(distribution(CSV.encode()))
+        updated = CSV + u'2017-03-01,3.5\n'
+        df = csv_reader.read_distribution_csv(distribution(updated.encode(), data_hash='new_hash'))
+
+        self.assertEqual(list(df['serie']), [1.5, 2.5, 3.5])
+        self.assertEqual(len(os.listdir(self.root)), 2)
+
+    def test_evict_old_versions(self):
+        old = csv_reader.distribution_csv_path(distribution(CSV.encode()))
+        current = csv_reader.distribution_csv_path(distribution(CSV.encode(), data_hash='new_hash'))
+        removed = csv_reader.distribution_csv_path(distribution(CSV.encode(), name='removed.csv'))
+        for path in (old, current, removed):
+            os.utime(path, (0, 0))
+        os.utime(current, (1, 1))
+
+        with override_settings(DISTRIBUTION_CACHE_EVICTION_AGE=60):
+            csv_reader.evict_cache([distribution(CSV.encode())])
+
+        self.assertEqual(os.listdir(self.root), [os.path.basename(current)])
+
+    def test_recent_versions_not_evicted(self):
+        csv_reader.distribution_csv_path(distribution(CSV.encode()))
+        csv_reader.distribution_csv_path(distribution(CSV.encode(), name='removed.csv'))
+
+        with override_settings(DISTRIBUTION_CACHE_EVICTION_AGE=60):
+            csv_reader.evict_cache([])
+
+        self.assertEqual(len(os.listdir(self.root)), 2)
+
+    def test_encoding_detected_from_sample(self):
+        content = (u'indice_tiempo,serie_año\n' + u'2017-01-01,1.5\n' * 200).encode('latin-1')
+        df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertIn(u'serie_año', df.columns)
+
+    def test_ascii_sample_read_as_utf8(self):
+        content = (u'indice_tiempo,serie\n' + u'2017-01-01,1.5\n' * 200 + u'2017-01-01,ñ\n').encode('utf-8')
+        df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertEqual(df['serie'].iloc[-1], u'ñ')
+
+    def test_ascii_sample_of_latin1_file(self):
+        content = (u'indice_tiempo,serie\n' + u'2017-01-01,1.5\n' * 200 + u'2017-01-01,año\n').encode('latin-1')
+        df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertEqual(df['serie'].iloc[-1], u'año')
+
+    def test_undetected_encoding_read_as_latin1(self):
+        content = (u'indice_tiempo,serie\n' + u'2017-01-01,1.5\n' * 200 + u'2017-01-01,ñ\n').encode('latin-1')
+        with mock.patch.object(csv_reader, 'detect_encoding', return_value='utf-8'):
+            df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertEqual(df['serie'].iloc[-1], u'ñ')
+
+    def test_series_parsed_as_float(self):
+        content = u'indice_tiempo,serie,otra\n2017-01-01,1,a\n2017-02-01,2,b\n'.encode()
+        df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertEqual(df['serie'].dtype, 'float64')
+        self.assertEqual(list(df.index), [pd.Timestamp('2017-01-01'), pd.Timestamp('2017-02-01')])
+        self.assertIn('otra', df.columns)
+
+    def test_indexable_only_reads_series_columns(self):
+        content = u'indice_tiempo,serie,otra\n2017-01-01,1,a\n2017-02-01,2,b\n'.encode()
+        df = csv_reader.read_distribution_csv(distribution(content), indexable_only=True)
+
+        self.assertEqual(list(df.columns), ['serie'])
+
+    @override_settings(DISTRIBUTION_CSV_PYARROW=True)
+    def test_pyarrow_engine_requires_supported_pandas(self):
+        with mock.patch.object(csv_reader, 'pyarrow'), mock.patch.object(pd, '__version__', '1.1.5'):
+            self.assertEqual(csv_reader.csv_engine(), 'c')
+        with mock.patch.object(csv_reader, 'pyarrow'), mock.patch.object(pd, '__version__', '1.4.0'):
+            self.assertEqual(csv_reader.csv_engine(), 'pyarrow')
+
+    @override_settings(DISTRIBUTION_CSV_PYARROW=True)
+    def test_typed_parse_without_pyarrow_engine(self):
+        with mock.patch.object(csv_reader, 'pyarrow'), mock.patch.object(pd, '__version__', '1.1.5'), \
+                mock.patch.object(csv_reader, 'parse_inferred_csv') as parse_inferred_csv:
+            df = csv_reader.read_distribution_csv(distribution(CSV.encode()))
+
+        parse_inferred_csv.assert_not_called()
+        self.assertEqual(list(df['serie']), [1.5, 2.5])
+
+    def test_non_iso_dates_inferred(self):
+        content = u'indice_tiempo,serie\n2017/01/01,1\n2017/02/01,2\n'.encode()
+        df = csv_reader.read_distribution_csv(distribution(content))
+
+        self.assertEqual(df.index[1], pd.Timestamp('2017-02-01'))
+
+
+def response(status_code=200, content=b'', headers=None):
+    resp = mock.MagicMock(status_code=status_code, headers=headers or {})
+    resp.__enter__.return_value = resp
+    resp.iter_content.return_value = [content]
+    return resp
+
+
+class ConditionalDownloadTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(DISTRIBUTION_CACHE_ROOT=self.root,
+                                          DISTRIBUTION_DOWNLOAD_TIMEOUT=10,
+                                          DISTRIBUTION_PREFETCH_MAX_AGE=60)
+        self.settings.enable()
+        self.session = mock.Mock()
+        patcher = mock.patch.object(csv_reader, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        csv_reader._downloads.clear()
+        self.model = mock.Mock(download_url='http://datos.gob.ar/data.csv')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_not_modified(self):
+        self.session.get.return_value = response(status_code=304)
+        path = csv_reader.download_distribution(self.model, etag='"v1"', last_modified='Mon, 01 Jan 2018 00:00:00 GMT')
+
+        self.assertIsNone(path)
+        self.assertEqual(self.session.get.call_args[1]['headers'],
+                         {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2018 00:00:00 GMT'})
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_modified_downloaded_with_validators(self):
+        self.session.get.return_value = response(content=CSV.encode(), headers={'ETag': '"v2"'})
+        path = csv_reader.download_distribution(self.model, etag='"v1"')
+
+        with open(path) as f:
+            self.assertEqual(f.read(), CSV)
+        self.assertEqual(csv_reader.downloaded_validators(self.model), ('"v2"', None))
+
+    def test_download_reused_in_process(self):
+        self.session.get.return_value = response(content=CSV.encode(), headers={'ETag': '"v2"'})
+        csv_reader.download_distribution(self.model)
+        self.model.data_file = None
+        with override_settings(TESTS_IN_PROGRESS=False):
+            csv_reader.distribution_csv_path(self.model)
+
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_old_download_not_reused_in_process(self):
+        self.session.get.return_value = response(content=CSV.encode(), headers={'ETag': '"v2"'})
+        csv_reader.download_distribution(self.model)
+        self.model.data_file = None
+        with mock.patch.object(csv_reader.time, 'time', return_value=csv_reader.time.time() + 120):
+            self.assertEqual(csv_reader.downloaded_validators(self.model), (None, None))
+            with override_settings(TESTS_IN_PROGRESS=False):
+                csv_reader.distribution_csv_path(self.model)
+
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_prefetched_download_reused(self):
+        self.session.get.return_value = response(content=CSV.encode(), headers={'ETag': '"v2"'})
+        url = csv_reader.distribution_url(self.model)
+        csv_reader.save_prefetched_download(url, csv_reader.fetch(url))
+        path = csv_reader.download_distribution(self.model, etag='"v1"')
+
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(csv_reader.downloaded_validators(self.model), ('"v2"', None))
+        with open(path) as f:
+            self.assertEqual(f.read(), CSV)
+
+    def test_prefetched_not_modified_only_for_same_validators(self):
+        self.session.get.return_value = response(status_code=304)
+        url = csv_reader.distribution_url(self.model)
+        csv_reader.save_prefetched_download(url, csv_reader.fetch(url, etag='"v1"'))
+
+        self.assertIsNone(csv_reader.download_distribution(self.model, etag='"v1"'))
+        self.assertEqual(self.session.get.call_count, 1)
+        csv_reader.download_distribution(self.model, etag='"v0"')
+        self.assertEqual(self.session.get.call_count, 2)
@@ -0,0 +1,51 @@
+#! coding: utf-8
+import json
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing.indexer.diff import diff_actions, document_hash
+from series_tiempo_ar_api.libs.indexing.indexer.operations import process_column
+
+
+class DiffActionsTests(SimpleTestCase):
+
+    def setUp(self):
+        index = pd.date_range('2000-01-01', periods=36, freq='MS')
+        self.col = pd.Series(np.random.rand(36), index=index, name='serie')
+        # Documentos guardados: el _source leído de Elasticsearch, luego de pasar por JSON
+        self.stored = {action['_id']: document_hash(json.loads(json.dumps(action['_source'])))
+                       for action in process_column(self.col, 'index')}
+
+    def diff(self, col):
+        return list(diff_actions(process_column(col, 'index'), dict(self.stored), 'index'))
+
+    def test_unchanged_series(self):
+        self.assertFalse(self.diff(self.col))
+
+    def test_revised_value(self):
+        self.col.iloc[20] += 1
+        current = {action['_id']: action for action in process_column(self.col, 'index')}
+
+        actions = self.diff(self.col)
+        self.assertTrue(actions)
+        self.assertLess(len(actions), len(current))
+        for action in actions:
+            self.assertEqual(action, current[action['_id']])
+        self.assertIn('serie-month-avg-2001-09-01', [action['_id'] for action in actions])
+        self.assertNotIn('serie-month-avg-2000-01-01', [action['_id'] for action in actions])
+
+    def test_removed_values_deleted(self):
+        actions = self.diff(self.col[:30])
+
+        deleted = [action['_id'] for action in actions if action.get('_op_type') == 'delete']
+        self.assertIn('serie-month-avg-2002-12-01', deleted)
+        self.assertNotIn('serie-month-avg-2002-06-01', deleted)
+
+    def test_new_series(self):
+        self.stored = {}
+        self.assertEqual(len(self.diff(self.col)), len(process_column(self.col, 'index')))
+
+    def test_hash_ignores_key_order(self):
+        self.assertEqual(document_hash({'a': 1.5, 'b': 'c'}), document_hash({'b': 'c', 'a': 1.5}))
@@ -0,0 +1,82 @@
+#! coding: utf-8
+import shutil
+import tempfile
+import time
+
+import mock
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.libs.indexing import downloader
+from series_tiempo_ar_api.libs.indexing.downloader import DistributionDownloader
+from series_tiempo_ar_api.utils import csv_reader
+
+
+def distribution(identifier, url):
+    return mock.Mock(identifier=identifier, download_url=url, data_file=None)
+
+
+@override_settings(DISTRIBUTION_DOWNLOAD_THREADS=4,
+                   DISTRIBUTION_DOWNLOAD_HOST_CONNECTIONS=1,
+                   DISTRIBUTION_DOWNLOAD_HOST_INTERVAL=0,
+                   DISTRIBUTION_PREFETCH_MAX_AGE=60)
+class DistributionDownloaderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(DISTRIBUTION_CACHE_ROOT=self.root)
+        self.settings.enable()
+        patcher = mock.patch.object(downloader.meta_keys, 'get', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_downloads_recorded_for_index_jobs(self):
+        distributions = [distribution('1', 'http://a.gob.ar/1.csv'), distribution('2', 'http://b.gob.ar/2.csv')]
+
+        def fetch(url, *_):
+            path = csv_reader.write_cache_file(url, [b'indice_tiempo,serie\n'])
+            return csv_reader.Download(path, '"v1"', None, 20)
+
+        loader = DistributionDownloader()
+        with mock.patch.object(downloader, 'fetch', side_effect=fetch):
+            result = list(loader.prefetch(distributions))
+
+        self.assertCountEqual(result, distributions)
+        self.assertEqual(csv_reader.prefetched_download('http://a.gob.ar/1.csv').etag, '"v1"')
+        self.assertEqual((loader.stats.files, loader.stats.bytes), (2, 40))
+
+    def test_shared_url_downloaded_once(self):
+        distributions = [distribution('1', 'http://a.gob.ar/1.csv'), distribution('2', 'http://a.gob.ar/1.csv')]
+        with mock.patch.object(downloader, 'fetch', return_value=csv_reader.Download(None, None, None, 0)) as fetch:
+            result = list(DistributionDownloader().prefetch(distributions))
+
+        self.assertCountEqual(result, distributions)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_errors_counted(self):
+        distributions = [distribution('1', 'http://a.gob.ar/1.csv')]
+        loader = DistributionDownloader()
+        with mock.patch.object(downloader, 'fetch', side_effect=IOError):
+            result = list(loader.prefetch(distributions))
+
+        self.assertEqual(result, distributions)
+        self.assertEqual(loader.stats.errors, 1)
+
+    def test_host_connections_limited(self):
+        active = {'now': 0, 'max': 0}
+
+        def fetch(*_):
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+            time.sleep(0.01)
+            active['now'] -= 1
+            return csv_reader.Download(None, None, None, 0)
+
+        distributions = [distribution(str(i), 'http://a.gob.ar/{}.csv'.format(i)) for i in range(6)]
+        with mock.patch.object(downloader, 'fetch', side_effect=fetch):
+            list(DistributionDownloader().prefetch(distributions))
+
+        self.assertEqual(active['max'], 1)
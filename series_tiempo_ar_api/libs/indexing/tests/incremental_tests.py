@@ -0,0 +1,70 @@
+#! coding: utf-8
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing.indexer.incremental import appended_since, series_data_hash
+from series_tiempo_ar_api.libs.indexing.indexer.operations import column_actions, process_column
+
+
+class AppendedSinceTests(SimpleTestCase):
+
+    def setUp(self):
+        index = pd.date_range('2000-01-01', periods=30, freq='MS')
+        self.col = pd.Series(np.random.rand(30), index=index, name='serie')
+        self.indexed = self.col[:24]
+        self.indexed_hash = series_data_hash(self.indexed)
+        self.indexed_end = self.indexed.index[-1].date().isoformat()
+
+    def test_appended_values(self):
+        self.assertEqual(appended_since(self.col, self.indexed_hash, self.indexed_end), self.indexed.index[-1])
+
+    def test_changed_history(self):
+        self.col.iloc[3] += 1
+
+        self.assertIsNone(appended_since(self.col, self.indexed_hash, self.indexed_end))
+
+    def test_removed_values(self):
+        self.assertIsNone(appended_since(self.col[:20], self.indexed_hash, self.indexed_end))
+
+    def test_not_indexed(self):
+        self.assertIsNone(appended_since(self.col, None, None))
+
+    def test_trailing_nulls_not_indexed(self):
+        self.col.iloc[22:24] = np.nan
+        indexed = self.col[:24]
+
+        since = appended_since(self.col, series_data_hash(indexed), self.indexed_end)
+        self.assertEqual(since, self.col.index[21])
+
+
+class IncrementalActionsTests(SimpleTestCase):
+
+    def assert_changed_documents_included(self, freq, periods, new_periods):
+        index = pd.date_range('2000-03-01', periods=periods + new_periods, freq=freq)
+        col = pd.Series(np.random.rand(len(index)), index=index, name='serie')
+        indexed = col[:periods]
+
+        previous = {action['_id']: action['_source'] for action in process_column(indexed, 'index')}
+        current = {action['_id']: action['_source'] for action in process_column(col, 'index')}
+        incremental = {action['_id']: action['_source']
+                       for action in column_actions(col, 'index', since=indexed.last_valid_index())}
+
+        changed = {_id for _id, source in current.items() if previous.get(_id) != source}
+        self.assertTrue(changed)
+        self.assertTrue(changed.issubset(incremental.keys()))
+        self.assertTrue(set(previous).issubset(current))
+        for _id, source in incremental.items():
+            self.assertEqual(source, current[_id])
+
+    def test_monthly(self):
+        self.assert_changed_documents_included('MS', 50, 1)
+
+    def test_monthly_many_values(self):
+        self.assert_changed_documents_included('MS', 50, 14)
+
+    def test_quarterly(self):
+        self.assert_changed_documents_included('QS', 21, 2)
+
+    def test_daily(self):
+        self.assert_changed_documents_included('D', 800, 3)
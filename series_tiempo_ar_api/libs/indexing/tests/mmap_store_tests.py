@@ -0,0 +1,70 @@
+#! coding: utf-8
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.libs.indexing import constants
+from series_tiempo_ar_api.libs.indexing.columnar_store import ColumnarStore
+from series_tiempo_ar_api.libs.indexing.indexer.operations import process_column
+from series_tiempo_ar_api.libs.indexing.mmap_store import MmapSeriesStore, write_catalog_file
+
+
+@override_settings(TS_MMAP_STORE_CHECK_INTERVAL=0)
+class MmapSeriesStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.columnar_store = ColumnarStore(os.path.join(self.root, 'columnar'))
+        self.mmap_root = os.path.join(self.root, 'mmap')
+        index = pd.date_range('2000-01-01', periods=36, freq='MS')
+        self.col = pd.Series(np.arange(36, dtype=float), index=index, name='serie/1')
+        process_column(self.col, 'test_index', self.columnar_store)
+        self.store = MmapSeriesStore(self.mmap_root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_same_arrays_as_columnar_store(self):
+        write_catalog_file(self.mmap_root, 'catalog', {'serie/1': 'hash'}, self.columnar_store)
+        self.store.refresh()
+
+        for interval, agg in (('month', 'avg'), ('year', 'sum'), ('quarter', 'end_of_period')):
+            expected = self.columnar_store.read('serie/1', interval, agg)
+            arrays = self.store.read('serie/1', interval, agg)
+            np.testing.assert_array_equal(arrays.dates, expected.dates)
+            for rep_mode, values in expected.values.items():
+                np.testing.assert_array_equal(arrays.values[rep_mode], values)
+
+    def test_is_fresh(self):
+        write_catalog_file(self.mmap_root, 'catalog', {'serie/1': 'hash'}, self.columnar_store)
+        self.store.refresh()
+
+        self.assertTrue(self.store.is_fresh('serie/1', 'hash'))
+        self.assertFalse(self.store.is_fresh('serie/1', 'new_hash'))
+        self.assertFalse(self.store.is_fresh('serie/2', 'hash'))
+
+    def test_publish_replaces_previous_file(self):
+        write_catalog_file(self.mmap_root, 'catalog', {'serie/1': 'hash'}, self.columnar_store)
+        self.store.refresh()
+        old_values = self.store.read('serie/1', 'month', 'avg').values[constants.VALUE]
+
+        process_column(self.col * 2, 'test_index', self.columnar_store)
+        write_catalog_file(self.mmap_root, 'catalog', {'serie/1': 'new_hash'}, self.columnar_store)
+        self.store.refresh()
+
+        self.assertTrue(self.store.is_fresh('serie/1', 'new_hash'))
+        np.testing.assert_array_equal(self.store.read('serie/1', 'month', 'avg').values[constants.VALUE],
+                                      self.col.values * 2)
+        # Las lecturas previas siguen siendo válidas
+        np.testing.assert_array_equal(old_values, self.col.values)
+        self.assertEqual(len([name for name in os.listdir(self.mmap_root) if name.endswith('.bin')]), 1)
+
+    def test_missing_root(self):
+        self.store.refresh()
+
+        self.assertIsNone(self.store.read('serie/1', 'month', 'avg'))
+        self.assertFalse(self.store.is_fresh('serie/1', 'hash'))
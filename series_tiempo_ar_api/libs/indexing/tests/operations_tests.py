@@ -0,0 +1,48 @@
+#! coding: utf-8
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing import constants
+from series_tiempo_ar_api.libs.indexing.indexer.operations import change_a_year_ago, pct_change_a_year_ago
+
+
+class YearAgoOperationsTests(SimpleTestCase):
+
+    def test_daily_change_a_year_ago(self):
+        index = pd.date_range('2000-01-01', '2001-12-31', freq='D')
+        col = pd.Series(np.arange(1, len(index) + 1, dtype=float), index=index)
+
+        result = change_a_year_ago(col, constants.PANDAS_DAY)
+
+        self.assertTrue(result['2000'].isnull().all())
+        self.assertEqual(result['2001-01-01'], col['2001-01-01'] - col['2000-01-01'])
+        self.assertEqual(result['2001-12-31'], col['2001-12-31'] - col['2000-12-31'])
+
+    def test_leap_day_compared_with_february_28(self):
+        index = pd.to_datetime(['2019-02-28', '2020-02-28', '2020-02-29'])
+        col = pd.Series([1., 2., 4.], index=index)
+
+        result = change_a_year_ago(col, constants.PANDAS_DAY)
+
+        self.assertEqual(result.tolist()[1:], [1., 3.])
+
+    def test_missing_date_a_year_ago_is_null(self):
+        # Días hábiles: el 2000-01-08 fue sábado, no hay valor un año antes del 2001-01-08
+        index = pd.date_range('2000-01-03', '2001-01-10', freq='B')
+        col = pd.Series(np.ones(len(index)), index=index)
+
+        result = pct_change_a_year_ago(col, constants.PANDAS_DAY)
+
+        self.assertTrue(np.isnan(result['2001-01-08']))
+        self.assertEqual(result['2001-01-10'], 0)
+
+    def test_zero_value_a_year_ago_is_null(self):
+        index = pd.date_range('2000-01-01', '2001-01-31', freq='D')
+        col = pd.Series(np.ones(len(index)), index=index)
+        col['2000-01-05'] = 0
+
+        result = pct_change_a_year_ago(col, constants.PANDAS_DAY)
+
+        self.assertTrue(np.isnan(result['2001-01-05']))
+        self.assertEqual(result['2001-01-06'], 0)
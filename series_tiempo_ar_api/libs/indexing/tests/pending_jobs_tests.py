@@ -0,0 +1,57 @@
+#! coding: utf-8
+import mock
+from django.test import SimpleTestCase, TestCase
+from django_datajsonar.models import Node
+from django_rq import get_connection
+
+from series_tiempo_ar_api.apps.management.models import ReadDataJsonTask
+from series_tiempo_ar_api.apps.management.tasks.indexation import read_datajson
+from series_tiempo_ar_api.libs.indexing import pending_jobs
+
+
+class PendingJobsTests(SimpleTestCase):
+    task_id = 'pending_jobs_test'
+
+    def tearDown(self):
+        get_connection().delete(pending_jobs.PENDING_JOBS_KEY.format(self.task_id))
+
+    def test_last_job_done(self):
+        pending_jobs.add(self.task_id, 2)
+
+        self.assertFalse(pending_jobs.done(self.task_id))
+        self.assertTrue(pending_jobs.done(self.task_id))
+
+    def test_job_done_after_run_finished(self):
+        pending_jobs.add(self.task_id)
+        pending_jobs.done(self.task_id)
+
+        self.assertFalse(pending_jobs.done(self.task_id))
+
+
+@mock.patch('series_tiempo_ar_api.libs.indexing.tasks.finish_indexing_run')
+class RunFinishTests(TestCase):
+
+    def setUp(self):
+        self.task = ReadDataJsonTask.objects.create()
+        Node.objects.create(catalog_id='test_catalog', catalog_url='catalog.json', indexable=True)
+
+    def test_run_finished_after_jobs(self, finish):
+        read_datajson(self.task, read_local=True)
+
+        finish.delay.assert_called_once_with(self.task.id)
+
+    def test_run_finished_when_read_datajson_fails(self, finish):
+        with mock.patch('series_tiempo_ar_api.apps.management.tasks.indexation.read_catalog',
+                        side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                read_datajson(self.task, read_local=True)
+
+        finish.delay.assert_called_once_with(self.task.id)
+
+    def test_run_finished_when_catalog_read_fails(self, finish):
+        with mock.patch('series_tiempo_ar_api.libs.indexing.catalog_reader.index_catalog',
+                        side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                read_datajson(self.task, read_local=True)
+
+        finish.delay.assert_called_once_with(self.task.id)
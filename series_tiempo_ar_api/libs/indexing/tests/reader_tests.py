@@ -205,6 +205,18 @@ class IndexerTests(TestCase):
 
         self.assertTrue(list(results))
 
+    def test_failed_reindex_clears_indexed_data(self):
+        self._index_catalog('single_data.json')
+        field = Field.objects.get(identifier='102.1_I2NG_ABRI_M_22')
+        self.assertTrue(field.enhanced_meta.filter(key=meta_keys.INDEXED_DATA_HASH))
+
+        with mock.patch('series_tiempo_ar_api.libs.indexing.indexer.distribution_indexer.remove_duplicated_fields',
+                        side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                DistributionIndexer(index=self.test_index).reindex(field.distribution, incremental=True)
+
+        self.assertFalse(field.enhanced_meta.filter(key__in=[meta_keys.INDEXED_DATA_HASH, meta_keys.INDEXED_DATA_END]))
+
     def tearDown(self):
         if self.elastic.indices.exists(self.test_index):
             self.elastic.indices.delete(self.test_index)
@@ -0,0 +1,31 @@
+#! coding: utf-8
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing import run_stats
+from series_tiempo_ar_api.libs.indexing.bulk import BulkStats
+
+
+def bulk_stats(docs, seconds):
+    stats = BulkStats()
+    stats.docs = docs
+    stats.bytes = docs * 100
+    stats.seconds = seconds
+    return stats
+
+
+class RunStatsTests(SimpleTestCase):
+    task_id = 'run_stats_test'
+
+    def test_stats_added_across_jobs(self):
+        run_stats.add(self.task_id, bulk_stats(10, 1.5))
+        run_stats.add(self.task_id, bulk_stats(20, 0.5))
+
+        stats = run_stats.pop(self.task_id)
+        self.assertEqual((stats.docs, stats.bytes, stats.rejected), (30, 3000, 0))
+        self.assertAlmostEqual(stats.seconds, 2.0)
+
+    def test_pop_clears_stats(self):
+        run_stats.add(self.task_id, bulk_stats(10, 1.5))
+        run_stats.pop(self.task_id)
+
+        self.assertEqual(run_stats.pop(self.task_id).docs, 0)
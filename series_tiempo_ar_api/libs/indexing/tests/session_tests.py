@@ -0,0 +1,94 @@
+#! coding: utf-8
+import time
+
+import mock
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from series_tiempo_ar_api.libs.indexing.indexer.session import IndexingSession
+
+
+def fake_elastic(index_settings):
+    """Cliente con un único índice existente, que guarda su configuración y el _meta de su mapping"""
+    elastic = mock.Mock()
+    state = {'settings': dict(index_settings), 'meta': None}
+    elastic.state = state
+
+    def put_settings(index, body):
+        state['settings'].update(body['index'])
+
+    def put_mapping(index, doc_type, body):
+        state['meta'] = body['_meta']
+
+    elastic.indices.exists.return_value = True
+    elastic.indices.get_settings.side_effect = lambda index: {index: {'settings': {'index': dict(state['settings'])}}}
+    elastic.indices.put_settings.side_effect = put_settings
+    elastic.indices.get_mapping.side_effect = \
+        lambda index, doc_type: {index: {'mappings': {doc_type: {'_meta': state['meta'], 'properties': {}}}}}
+    elastic.indices.put_mapping.side_effect = put_mapping
+    return elastic
+
+
+class IndexingSessionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.elastic = fake_elastic({'refresh_interval': '30s', 'number_of_replicas': '1'})
+        self.session = IndexingSession('index', elastic=self.elastic)
+
+    def test_start_disables_refresh_and_replicas(self):
+        self.session.start()
+
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': -1, 'number_of_replicas': 0})
+
+    def test_end_restores_settings(self):
+        self.session.start()
+        self.assertTrue(self.session.end())
+
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': '30s', 'number_of_replicas': '1'})
+        self.elastic.indices.refresh.assert_called_once_with(index='index')
+        self.assertTrue(self.elastic.indices.forcemerge.called)
+        self.assertIsNone(self.session.saved_settings())
+
+    def test_unfinished_session_keeps_original_settings(self):
+        self.session.start()
+        IndexingSession('index', elastic=self.elastic).start()
+        IndexingSession('index', elastic=self.elastic).end()
+
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': '30s', 'number_of_replicas': '1'})
+
+    def test_expired_session_ended_on_start(self):
+        self.session.start()
+        with mock.patch('time.time', return_value=time.time() + settings.TS_INDEXING_SESSION_MAX_DURATION + 1):
+            IndexingSession('index', elastic=self.elastic).start()
+
+        self.elastic.indices.refresh.assert_called_once_with(index='index')
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': -1, 'number_of_replicas': 0})
+        self.assertEqual(self.session.saved_settings(), {'refresh_interval': '30s', 'number_of_replicas': '1'})
+
+    def test_end_expired(self):
+        self.session.start()
+        self.assertFalse(self.session.end_expired())
+
+        with mock.patch('time.time', return_value=time.time() + settings.TS_INDEXING_SESSION_MAX_DURATION + 1):
+            self.assertTrue(self.session.end_expired())
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': '30s', 'number_of_replicas': '1'})
+
+    def test_end_without_session(self):
+        self.assertFalse(self.session.end())
+
+        self.assertFalse(self.elastic.indices.put_settings.called)
+        self.assertFalse(self.elastic.indices.forcemerge.called)
+
+    def test_settings_restored_on_error(self):
+        with self.assertRaises(ValueError):
+            with IndexingSession('index', elastic=self.elastic):
+                raise ValueError
+
+        self.assertEqual(self.elastic.state['settings'], {'refresh_interval': '30s', 'number_of_replicas': '1'})
+
+    def test_default_settings_restored(self):
+        elastic = fake_elastic({})
+        with IndexingSession('index', elastic=elastic):
+            pass
+
+        self.assertEqual(elastic.state['settings'], {'refresh_interval': None, 'number_of_replicas': None})
@@ -0,0 +1,64 @@
+#! coding: utf-8
+import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from series_tiempo_ar_api.libs.indexing.indexer.transformations_pool import distribution_transformations
+
+
+class DistributionTransformationsTests(SimpleTestCase):
+
+    def setUp(self):
+        index = pd.date_range('2000-01-01', periods=30, freq='MS')
+        self.df = pd.DataFrame(np.random.rand(30, 4), index=index, columns=['a', 'b', 'c', 'd'])
+
+    def assert_same_transformations(self, result, expected):
+        self.assertEqual([column for column, _ in result], [column for column, _ in expected])
+        for (_, transformations), (_, expected_transformations) in zip(result, expected):
+            transformations = list(transformations)
+            expected_transformations = list(expected_transformations)
+            self.assertEqual(len(transformations), len(expected_transformations))
+            for (freq, agg, df), (expected_freq, expected_agg, expected_df) in \
+                    zip(transformations, expected_transformations):
+                self.assertEqual((freq, agg), (expected_freq, expected_agg))
+                pd.testing.assert_frame_equal(df, expected_df)
+
+    @override_settings(TS_INDEXING_PROCESSES=2, TS_INDEXING_MIN_PARALLEL_COLUMNS=2)
+    def test_pool_same_result_as_serial(self):
+        with distribution_transformations(self.df) as transformations:
+            result = list(transformations)
+
+        with self.settings(TS_INDEXING_PROCESSES=1), distribution_transformations(self.df) as transformations:
+            expected = list(transformations)
+
+        self.assert_same_transformations(result, expected)
+
+    @override_settings(TS_INDEXING_PROCESSES=2, TS_INDEXING_MIN_PARALLEL_COLUMNS=2)
+    def test_pool_propagates_errors(self):
+        self.df.index.freq = None
+
+        with self.assertRaises(ValueError):
+            with distribution_transformations(self.df) as transformations:
+                list(transformations)
+
+    @override_settings(TS_INDEXING_PROCESSES=2, TS_INDEXING_MIN_PARALLEL_COLUMNS=2)
+    def test_pool_created_before_iterating(self):
+        # Los procesos se crean al entrar al bloque, antes de que se inicien los threads del BulkWriter
+        with mock.patch('series_tiempo_ar_api.libs.indexing.indexer.transformations_pool.multiprocessing') as mp:
+            mp.get_all_start_methods.return_value = ['fork']
+            with distribution_transformations(self.df):
+                mp.get_context.return_value.Pool.assert_called_once_with(2)
+
+    @override_settings(TS_INDEXING_PROCESSES=2, TS_INDEXING_MIN_PARALLEL_COLUMNS=2)
+    def test_pool_results_streamed_in_batches(self):
+        self.df = pd.concat([self.df.add_prefix(str(i)) for i in range(5)], axis='columns')
+        with mock.patch('series_tiempo_ar_api.libs.indexing.indexer.transformations_pool.multiprocessing') as mp:
+            mp.get_all_start_methods.return_value = ['fork']
+            pool = mp.get_context.return_value.Pool.return_value.__enter__.return_value
+            pool.imap.side_effect = lambda func, columns, chunksize: ([] for _ in columns)
+            with distribution_transformations(self.df) as transformations:
+                next(iter(transformations))
+
+                self.assertEqual(pool.imap.call_count, 1)
+                self.assertEqual(len(pool.imap.call_args[0][1]), 8)
@@ -1,32 +1,407 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
 import urllib.parse
-from io import BytesIO
+from collections import OrderedDict
+from typing import Collection, Iterable, NamedTuple, Optional, Tuple
 
 import chardet
 import requests
 import pandas as pd
 from django.conf import settings
 from django_datajsonar.models import Distribution
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
 
 from series_tiempo_ar_api.libs.indexing.strings import NO_DISTRIBUTION_URL
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
-def read_distribution_csv(distribution: Distribution) -> pd.DataFrame:
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+NOT_MODIFIED = 304
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+ISO_DATE_FORMAT = '%Y-%m-%d'
+# Primera versión de pandas con el engine pyarrow en read_csv
+PYARROW_ENGINE_PANDAS_VERSION = (1, 4)
+
+
+class Download(NamedTuple):
+    """Resultado de un GET a la URL de una distribución. Si la fuente no cambió (304),
+    'path' es None y los validadores son los enviados en el request
+    """
+    path: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    size: int
+
+
+_session = None
+# Descargas hechas en el proceso, por URL, con el momento en que se hicieron. Se reusan
+# por DISTRIBUTION_PREFETCH_MAX_AGE segundos, como las registradas por otros procesos
+_downloads = {}
+
+# DataFrames leídos en el proceso, por path del archivo local y 'indexable_only'. Una misma
+# corrida (validación e indexación de una distribución, o la escritura de los distintos
+# dumps) parsea cada archivo una única vez
+_parsed = OrderedDict()
+
+
+def read_distribution_csv(distribution: Distribution, indexable_only: bool = False) -> pd.DataFrame:
+    """DataFrame de los datos de la distribución, indexado por su índice de tiempo. Con
+    'indexable_only' se leen sólo las columnas de las series de la distribución (sus
+    Field), descartando las columnas no documentadas
+    """
+    path = distribution_csv_path(distribution)
+    columns = series_columns(distribution)
+    if os.path.dirname(path) != os.path.normpath(settings.DISTRIBUTION_CACHE_ROOT):  # Archivo fuera del caché
+        return parse_csv(path, columns, indexable_only)
+
+    key = (path, indexable_only)
+    if indexable_only and (path, False) in _parsed:  # Ya leído entero, por ejemplo para validarlo
+        df = _parsed[(path, False)]
+        return df[[col for col in df.columns if col in columns]].copy()
+
+    if key in _parsed:
+        _parsed.move_to_end(key)
+    else:
+        _parsed[key] = parse_csv(path, columns, indexable_only)
+        while len(_parsed) > settings.DISTRIBUTION_DF_CACHE_SIZE:
+            _parsed.popitem(last=False)
+
+    # Los llamadores pueden modificar el DataFrame (por ejemplo, borrar columnas)
+    return _parsed[key].copy()
+
+
+def series_columns(distribution: Distribution) -> frozenset:
+    """Títulos de las columnas de las series de la distribución"""
+    titles = distribution.field_set.exclude(title=None).values_list('title', flat=True)
+    return frozenset(titles) - {settings.INDEX_COLUMN}
+
+
+def parse_csv(path: str, columns: Collection[str] = (), indexable_only: bool = False) -> pd.DataFrame:
+    """Parsea el CSV con los tipos conocidos de antemano: float64 para las columnas de las
+    series ('columns') y fechas ISO 8601 en el índice de tiempo, sin inferirlos. Si el
+    archivo no cumple con esos tipos se parsea infiriéndolos, para que la validación de la
+    distribución reporte el error. Si el encoding detectado sobre la muestra no decodifica
+    el archivo, se detecta sobre el archivo entero y, en última instancia, se lee como
+    latin-1, que decodifica cualquier secuencia de bytes
+    """
+    try:
+        return parse_csv_with_encoding(path, detect_encoding(path), columns, indexable_only)
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        return parse_csv_with_encoding(path, detect_encoding(path, whole_file=True), columns, indexable_only)
+    except UnicodeDecodeError:
+        return parse_csv_with_encoding(path, 'latin-1', columns, indexable_only)
+
+
+def parse_csv_with_encoding(path: str, encoding: str, columns: Collection[str], indexable_only: bool) -> pd.DataFrame:
+    try:
+        return parse_typed_csv(path, encoding, columns, indexable_only)
+    except ValueError as e:
+        # Valores que no son números o fechas ISO 8601, o columnas faltantes. Incluye los
+        # UnicodeDecodeError del engine pyarrow, que no siempre respeta el encoding pedido:
+        # si el encoding es incorrecto, la lectura inferida los repite
+        logger.info(u'Lectura de %s con tipos inferidos: %s', path, e)
+        df = parse_inferred_csv(path, encoding)
+        if indexable_only:
+            df = df[[col for col in df.columns if col in columns]]
+        return df
+
+
+def parse_inferred_csv(path: str, encoding: str) -> pd.DataFrame:
+    return pd.read_csv(path,
+                       encoding=encoding,
+                       parse_dates=[settings.INDEX_COLUMN],
+                       index_col=settings.INDEX_COLUMN)
+
+
+def parse_typed_csv(path: str, encoding: str, columns: Collection[str], indexable_only: bool) -> pd.DataFrame:
+    with open(path, encoding=encoding, newline='') as f:
+        header = next(csv.reader(f), [])
+    dtype = {col: 'float64' for col in header if col in columns}
+    dtype[settings.INDEX_COLUMN] = str
+    usecols = list(dtype) if indexable_only else None
+
+    df = pd.read_csv(path, encoding=encoding, dtype=dtype, usecols=usecols, engine=csv_engine())
+    df[settings.INDEX_COLUMN] = pd.to_datetime(df[settings.INDEX_COLUMN], format=ISO_DATE_FORMAT)
+    return df.set_index(settings.INDEX_COLUMN)
+
+
+def csv_engine() -> str:
+    """Engine de pandas.read_csv: pyarrow si está instalado, soportado por la versión de
+    pandas y habilitado (settings.DISTRIBUTION_CSV_PYARROW)
+    """
+    if pyarrow is not None and settings.DISTRIBUTION_CSV_PYARROW and \
+            pandas_version() >= PYARROW_ENGINE_PANDAS_VERSION:
+        return 'pyarrow'
+    return 'c'
+
+
+def pandas_version() -> Tuple[int, ...]:
+    return tuple(int(part) for part in pd.__version__.split('.')[:2])
+
+
+def distribution_csv_path(distribution: Distribution) -> str:
+    """Path a una copia local de los datos de la distribución. Se lee el archivo guardado
+    en la distribución (data_file) si existe, y si no se descarga de su URL. Las copias se
+    guardan en DISTRIBUTION_CACHE_ROOT con el hash de la URL y de la versión de los datos
+    (nombre y data_hash del archivo guardado, ETag o Last-Modified; o el hash del contenido
+    descargado si no se conoce) como nombre, y se reusan mientras no cambie la versión
+    """
+    url = distribution_url(distribution)
+
+    if distribution.data_file:
+        version = '{}|{}'.format(distribution.data_file.name, distribution.data_hash)
+        path = cache_path(url, version)
+        if not os.path.exists(path):
+            with distribution.data_file.open('rb') as data_file:
+                write_cache_file(url, iter(lambda: data_file.read(CHUNK_SIZE), b''), path)
+        return path
+
+    if getattr(settings, 'TESTS_IN_PROGRESS', False):
+        return url
+
+    result = process_download(url)
+    if result is None:
+        download(url)
+        result = process_download(url)
+    return result.path
+
+
+def download_distribution(distribution: Distribution, etag: str = None, last_modified: str = None) -> Optional[str]:
+    """Descarga los datos de la URL de la distribución al caché local, con un GET
+    condicional si se pasan el ETag o Last-Modified de una descarga anterior. Devuelve
+    el path de la copia local, o None si la fuente no cambió desde esa descarga (304)
+    """
+    return download(distribution_url(distribution), etag, last_modified)
+
+
+def download(url: str, etag: str = None, last_modified: str = None) -> Optional[str]:
+    """Como download_distribution, pero reusando la descarga hecha previamente por
+    otro proceso (ver prefetched_download) si existe
+    """
+    result = prefetched_download(url, etag, last_modified) or fetch(url, etag, last_modified)
+    if result.path is None:
+        return None
+
+    _downloads[url] = (time.time(), result)
+    return result.path
+
+
+def fetch(url: str, etag: str = None, last_modified: str = None) -> Download:
+    """GET condicional de la URL, escribiendo el contenido al caché local si cambió"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    with get_session().get(url, headers=headers, stream=True, timeout=settings.DISTRIBUTION_DOWNLOAD_TIMEOUT) \
+            as response:
+        if response.status_code == NOT_MODIFIED:
+            return Download(None, etag, last_modified, 0)
+        response.raise_for_status()
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        version = etag or last_modified
+        if version is None:
+            path = write_cache_file(url, response.iter_content(CHUNK_SIZE))
+        else:
+            path = cache_path(url, version)
+            if not os.path.exists(path):
+                write_cache_file(url, response.iter_content(CHUNK_SIZE), path)
+
+    return Download(path, etag, last_modified, os.path.getsize(path))
+
+
+def save_prefetched_download(url: str, result: Download):
+    """Registra en el caché local el resultado de una descarga, para que la reusen los
+    procesos que lean la distribución (ver prefetched_download)
+    """
+    os.makedirs(settings.DISTRIBUTION_CACHE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.DISTRIBUTION_CACHE_ROOT, suffix='.tmp')
+    with os.fdopen(fd, 'w') as tmp_file:
+        json.dump(result._asdict(), tmp_file)
+    os.replace(tmp_path, _record_path(url))
+
+
+def prefetched_download(url: str, etag: str = None, last_modified: str = None) -> Optional[Download]:
+    """Descarga de la URL registrada hace menos de DISTRIBUTION_PREFETCH_MAX_AGE segundos.
+    Un 304 sólo vale para los mismos validadores con los que se hizo el request
+    """
+    try:
+        with open(_record_path(url)) as record:
+            if time.time() - os.fstat(record.fileno()).st_mtime > settings.DISTRIBUTION_PREFETCH_MAX_AGE:
+                return None
+            result = Download(**json.load(record))
+    except (OSError, ValueError, TypeError):
+        return None
+
+    if result.path is None:
+        return result if (result.etag, result.last_modified) == (etag, last_modified) else None
+    return result if os.path.exists(result.path) else None
+
+
+def process_download(url: str) -> Optional[Download]:
+    """Descarga de la URL hecha en el proceso hace menos de DISTRIBUTION_PREFETCH_MAX_AGE
+    segundos. Las anteriores se descartan, para que los procesos de larga vida (workers)
+    no lean versiones viejas de los datos
+    """
+    downloaded_at, result = _downloads.get(url, (None, None))
+    if result is None:
+        return None
+    if time.time() - downloaded_at > settings.DISTRIBUTION_PREFETCH_MAX_AGE:
+        del _downloads[url]
+        return None
+    return result
+
+
+def downloaded_validators(distribution: Distribution) -> Tuple[Optional[str], Optional[str]]:
+    """ETag y Last-Modified de la última descarga de la distribución hecha en el proceso"""
+    download_info = process_download(distribution_url(distribution))
+    if download_info is None:
+        return None, None
+    return download_info.etag, download_info.last_modified
+
+
+def distribution_url(distribution: Distribution) -> str:
     url = distribution.download_url
     if url is None:
         raise ValueError(NO_DISTRIBUTION_URL.format(distribution.identifier))
 
     # Fix a pandas fallando en lectura de URLs no ascii
     url = url.encode('UTF-8')
-    url = urllib.parse.quote(url, safe='/:?=&')
+    return urllib.parse.quote(url, safe='/:?=&')
 
-    if getattr(settings, 'TESTS_IN_PROGRESS', False):
-        with open(url, 'rb') as f:
-            content = f.read()
-    else:
-        content = requests.get(url, verify=False).content
 
-    encoding = chardet.detect(content)['encoding']
-    return pd.read_csv(BytesIO(content),
-                       encoding=encoding,
-                       parse_dates=[settings.INDEX_COLUMN],
-                       index_col=settings.INDEX_COLUMN)
+def get_session() -> requests.Session:
+    """Sesión de requests compartida por las descargas del proceso, que reusa hasta
+    DISTRIBUTION_DOWNLOAD_HOST_CONNECTIONS conexiones por host. Los errores de conexión y
+    de servidor se reintentan DISTRIBUTION_DOWNLOAD_RETRIES veces con backoff exponencial
+    """
+    global _session
+    if _session is None:
+        retry = Retry(total=settings.DISTRIBUTION_DOWNLOAD_RETRIES,
+                      backoff_factor=settings.DISTRIBUTION_DOWNLOAD_BACKOFF,
+                      status_forcelist=RETRY_STATUSES,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=settings.DISTRIBUTION_DOWNLOAD_HOST_CONNECTIONS)
+        _session = requests.Session()
+        _session.verify = False
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def cache_path(url: str, version: str) -> str:
+    return os.path.join(settings.DISTRIBUTION_CACHE_ROOT, '{}-{}.csv'.format(_hash(url), _hash(version)))
+
+
+def write_cache_file(url: str, chunks, path: str = None) -> str:
+    """Escribe los chunks de bytes a 'path' en forma atómica. Sin 'path', la versión del
+    archivo es el hash de su contenido. Devuelve el path escrito. Las copias de versiones
+    anteriores de la misma URL no se borran acá, otro proceso puede estar por leerlas (ver
+    evict_cache)
+    """
+    os.makedirs(settings.DISTRIBUTION_CACHE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.DISTRIBUTION_CACHE_ROOT, suffix='.tmp')
+    content_hash = hashlib.sha1()
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            for chunk in chunks:
+                content_hash.update(chunk)
+                tmp_file.write(chunk)
+        path = path or cache_path(url, content_hash.hexdigest())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    prefix = _hash(url) + '-'
+    for key in list(_parsed):
+        old_path = key[0]
+        if os.path.basename(old_path).startswith(prefix) and old_path != path:
+            del _parsed[key]
+    return path
+
+
+def evict_cache(distributions: Iterable[Distribution]):
+    """Borra del caché local los archivos sin modificar hace más de
+    DISTRIBUTION_CACHE_EVICTION_AGE segundos, salvo la copia más reciente de cada una de las
+    URLs de 'distributions': versiones anteriores, registros de descargas anticipadas y
+    copias de URLs que ya no se leen
+    """
+    if not os.path.isdir(settings.DISTRIBUTION_CACHE_ROOT):
+        return
+
+    current_urls = set()
+    for distribution in distributions:
+        try:
+            current_urls.add(_hash(distribution_url(distribution)))
+        except ValueError:
+            continue
+
+    files = []
+    newest = {}
+    for filename in os.listdir(settings.DISTRIBUTION_CACHE_ROOT):
+        path = os.path.join(settings.DISTRIBUTION_CACHE_ROOT, filename)
+        try:
+            modified = os.path.getmtime(path)
+        except FileNotFoundError:
+            continue
+        files.append((path, modified))
+        url_hash = filename.split('-')[0]
+        if filename.endswith('.csv') and url_hash in current_urls and \
+                modified >= newest.get(url_hash, (None, 0))[1]:
+            newest[url_hash] = (path, modified)
+
+    keep = {path for path, _ in newest.values()}
+    now = time.time()
+    for path, modified in files:
+        if path in keep or now - modified < settings.DISTRIBUTION_CACHE_EVICTION_AGE:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def detect_encoding(path: str, whole_file: bool = False) -> str:
+    """Encoding del archivo, detectado sobre sus primeros DISTRIBUTION_ENCODING_SAMPLE_BYTES
+    bytes o, con 'whole_file', leyéndolo hasta que el detector tenga un resultado seguro
+    """
+    detector = chardet.UniversalDetector()
+    with open(path, 'rb') as f:
+        if whole_file:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                detector.feed(chunk)
+                if detector.done:
+                    break
+        else:
+            detector.feed(f.read(settings.DISTRIBUTION_ENCODING_SAMPLE_BYTES))
+    encoding = detector.close()['encoding']
+    # Una muestra ASCII no descarta caracteres UTF-8 en el resto del archivo
+    if encoding is None or encoding.lower() == 'ascii':
+        return 'utf-8'
+    return encoding
+
+
+def _record_path(url: str) -> str:
+    return os.path.join(settings.DISTRIBUTION_CACHE_ROOT, '{}.json'.format(_hash(url)))
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()